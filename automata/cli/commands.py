@@ -253,6 +253,39 @@ def run_doc_post_process(
     main(**kwargs)
 
 
+@common_options
+@cli.command()
+@click.option(
+    "--top-k",
+    type=int,
+    default=64,
+    help="The number of ranks kept per symbol.",
+)
+@click.option(
+    "--num-workers",
+    type=int,
+    default=None,
+    help="The number of processes to use, all cores by default.",
+)
+@click.option(
+    "--log-level",
+    default="INFO",
+    help="Logging level",
+    type=click.Choice(["DEBUG", "INFO", "CLI_OUTPUT"], case_sensitive=False),
+)
+@click.pass_context
+def run_symbol_rank_basis(
+    ctx: click.Context, log_level: str, *args, **kwargs
+) -> None:
+    """Precompute the SymbolRank basis of the symbol graph."""
+
+    from automata.cli.scripts.run_symbol_rank_basis import main
+
+    configure_logging(log_level_str=log_level)
+    logger.info("Running SymbolRank basis precomputation:")
+    main(**kwargs)
+
+
 @common_options
 @agent_options
 @cli.command()
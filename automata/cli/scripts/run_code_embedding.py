@@ -87,6 +87,12 @@ def process_embeddings(
 
     symbol_code_embedding_handler.flush()  # Final flush for any remaining symbols that didn't form a complete batch
 
+    # Persist the inserts into the embedding index, if one is kept on disk
+    embedding_index = symbol_code_embedding_handler.embedding_index
+    if embedding_index is not None and embedding_index.directory is not None:
+        if embedding_index.is_built:
+            embedding_index.save(embedding_index.directory)
+
 
 def main(*args, **kwargs) -> str:
     """Run the code embedding script."""
@@ -88,7 +88,8 @@ def run_eval_harness(
                     f"Top {TOP_K_MATCHES} Search Results: {observed_action.search_results[:TOP_K_MATCHES]}\n"
                 )
             logger.debug(
-                f"Full Match: {result.is_full_match}\nPartial Match: {result.is_partial_match}"
+                f"Full Match: {result.is_full_match}\nPartial Match: {result.is_partial_match}\n"
+                f"Recall@{TOP_K_MATCHES}: {result.recall_at_k}"
             )
 
             logger.debug("=" * 150)
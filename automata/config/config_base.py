@@ -54,8 +54,11 @@ class SerializedDataCategory(PathEnum):
     """
 
     PICKLED_DATA_PATH = "graphs"
-    PICKLED_SYMBOL_GRAPH = "symbol_graph.pkl"
-    PICKLED_SYMBOL_SUBGRAPH = "symbol_subgraph.pkl"
+    COMPACT_SYMBOL_GRAPH = "symbol_graph"
+    COMPACT_SYMBOL_SUBGRAPH = "symbol_subgraph"
+    SYMBOL_GRAPH_METRICS = "symbol_metrics"
+    SYMBOL_RANK_BASIS = "symbol_rank_basis"
+    SCIP_DOCUMENT_RECORDS = "scip_document_records"
 
 
 class InstructionConfigVersion(PathEnum):
@@ -0,0 +1,181 @@
+"""
+Contains helpers which save numpy arrays as a directory of flat `.npy` files,
+along with the `StringTable` used to store strings among them.
+
+Each saved directory holds a JSON manifest naming its `SavedArrayFormat`.
+The manifest is written last, so it also marks the save as complete,
+and reading it back checks that the layout of the arrays is understood.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List, Literal, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+MmapMode = Optional[Literal["r+", "r", "w+", "c"]]
+
+MANIFEST_FILE_NAME = "manifest.json"
+
+
+class SavedArrayFormat(NamedTuple):
+    """
+    The name of a kind of saved artifact, and the version of its layout.
+    The version is bumped whenever the arrays of that artifact change.
+    """
+
+    name: str
+    version: int
+
+
+def save_arrays(
+    directory: str,
+    saved_format: SavedArrayFormat,
+    arrays: Dict[str, np.ndarray],
+    **fields: Any,
+) -> None:
+    """
+    Saves each array to `<directory>/<name>.npy`, then writes the manifest with `fields`.
+
+    The manifest of an earlier save is removed first, and every file is written
+    to a staging directory and renamed into place, so a failed save never leaves
+    a manifest over partly written arrays, and arrays which were memory-mapped
+    from an earlier save are not truncated.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST_FILE_NAME)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    staging_directory = tempfile.mkdtemp(prefix=".saving-", dir=directory)
+    try:
+        for name, array in arrays.items():
+            file_name = f"{name}.npy"
+            np.save(os.path.join(staging_directory, file_name), array)
+            os.replace(
+                os.path.join(staging_directory, file_name),
+                os.path.join(directory, file_name),
+            )
+        manifest = {
+            "format": saved_format.name,
+            "format_version": saved_format.version,
+            **fields,
+        }
+        with open(
+            os.path.join(staging_directory, MANIFEST_FILE_NAME), "w"
+        ) as f:
+            json.dump(manifest, f)
+        os.replace(
+            os.path.join(staging_directory, MANIFEST_FILE_NAME), manifest_path
+        )
+    finally:
+        shutil.rmtree(staging_directory, ignore_errors=True)
+
+
+def load_array(directory: str, name: str, mmap_mode: MmapMode) -> np.ndarray:
+    """Loads `<directory>/<name>.npy`, memory-mapping it unless `mmap_mode` is None."""
+    return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+
+
+def read_manifest(
+    directory: str, saved_format: SavedArrayFormat
+) -> Dict[str, Any]:
+    """
+    Reads the manifest of a saved artifact.
+
+    Raises:
+        ValueError: If the directory holds another artifact, or another format version
+    """
+    with open(os.path.join(directory, MANIFEST_FILE_NAME)) as f:
+        manifest = json.load(f)
+    found_format = (manifest.get("format"), manifest.get("format_version"))
+    if found_format != tuple(saved_format):
+        raise ValueError(
+            f"{directory} holds {found_format[0]} with format version {found_format[1]}, "
+            f"expected {saved_format.name} with format version {saved_format.version}."
+        )
+    return manifest
+
+
+def is_saved(directory: str, saved_format: SavedArrayFormat) -> bool:
+    """Checks if `directory` holds an artifact saved in `saved_format`."""
+    try:
+        read_manifest(directory, saved_format)
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+class StringTable(Sequence[str]):
+    """
+    An immutable table of strings, stored as one UTF-8 buffer and an array
+    of offsets. A permutation which sorts the strings allows for lookups by
+    binary search, so no per-string Python objects are built on load.
+    """
+
+    def __init__(
+        self, data: np.ndarray, offsets: np.ndarray, sorted_ids: np.ndarray
+    ) -> None:
+        self.data = data
+        self.offsets = offsets
+        self.sorted_ids = sorted_ids
+
+    @classmethod
+    def from_strings(cls, strings: List[str]) -> "StringTable":
+        encoded = [string.encode("utf-8") for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        sorted_ids = sorted(range(len(encoded)), key=encoded.__getitem__)
+        return cls(
+            np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            offsets,
+            np.array(sorted_ids, dtype=np.int64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):  # type: ignore
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self._get_bytes(int(index)).decode("utf-8")
+
+    def _get_bytes(self, index: int) -> bytes:
+        return self.data[
+            self.offsets[index] : self.offsets[index + 1]
+        ].tobytes()
+
+    def get_id(self, string: str) -> Optional[int]:
+        """Returns the index of `string` in the table, or None if it is absent."""
+        target = string.encode("utf-8")
+        low, high = 0, len(self.sorted_ids)
+        while low < high:
+            middle = (low + high) // 2
+            if self._get_bytes(int(self.sorted_ids[middle])) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.sorted_ids):
+            string_id = int(self.sorted_ids[low])
+            if self._get_bytes(string_id) == target:
+                return string_id
+        return None
+
+    def to_arrays(self, prefix: str) -> Dict[str, np.ndarray]:
+        return {
+            f"{prefix}data": self.data,
+            f"{prefix}offsets": self.offsets,
+            f"{prefix}sorted_ids": self.sorted_ids,
+        }
+
+    @classmethod
+    def from_arrays(
+        cls, directory: str, prefix: str, mmap_mode: MmapMode
+    ) -> "StringTable":
+        return cls(
+            *(
+                load_array(directory, f"{prefix}{name}", mmap_mode)
+                for name in ("data", "offsets", "sorted_ids")
+            )
+        )
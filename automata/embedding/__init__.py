@@ -2,14 +2,20 @@ from automata.embedding.embedding_base import (
     Embedding,
     EmbeddingBuilder,
     EmbeddingHandler,
+    EmbeddingIndex,
+    EmbeddingMatrix,
     EmbeddingSimilarityCalculator,
     EmbeddingVectorProvider,
 )
+from automata.embedding.ivf_embedding_index import IVFEmbeddingIndex
 
 __all__ = [
     "Embedding",
     "EmbeddingBuilder",
     "EmbeddingHandler",
+    "EmbeddingIndex",
+    "EmbeddingMatrix",
     "EmbeddingVectorProvider",
     "EmbeddingSimilarityCalculator",
+    "IVFEmbeddingIndex",
 ]
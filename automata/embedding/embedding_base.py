@@ -1,7 +1,9 @@
 import abc
+import hashlib
 import logging
+import weakref
 from enum import Enum
-from typing import Any, Dict, List, Sequence
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 import astunparse
 import numpy as np
@@ -77,6 +79,9 @@ class EmbeddingBuilder(abc.ABC):
 class EmbeddingHandler(abc.ABC):
     """An abstract class to handle batch embeddings."""
 
+    # Bumped whenever the embeddings change, so that data derived from them is rebuilt
+    revision: int = 0
+
     @abc.abstractmethod
     def get_embeddings(self, symbols: List[Symbol]) -> List[Any]:
         """An abstract method to get the embeddings entries for a list of symbols."""
@@ -96,21 +101,271 @@ class EmbeddingHandler(abc.ABC):
         """Perform any remaining updates that do not form a complete batch."""
         pass
 
+    def get_entry_count(self) -> Optional[int]:
+        """
+        Gets the number of entries in the store of the embeddings, or None if unknown.
+        It catches changes to the store which were not made through the handler.
+        """
+        return None
+
+
+class EmbeddingMatrix:
+    """
+    The vectors of a sequence of embeddings, normalized and stacked into one
+    contiguous float32 matrix, with the keys of the embeddings in the same order.
+    Similarities to a query are then a single matrix-vector product.
+    """
+
+    def __init__(self, keys: List[Any], vectors: np.ndarray) -> None:
+        self.keys = keys
+        self.vectors = vectors
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def from_embeddings(
+        cls, embeddings: Sequence[Embedding], norm_type: "EmbeddingNormType"
+    ) -> "EmbeddingMatrix":
+        """Stacks and normalizes the vectors of `embeddings`."""
+        if not embeddings:
+            return cls([], np.zeros((0, 0), dtype=np.float32))
+        vectors = np.array(
+            [embedding.vector for embedding in embeddings], dtype=np.float32
+        )
+        return cls(
+            [embedding.key for embedding in embeddings],
+            np.ascontiguousarray(
+                EmbeddingSimilarityCalculator._normalize_embeddings(
+                    vectors, norm_type
+                ),
+                dtype=np.float32,
+            ),
+        )
+
+    def get_checksum(self) -> str:
+        """
+        Gets a checksum of the keys and vectors, which does not depend on their order.
+        Vectors are rounded first, so that embeddings normalized in other batches agree.
+        """
+        key_names = [str(key) for key in self.keys]
+        order = sorted(range(len(key_names)), key=key_names.__getitem__)
+        digest = hashlib.sha256()
+        digest.update("\n".join(key_names[i] for i in order).encode("utf-8"))
+        if len(order):
+            # Adding zero turns negative zeros into positive ones
+            digest.update(
+                (np.round(self.vectors[order], 4) + 0.0)
+                .astype(np.float32)
+                .tobytes()
+            )
+        return digest.hexdigest()
+
+
+# A weak reference to an embedding handler, with its revision and entry count
+HandlerKey = Tuple[
+    "weakref.ReferenceType[EmbeddingHandler]", int, Optional[int]
+]
+
+
+def get_handler_key(embedding_handler: EmbeddingHandler) -> HandlerKey:
+    """
+    Gets the key of the current embeddings of `embedding_handler`.
+    Keys of a handler which was garbage collected match no other key.
+    """
+    return (
+        weakref.ref(embedding_handler),
+        embedding_handler.revision,
+        embedding_handler.get_entry_count(),
+    )
+
+
+class EmbeddingIndex(abc.ABC):
+    """
+    An abstract index over normalized embedding vectors, which finds the
+    embeddings most similar to a query without comparing it to all of them.
+    """
+
+    def __init__(
+        self,
+        norm_type: EmbeddingNormType = EmbeddingNormType.L2,
+        directory: Optional[str] = None,
+    ) -> None:
+        self.norm_type = norm_type
+        # Where the index is saved after it is built, if anywhere
+        self.directory = directory
+        # The key of the embeddings which the index holds, from `get_handler_key`,
+        # None when unknown, as for an index loaded from disk
+        self.handler_key: Optional[HandlerKey] = None
+        # The checksum of the embeddings which a loaded index was saved with
+        self.checksum: Optional[str] = None
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @property
+    @abc.abstractmethod
+    def is_built(self) -> bool:
+        """Checks if the index has been built, and can take inserts."""
+        pass
+
+    @abc.abstractmethod
+    def build(self, embedding_matrix: EmbeddingMatrix) -> None:
+        """Builds the index from scratch over `embedding_matrix`."""
+        pass
+
+    @abc.abstractmethod
+    def add(self, embeddings: Sequence[Embedding]) -> None:
+        """Inserts embeddings, replacing those already held for their keys."""
+        pass
+
+    @abc.abstractmethod
+    def discard(self, keys: Sequence[Any]) -> None:
+        """Removes the embeddings held for `keys`, ignoring unknown keys."""
+        pass
+
+    @abc.abstractmethod
+    def search(
+        self, query_vector: np.ndarray, k: int
+    ) -> List[Tuple[Any, float]]:
+        """
+        Gets the keys of the (approximately) `k` most similar embeddings to the
+        normalized `query_vector`, with their similarity, in descending order.
+        """
+        pass
+
+    @abc.abstractmethod
+    def save(self, directory: str) -> None:
+        """Saves the index to `directory`."""
+        pass
+
+    def holds_embeddings_of(
+        self,
+        embedding_handler: EmbeddingHandler,
+        get_embedding_matrix: Callable[[], EmbeddingMatrix],
+    ) -> bool:
+        """
+        Checks if the index holds the current embeddings of `embedding_handler`.
+        A loaded index is first compared to the checksum of `get_embedding_matrix()`.
+        """
+        if (
+            self.handler_key is None
+            and self.checksum is not None
+            and self.is_built
+        ):
+            if self.checksum == get_embedding_matrix().get_checksum():
+                self.mark_holds_embeddings_of(embedding_handler)
+            else:
+                logger.info("The loaded embedding index is out of date")
+            self.checksum = None
+        return self.is_built and self.handler_key == get_handler_key(
+            embedding_handler
+        )
+
+    def mark_holds_embeddings_of(
+        self, embedding_handler: EmbeddingHandler
+    ) -> None:
+        """
+        Records that the index holds the current embeddings of `embedding_handler`.
+        It is called once the handler has applied and counted its changes.
+        """
+        self.handler_key = get_handler_key(embedding_handler)
+
 
 class EmbeddingSimilarityCalculator:
     def __init__(
         self,
         embedding_provider: EmbeddingVectorProvider,
         norm_type: EmbeddingNormType = EmbeddingNormType.L2,
+        embedding_index: Optional[EmbeddingIndex] = None,
     ) -> None:
-        """Initializes SymbolSimilarity by building the associated symbol mappings."""
+        """
+        Initializes SymbolSimilarity by building the associated symbol mappings.
+        The `EmbeddingMatrix` of an embedding handler is built once, and rebuilt
+        when the revision or the entry count of the handler changes.
+
+        When an `embedding_index` is given, top-k queries over a handler search
+        it instead of every embedding. The index is built on the first query,
+        and rebuilt when it does not hold the current embeddings of the handler.
+        A loaded index is kept if its saved checksum matches those embeddings.
 
+        Raises:
+            ValueError: If the index normalizes embeddings differently
+        """
+
+        if (
+            embedding_index is not None
+            and embedding_index.norm_type != norm_type
+        ):
+            raise ValueError(
+                f"Embedding index norm type {embedding_index.norm_type} "
+                f"does not match {norm_type}."
+            )
         self.embedding_provider: EmbeddingVectorProvider = embedding_provider
         self.norm_type = norm_type
+        self.embedding_index = embedding_index
+        self._embedding_matrix: Optional[EmbeddingMatrix] = None
+        self._embedding_matrix_key: Optional[HandlerKey] = None
+
+    def get_embedding_matrix(
+        self, embedding_handler: EmbeddingHandler
+    ) -> EmbeddingMatrix:
+        """Gets the normalized matrix of all embeddings of `embedding_handler`, in order."""
+        key = get_handler_key(embedding_handler)
+        if self._embedding_matrix is None or self._embedding_matrix_key != key:
+            self._embedding_matrix = EmbeddingMatrix.from_embeddings(
+                embedding_handler.get_all_ordered_embeddings(), self.norm_type
+            )
+            self._embedding_matrix_key = key
+        return self._embedding_matrix
+
+    def get_embedding_index(
+        self, embedding_handler: EmbeddingHandler
+    ) -> EmbeddingIndex:
+        """
+        Gets the embedding index of the calculator, building it over the
+        embeddings of `embedding_handler` unless it already holds them.
+
+        Raises:
+            ValueError: If the calculator has no embedding index
+        """
+        index = self.embedding_index
+        if index is None:
+            raise ValueError("The calculator has no embedding index.")
+        if not index.holds_embeddings_of(
+            embedding_handler,
+            lambda: self.get_embedding_matrix(embedding_handler),
+        ):
+            index.build(self.get_embedding_matrix(embedding_handler))
+            index.mark_holds_embeddings_of(embedding_handler)
+            if index.directory is not None:
+                index.save(index.directory)
+        return index
+
+    def calculate_handler_top_k(
+        self,
+        embedding_handler: EmbeddingHandler,
+        query_text: str,
+        k: int,
+    ) -> List[Tuple[Any, float]]:
+        """
+        Gets the keys of the `k` embeddings of `embedding_handler` most similar
+        to the query, with their similarity, in descending order. The embedding
+        index is searched when the calculator has one, and every embedding otherwise.
+        """
+
+        if self.embedding_index is None:
+            return self.calculate_query_top_k(
+                self.get_embedding_matrix(embedding_handler), query_text, k
+            )
+        return self.get_embedding_index(embedding_handler).search(
+            self._build_query_vector(query_text), k
+        )
 
     def calculate_query_similarity_dict(
         self,
-        ordered_embeddings: Sequence[Embedding],
+        ordered_embeddings: Union[Sequence[Embedding], EmbeddingMatrix],
         query_text: str,
         return_sorted: bool = True,
     ) -> Dict[Symbol, float]:
@@ -120,46 +375,97 @@ class EmbeddingSimilarityCalculator:
         Return result is sorted in descending order by default.
         """
 
-        query_embedding_vector = (
-            self.embedding_provider.build_embedding_vector(query_text)
+        embedding_matrix = self._to_embedding_matrix(ordered_embeddings)
+        similarity_scores = self.calculate_query_similarity_vector(
+            embedding_matrix, query_text
+        )
+        order = (
+            # Stable, so that ties keep the order of the embeddings
+            np.argsort(-similarity_scores, kind="stable")
+            if return_sorted
+            else np.arange(len(similarity_scores))
         )
+        return {
+            embedding_matrix.keys[i]: similarity
+            for i, similarity in zip(
+                order.tolist(), similarity_scores[order].tolist()
+            )
+        }
+
+    def calculate_query_similarity_vector(
+        self,
+        ordered_embeddings: Union[Sequence[Embedding], EmbeddingMatrix],
+        query_text: str,
+    ) -> np.ndarray:
+        """
+        Calculates the similarity of the query to each of the embeddings,
+        as an array in the order of `ordered_embeddings`.
+        """
+
         # Compute the similarity of the query to all symbols
-        similarity_scores = self._calculate_embedding_similarity(
-            np.array([ele.vector for ele in ordered_embeddings]),
-            query_embedding_vector,
+        return self._calculate_embedding_similarity(
+            self._to_embedding_matrix(ordered_embeddings),
+            self._build_query_vector(query_text),
         )
 
-        similarity_dict = {
-            ele.key: similarity_scores[i]
-            for i, ele in enumerate(ordered_embeddings)
-        }
+    def calculate_query_top_k(
+        self,
+        ordered_embeddings: Union[Sequence[Embedding], EmbeddingMatrix],
+        query_text: str,
+        k: int,
+    ) -> List[Tuple[Any, float]]:
+        """
+        Gets the keys of the `k` embeddings most similar to the query, with their
+        similarity, in descending order. Only those `k` are sorted.
+        """
 
-        if return_sorted:
-            # Sort the dictionary by values in descending order
-            similarity_dict = dict(
-                sorted(
-                    similarity_dict.items(),
-                    key=lambda item: item[1],
-                    reverse=True,
-                )
+        embedding_matrix = self._to_embedding_matrix(ordered_embeddings)
+        similarity_scores = self.calculate_query_similarity_vector(
+            embedding_matrix, query_text
+        )
+        top = np.arange(len(similarity_scores))
+        if k < len(similarity_scores):
+            top = np.sort(np.argpartition(-similarity_scores, k - 1)[:k])
+        # Stable, so that ties keep the order of the embeddings
+        order = top[np.argsort(-similarity_scores[top], kind="stable")]
+        return [
+            (embedding_matrix.keys[i], similarity)
+            for i, similarity in zip(
+                order.tolist(), similarity_scores[order].tolist()
             )
+        ]
+
+    def _to_embedding_matrix(
+        self, ordered_embeddings: Union[Sequence[Embedding], EmbeddingMatrix]
+    ) -> EmbeddingMatrix:
+        if isinstance(ordered_embeddings, EmbeddingMatrix):
+            return ordered_embeddings
+        return EmbeddingMatrix.from_embeddings(
+            ordered_embeddings, self.norm_type
+        )
 
-        return similarity_dict
+    def _build_query_vector(self, query_text: str) -> np.ndarray:
+        """Builds the normalized float32 embedding vector of the query."""
+
+        query_embedding_vector = (
+            self.embedding_provider.build_embedding_vector(query_text)
+        )
+        return self._normalize_embeddings(
+            np.asarray(query_embedding_vector, dtype=np.float32)[
+                np.newaxis, :
+            ],
+            self.norm_type,
+        )[0]
 
     def _calculate_embedding_similarity(
-        self, ordered_embeddings: np.ndarray, embedding_array: np.ndarray
+        self, embedding_matrix: EmbeddingMatrix, normed_embedding: np.ndarray
     ) -> np.ndarray:
         """Calculate the similarity score between the embedding with all symbol embeddings"""
 
-        # Normalize the embeddings and the query embedding
-        embeddings_norm = self._normalize_embeddings(
-            ordered_embeddings, self.norm_type
-        )
-        normed_embedding = self._normalize_embeddings(
-            embedding_array[np.newaxis, :], self.norm_type
-        )[0]
-
-        return np.dot(embeddings_norm, normed_embedding)
+        if not len(embedding_matrix):
+            return np.zeros(0, dtype=np.float32)
+        # The embeddings are normalized when the matrix is built
+        return embedding_matrix.vectors @ normed_embedding
 
     @staticmethod
     def _normalize_embeddings(
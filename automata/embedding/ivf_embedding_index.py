@@ -0,0 +1,353 @@
+"""
+Contains the `IVFEmbeddingIndex` class, an inverted file index which finds
+approximate nearest neighbours among symbol embeddings, along with its on-disk format.
+"""
+
+import logging
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from automata.core.saved_arrays import (
+    SavedArrayFormat,
+    StringTable,
+    load_array,
+    read_manifest,
+    save_arrays,
+)
+from automata.embedding.embedding_base import (
+    Embedding,
+    EmbeddingIndex,
+    EmbeddingMatrix,
+    EmbeddingNormType,
+)
+from automata.symbol.symbol_parser import parse_symbol
+
+logger = logging.getLogger(__name__)
+
+IVF_EMBEDDING_INDEX_FORMAT = SavedArrayFormat("ivf_embedding_index", 2)
+
+# The number of vectors which k-means is trained on, per list
+KMEANS_SAMPLES_PER_LIST = 256
+# The number of vectors which are compared to the centroids at once
+ASSIGNMENT_CHUNK_SIZE = 4096
+
+
+def _assign_to_centroids(
+    vectors: np.ndarray, centroids: np.ndarray
+) -> np.ndarray:
+    """Assigns each vector to the list of the centroid most similar to it."""
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGNMENT_CHUNK_SIZE):
+        chunk = vectors[start : start + ASSIGNMENT_CHUNK_SIZE]
+        assignments[start : start + len(chunk)] = np.argmax(
+            chunk @ centroids.T, axis=1
+        )
+    return assignments
+
+
+def _train_centroids(
+    vectors: np.ndarray,
+    num_lists: int,
+    iterations: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """
+    Trains the unit-length centroids of `num_lists` lists with spherical k-means,
+    on a sample of `vectors`. Lists left empty are reseeded with random vectors.
+    """
+    sample_size = num_lists * KMEANS_SAMPLES_PER_LIST
+    if len(vectors) > sample_size:
+        vectors = vectors[
+            np.sort(rng.choice(len(vectors), sample_size, replace=False))
+        ]
+    centroids = vectors[
+        rng.choice(len(vectors), num_lists, replace=False)
+    ].astype(np.float32)
+
+    for _ in range(iterations):
+        assignments = _assign_to_centroids(vectors, centroids)
+        membership = sparse.csr_array(
+            (
+                np.ones(len(vectors), dtype=np.float32),
+                (assignments, np.arange(len(vectors))),
+            ),
+            shape=(num_lists, len(vectors)),
+        )
+        sums = membership @ vectors
+        is_empty = np.bincount(assignments, minlength=num_lists) == 0
+        sums[is_empty] = vectors[rng.choice(len(vectors), is_empty.sum())]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = (sums / np.maximum(norms, 1e-12)).astype(np.float32)
+    return centroids
+
+
+class IVFEmbeddingIndex(EmbeddingIndex):
+    """
+    An inverted file index over symbol embeddings. A k-means coarse quantizer
+    splits the embeddings into `num_lists` lists, and a query is only compared
+    to the embeddings of the `num_probes` lists whose centroids are most similar
+    to it. Recall rises with `num_probes`, and search is exact once it covers all lists.
+
+    Inserts are assigned to the nearest existing centroid, and the centroids
+    are only retrained by `build`, so the index should be rebuilt after large changes.
+    """
+
+    def __init__(
+        self,
+        num_lists: Optional[int] = None,
+        num_probes: int = 8,
+        norm_type: EmbeddingNormType = EmbeddingNormType.L2,
+        directory: Optional[str] = None,
+        kmeans_iterations: int = 20,
+        seed: int = 0,
+    ) -> None:
+        """
+        Initializes an empty index. When `num_lists` is None,
+        about four times the square root of the embedding count is used.
+
+        Raises:
+            ValueError: If `num_probes` is less than one
+        """
+        if num_probes < 1:
+            raise ValueError(
+                f"num_probes must be at least 1, got {num_probes}."
+            )
+        super().__init__(norm_type, directory)
+        self.num_lists = num_lists
+        self.num_probes = num_probes
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        # Embeddings are held in insertion order, with room to grow
+        self._keys: List[Any] = []
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._is_live = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._key_ids: Dict[Any, int] = {}
+        # The live embedding ids grouped by list, rebuilt lazily after changes
+        self._list_offsets: Optional[np.ndarray] = None
+        self._list_members: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._key_ids)
+
+    @property
+    def is_built(self) -> bool:
+        return self.centroids is not None
+
+    def build(self, embedding_matrix: EmbeddingMatrix) -> None:
+        """Trains the coarse quantizer on `embedding_matrix`, and indexes it."""
+        self.centroids = None
+        self._keys = []
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._is_live = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._key_ids = {}
+        self._list_offsets = self._list_members = None
+        if not len(embedding_matrix):
+            return
+
+        num_lists = self.num_lists or round(
+            4 * math.sqrt(len(embedding_matrix))
+        )
+        num_lists = max(1, min(num_lists, len(embedding_matrix)))
+        logger.info(
+            "Building an IVF index of %d embeddings in %d lists...",
+            len(embedding_matrix),
+            num_lists,
+        )
+        self.centroids = _train_centroids(
+            embedding_matrix.vectors,
+            num_lists,
+            self.kmeans_iterations,
+            np.random.default_rng(self.seed),
+        )
+        self._insert(embedding_matrix.keys, embedding_matrix.vectors)
+
+    def add(self, embeddings: Sequence[Embedding]) -> None:
+        """
+        Inserts embeddings into the lists of their nearest centroids.
+
+        Raises:
+            ValueError: If the index has not been built
+        """
+        if self.centroids is None:
+            raise ValueError("The index must be built before inserting.")
+        if not embeddings:
+            return
+        embedding_matrix = EmbeddingMatrix.from_embeddings(
+            embeddings, self.norm_type
+        )
+        self._insert(embedding_matrix.keys, embedding_matrix.vectors)
+
+    def discard(self, keys: Sequence[Any]) -> None:
+        for key in keys:
+            key_id = self._key_ids.pop(key, None)
+            if key_id is not None:
+                self._is_live[key_id] = False
+                self._list_offsets = self._list_members = None
+        # Reclaim the space of discarded embeddings once it outweighs the rest
+        if self._size > 2 * len(self._key_ids):
+            self._compact()
+
+    def search(
+        self, query_vector: np.ndarray, k: int
+    ) -> List[Tuple[Any, float]]:
+        if self.centroids is None or not self._key_ids or k <= 0:
+            return []
+        list_offsets, list_members = self._get_lists()
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+
+        centroid_scores = self.centroids @ query_vector
+        num_probes = min(self.num_probes, len(self.centroids))
+        probed = np.argpartition(-centroid_scores, num_probes - 1)[:num_probes]
+        candidates = np.concatenate(
+            [
+                list_members[list_offsets[list_id] : list_offsets[list_id + 1]]
+                for list_id in probed.tolist()
+            ]
+        )
+        scores = self._vectors[candidates] @ query_vector
+        if k < len(candidates):
+            top = np.argpartition(-scores, k - 1)[:k]
+            candidates, scores = candidates[top], scores[top]
+        # Ties keep the insertion order of the embeddings
+        order = np.lexsort((candidates, -scores))
+        return [
+            (self._keys[key_id], score)
+            for key_id, score in zip(
+                candidates[order].tolist(), scores[order].tolist()
+            )
+        ]
+
+    def save(self, directory: str) -> None:
+        """
+        Saves the centroids and live embeddings as a directory of flat arrays,
+        with a checksum of the embeddings so that a load can be validated.
+        """
+        if self.centroids is None:
+            raise ValueError("The index must be built before saving.")
+        self._compact()
+        arrays = StringTable.from_strings(
+            [key.uri for key in self._keys]
+        ).to_arrays("keys.")
+        arrays["centroids"] = self.centroids
+        arrays["vectors"] = self._vectors[: self._size]
+        arrays["assignments"] = self._assignments[: self._size]
+        save_arrays(
+            directory,
+            IVF_EMBEDDING_INDEX_FORMAT,
+            arrays,
+            embedding_count=self._size,
+            checksum=EmbeddingMatrix(
+                self._keys, arrays["vectors"]
+            ).get_checksum(),
+            num_probes=self.num_probes,
+            norm_type=self.norm_type.value,
+        )
+
+    @classmethod
+    def load(cls, directory: str) -> "IVFEmbeddingIndex":
+        """
+        Loads an index saved with `save`. Its `directory` is kept, so that
+        the index is saved there again whenever it is rebuilt.
+        It is only searched once its checksum matches the embeddings of a handler.
+
+        Raises:
+            ValueError: If the index was saved with another format version
+        """
+        manifest = read_manifest(directory, IVF_EMBEDDING_INDEX_FORMAT)
+        centroids = load_array(directory, "centroids", None)
+        index = cls(
+            num_lists=len(centroids),
+            num_probes=manifest["num_probes"],
+            norm_type=EmbeddingNormType(manifest["norm_type"]),
+            directory=directory,
+        )
+        index.centroids = centroids
+        index._keys = [
+            parse_symbol(name)
+            for name in StringTable.from_arrays(directory, "keys.", None)
+        ]
+        index._vectors = load_array(directory, "vectors", None)
+        index._assignments = load_array(directory, "assignments", None)
+        index._size = manifest["embedding_count"]
+        index._is_live = np.ones(index._size, dtype=bool)
+        index._key_ids = {key: i for i, key in enumerate(index._keys)}
+        index.checksum = manifest["checksum"]
+        return index
+
+    def _insert(self, keys: List[Any], vectors: np.ndarray) -> None:
+        """Appends normalized vectors, growing the arrays geometrically."""
+        assert self.centroids is not None
+        self.discard(keys)
+        new_size = self._size + len(keys)
+        if new_size > len(self._vectors):
+            capacity = max(new_size, 2 * len(self._vectors))
+            self._resize(capacity, vectors.shape[1])
+
+        self._vectors[self._size : new_size] = vectors
+        self._assignments[self._size : new_size] = _assign_to_centroids(
+            vectors, self.centroids
+        )
+        # Only the last embedding of a key repeated within `keys` is live
+        new_key_ids = {
+            key: key_id for key_id, key in enumerate(keys, self._size)
+        }
+        self._is_live[self._size : new_size] = False
+        self._is_live[list(new_key_ids.values())] = True
+        self._key_ids.update(new_key_ids)
+        self._keys.extend(keys)
+        self._size = new_size
+        self._list_offsets = self._list_members = None
+
+    def _resize(self, capacity: int, dimension: int) -> None:
+        """Moves the embeddings to arrays with room for `capacity` of them."""
+        vectors = np.zeros((capacity, dimension), dtype=np.float32)
+        assignments = np.zeros(capacity, dtype=np.int32)
+        is_live = np.zeros(capacity, dtype=bool)
+        if self._size:
+            vectors[: self._size] = self._vectors[: self._size]
+        assignments[: self._size] = self._assignments[: self._size]
+        is_live[: self._size] = self._is_live[: self._size]
+        self._vectors, self._assignments, self._is_live = (
+            vectors,
+            assignments,
+            is_live,
+        )
+
+    def _compact(self) -> None:
+        """Drops discarded embeddings, keeping the insertion order of the rest."""
+        live_ids = np.flatnonzero(self._is_live[: self._size])
+        if len(live_ids) == self._size:
+            return
+        self._keys = [self._keys[key_id] for key_id in live_ids.tolist()]
+        self._vectors = self._vectors[live_ids]
+        self._assignments = self._assignments[live_ids]
+        self._is_live = np.ones(len(live_ids), dtype=bool)
+        self._size = len(live_ids)
+        self._key_ids = {key: i for i, key in enumerate(self._keys)}
+        self._list_offsets = self._list_members = None
+
+    def _get_lists(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Gets the offsets of each list in the array of live ids grouped by list."""
+        if self._list_offsets is None or self._list_members is None:
+            assert self.centroids is not None
+            live_ids = np.flatnonzero(self._is_live[: self._size])
+            assignments = self._assignments[live_ids]
+            self._list_members = live_ids[
+                np.argsort(assignments, kind="stable")
+            ]
+            self._list_offsets = np.zeros(
+                len(self.centroids) + 1, dtype=np.int64
+            )
+            np.cumsum(
+                np.bincount(assignments, minlength=len(self.centroids)),
+                out=self._list_offsets[1:],
+            )
+        return self._list_offsets, self._list_members
@@ -111,6 +111,9 @@ class SymbolSearchEvalResult(ToolEvalResult):
             if expected_action.search_results
             else "None"
         )
+        self.expected_top_k_matches = expected_action.search_results[
+            :TOP_K_MATCHES
+        ]
 
     def __repr__(self):
         return f"SymbolSearchEvalResult(observed_action={self.observed_action}, expected_action={self.expected_action})"
@@ -129,6 +132,19 @@ class SymbolSearchEvalResult(ToolEvalResult):
             else False
         )
 
+    @property
+    def recall_at_k(self) -> float:
+        """
+        Returns the fraction of the expected top K results found within
+        the observed top K entries, so that approximate search can be compared to exact.
+        """
+        expected_matches = set(self.expected_top_k_matches)
+        if not expected_matches or not self.observed_action:
+            return 0.0
+        return len(expected_matches & set(self.top_k_matches)) / len(
+            expected_matches
+        )
+
     def to_payload(self) -> Payload:
         """Converts the evaluation result to a dictionary (or other serializable format)."""
         return {
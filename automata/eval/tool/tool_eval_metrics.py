@@ -42,11 +42,22 @@ class ToolEvaluationMetrics:
             else 0
         )
 
+    @property
+    def average_recall_at_k(self) -> float:
+        """Returns the average recall@k, over the results which report one."""
+        recalls = [
+            result.recall_at_k
+            for result in self.results
+            if hasattr(result, "recall_at_k")
+        ]
+        return sum(recalls) / len(recalls) if recalls else 0
+
     def __str__(self) -> str:
         return (
             f"Total Evaluations: {self.total_evaluations}\n"
             f"Full Matches: {self.total_full_matches}\n"
             f"Partial Matches: {self.total_partial_matches}\n"
             f"Full Match Rate: {self.full_match_rate}\n"
-            f"Partial Match Rate: {self.partial_match_rate}"
+            f"Partial Match Rate: {self.partial_match_rate}\n"
+            f"Average Recall@K: {self.average_recall_at_k}"
         )
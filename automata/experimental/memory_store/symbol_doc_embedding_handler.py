@@ -64,6 +64,7 @@ class SymbolDocEmbeddingHandler(SymbolEmbeddingHandler):
                 "SymbolDocEmbeddingHandler requires a SymbolDocEmbeddingBuilder"
             )
         self.embedding_db.add(symbol_embedding)
+        self.revision += 1
         logger.debug("Successfully added...")
 
     def _update_existing_embedding(
@@ -82,6 +83,7 @@ class SymbolDocEmbeddingHandler(SymbolEmbeddingHandler):
             existing_embedding.symbol = symbol
             existing_embedding.source_code = source_code
             self.embedding_db.add(existing_embedding)
+            self.revision += 1
         elif existing_embedding.source_code != source_code:
             self.embedding_db.discard(symbol.dotpath)
             self._create_new_embedding(source_code, symbol)
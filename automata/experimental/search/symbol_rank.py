@@ -1,10 +1,35 @@
-from typing import Dict, Hashable, List, Optional, Tuple
+import logging
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 import networkx as nx
+import numpy as np
 from networkx.exception import NetworkXError
 from pydantic import BaseModel
 
-from automata.symbol import Symbol
+from automata.core.saved_arrays import (
+    SavedArrayFormat,
+    StringTable,
+    load_array,
+    read_manifest,
+    save_arrays,
+)
+from automata.symbol import Symbol, parse_symbol
+from automata.symbol.graph.symbol_graph_metrics import SymbolGraphMetrics
+from automata.symbol.graph.symbol_rank_basis import SymbolRankBasis
+from automata.symbol.graph.symbol_rank_transition import TransitionMatrix
+
+logger = logging.getLogger(__name__)
+
+RANK_VECTOR_STORE_FORMAT = SavedArrayFormat("rank_vector_store", 1)
 
 
 class SymbolRankConfig(BaseModel):
@@ -14,12 +39,25 @@ class SymbolRankConfig(BaseModel):
     max_iterations: int = 100
     tolerance: float = 1.0e-6
     weight_key: str = "weight"
+    # When set, personalized queries without initial weights only rank their top k symbols, approximately
+    approximate_top_k: Optional[int] = None
+    # The fraction of the largest residual above which nodes are pushed, in approximate mode
+    push_threshold: float = 0.1
+    # When set, personalized queries are answered from a precomputed basis
+    # which keeps this many ranks per symbol, see `SymbolRankBasis`
+    basis_top_k: Optional[int] = None
+    # When set, iterations start from the stored ranks of the most similar past query
+    warm_start: bool = False
+    # The number of converged rank vectors kept to warm-start from
+    warm_start_capacity: int = 32
 
     @staticmethod
     def validate_config(config) -> None:
         """
         Raises:
-            ValueError: If alpha is not in (0, 1), or tolerance is not in (1e-4, 1e-8).
+            ValueError: If alpha is not in (0, 1), or tolerance is not in (1e-4, 1e-8),
+                or approximate_top_k is not positive, or push_threshold is not in [0, 1),
+                or basis_top_k or warm_start_capacity is not positive.
         """
         if not 0 < config.alpha < 1:
             raise ValueError(f"alpha must be in (0,1), but got {config.alpha}")
@@ -29,14 +67,169 @@ class SymbolRankConfig(BaseModel):
                 f"tolerance must be in (1e-4,1e-8), but got {config.tolerance}"
             )
 
+        if (
+            config.approximate_top_k is not None
+            and config.approximate_top_k < 1
+        ):
+            raise ValueError(
+                f"approximate_top_k must be positive, but got {config.approximate_top_k}"
+            )
+
+        if not 0 <= config.push_threshold < 1:
+            raise ValueError(
+                f"push_threshold must be in [0,1), but got {config.push_threshold}"
+            )
+
+        if config.basis_top_k is not None and config.basis_top_k < 1:
+            raise ValueError(
+                f"basis_top_k must be positive, but got {config.basis_top_k}"
+            )
+
+        if config.warm_start_capacity < 1:
+            raise ValueError(
+                f"warm_start_capacity must be positive, but got {config.warm_start_capacity}"
+            )
 
-class SymbolRank:
-    """Computes the PageRank algorithm on symbols in a graph"""
 
-    def __init__(self, graph: nx.DiGraph, config: SymbolRankConfig) -> None:
+class RankVectorStore:
+    """
+    Holds the converged rank vectors of past queries, along with the
+    personalization they were computed for, as arrays in the order of `nodes`.
+    Only the `capacity` most recent vectors are kept.
+
+    The ranks of a query are close to those of a query with a similar
+    personalization, so iterating from the nearest stored ranks converges
+    in a few iterations rather than from the uniform vector.
+    """
+
+    def __init__(
+        self,
+        nodes: List[Hashable],
+        capacity: int,
+        similarities: Optional[List[np.ndarray]] = None,
+        ranks: Optional[List[np.ndarray]] = None,
+    ) -> None:
+        self.nodes = nodes
+        self.capacity = capacity
+        self.similarities = similarities or []
+        self.ranks = ranks or []
+
+    def __len__(self) -> int:
+        return len(self.ranks)
+
+    def add(self, similarity_vec: np.ndarray, rank_vec: np.ndarray) -> None:
+        """Stores the converged ranks of a query, evicting the oldest beyond the capacity."""
+        self.similarities.append(similarity_vec.copy())
+        self.ranks.append(rank_vec.copy())
+        del self.similarities[: -self.capacity]
+        del self.ranks[: -self.capacity]
+
+    def get_nearest(self, similarity_vec: np.ndarray) -> Optional[np.ndarray]:
+        """Gets the stored ranks whose personalization is nearest to `similarity_vec` in L1 distance."""
+        if not self.ranks:
+            return None
+        distances = np.abs(
+            np.column_stack(self.similarities) - similarity_vec[:, np.newaxis]
+        ).sum(axis=0)
+        return self.ranks[int(np.argmin(distances))]
+
+    def reorder(self, nodes: List[Hashable]) -> Optional["RankVectorStore"]:
+        """Returns the store with its vectors in the order of `nodes`, or None if the nodes differ."""
+        if nodes == self.nodes:
+            return RankVectorStore(
+                nodes, self.capacity, self.similarities, self.ranks
+            )
+        positions = {node: i for i, node in enumerate(self.nodes)}
+        if len(nodes) != len(positions) or any(
+            node not in positions for node in nodes
+        ):
+            return None
+        order = np.fromiter(
+            (positions[node] for node in nodes), dtype=np.int64
+        )
+        return RankVectorStore(
+            nodes,
+            self.capacity,
+            [vec[order] for vec in self.similarities],
+            [vec[order] for vec in self.ranks],
+        )
+
+    def save(self, directory: str) -> None:
+        """Saves the store as a directory of flat arrays. Its nodes must be symbols."""
+        arrays = StringTable.from_strings(
+            [node.uri for node in self.nodes]  # type: ignore
+        ).to_arrays("symbols.")
+        node_count = len(self.nodes)
+        arrays["similarities"] = np.array(self.similarities).reshape(
+            -1, node_count
+        )
+        arrays["ranks"] = np.array(self.ranks).reshape(-1, node_count)
+        save_arrays(
+            directory,
+            RANK_VECTOR_STORE_FORMAT,
+            arrays,
+            symbol_count=node_count,
+            capacity=self.capacity,
+        )
+
+    @classmethod
+    def load(cls, directory: str) -> "RankVectorStore":
+        """
+        Loads a store saved with `save`.
+
+        Raises:
+            ValueError: If the store was saved with another format version
+        """
+        manifest = read_manifest(directory, RANK_VECTOR_STORE_FORMAT)
+        symbol_names = StringTable.from_arrays(directory, "symbols.", None)
+        return cls(
+            [parse_symbol(name) for name in symbol_names],
+            manifest["capacity"],
+            list(load_array(directory, "similarities", None)),
+            list(load_array(directory, "ranks", None)),
+        )
+
+
+class SymbolRank:
+    """
+    Computes the PageRank algorithm on symbols in a graph.
+    The transition matrix of the graph is built once, and reused across queries.
+    When the precomputed `SymbolGraphMetrics` of the graph are given, ranks
+    without personalization are read from them instead of being recomputed.
+    They may be given as `get_metrics`, which is only called once global ranks are needed.
+    Likewise, when a `SymbolRankBasis` of the graph is given, personalized
+    ranks are read from it with a sparse product, without power iteration.
+
+    With `warm_start` set in the config, converged ranks are kept in a
+    `RankVectorStore`, and each query starts iterating from the stored ranks of
+    the nearest past query, or else from the precomputed global ranks.
+    The errors of each iteration of the last batch are kept in `convergence_history`.
+    """
+
+    def __init__(
+        self,
+        graph: nx.DiGraph,
+        config: SymbolRankConfig,
+        metrics: Optional[SymbolGraphMetrics] = None,
+        basis: Optional[SymbolRankBasis] = None,
+        rank_store: Optional[RankVectorStore] = None,
+        get_metrics: Optional[Callable[[], SymbolGraphMetrics]] = None,
+    ) -> None:
         self.graph = graph
         self.config = config
         self.config.validate_config(self.config)
+        self.metrics = metrics
+        self._get_metrics = get_metrics
+        self.basis = basis
+        self.rank_store = rank_store
+        # The L1 error of each iteration, per query of the last batch
+        self.convergence_history: List[List[float]] = []
+        self._transition_matrix: Optional[TransitionMatrix] = None
+        self._transition_key: Optional[Tuple[int, int, Any]] = None
+        self._basis_key: Optional[Tuple[int, Tuple[int, int, Any]]] = None
+        self._basis_matches_graph = False
+        self._metrics_key: Optional[Tuple[int, Tuple[int, int, Any]]] = None
+        self._metrics_match_graph = False
 
     def get_ordered_ranks(
         self,
@@ -69,45 +262,274 @@ class SymbolRank:
         their  connectivity within the graph. This amalgamation of natural language processing,
         information retrieval, and graph theory methods results in a ranking of code symbols,
         significantly aiding tasks like code understanding, navigation, recommendation, and search.
+
+        Without any personalization, the global ranks of the precomputed metrics are used if they match the config.
+        """
+        if (
+            query_to_symbol_similarity is None
+            and initial_weights is None
+            and dangling is None
+        ):
+            global_metrics = self._get_global_metrics()
+            if global_metrics is not None:
+                return global_metrics.get_ordered_ranks()
+
+        return self.get_ordered_ranks_batch(
+            [query_to_symbol_similarity], initial_weights, dangling
+        )[0]
+
+    def get_ordered_ranks_batch(
+        self,
+        queries_to_symbol_similarity: List[Optional[Dict[Symbol, float]]],
+        initial_weights: Optional[Dict[Symbol, float]] = None,
+        dangling: Optional[Dict[Symbol, float]] = None,
+    ) -> List[List[Tuple[Symbol, float]]]:
         """
-        stochastic_graph = self._prepare_graph()
-        node_count = stochastic_graph.number_of_nodes()
+        Calculate the SymbolRanks of each node in the graph for many queries at once.
+        The ranks of all queries are iterated together, as a product of the sparse
+        transition matrix with a dense matrix holding one column per query.
+        Each column stops iterating once it converges, so the ranks of every
+        query are the same as those returned by `get_ordered_ranks`.
+        With a basis matching the config, ranks are read from the basis instead.
 
-        rank_vec = self._prepare_initial_ranks(
-            stochastic_graph, initial_weights
+        Raises:
+            NetworkXError: If the ranks of any query fail to converge
+        """
+        self.convergence_history = [[] for _ in queries_to_symbol_similarity]
+        if not queries_to_symbol_similarity:
+            return []
+        basis = self._get_rank_basis()
+        if basis is not None:
+            return [
+                self._get_basis_ranks(
+                    basis, query_to_symbol_similarity, dangling
+                )
+                for query_to_symbol_similarity in queries_to_symbol_similarity
+            ]
+
+        transition_matrix = self._get_transition_matrix()
+        node_count = len(transition_matrix)
+        query_count = len(queries_to_symbol_similarity)
+
+        initial_vec = (
+            transition_matrix.to_vector(
+                self._prepare_initial_ranks(self.graph, initial_weights)
+            )
+            if initial_weights is not None or not self.config.warm_start
+            else None
         )
-        prepared_similarity = self._prepare_query_to_symbol_similarity(
-            node_count, stochastic_graph, query_to_symbol_similarity
+        similarity_mat = np.empty((node_count, query_count))
+        dangling_mat = np.empty((node_count, query_count))
+        for column, query_to_symbol_similarity in enumerate(
+            queries_to_symbol_similarity
+        ):
+            prepared_similarity = self._prepare_query_to_symbol_similarity(
+                node_count, self.graph, query_to_symbol_similarity
+            )
+            dangling_weights = self._prepare_dangling_weights(
+                dangling, prepared_similarity
+            )
+            similarity_mat[:, column] = transition_matrix.to_vector(
+                prepared_similarity
+            )
+            dangling_mat[:, column] = (
+                similarity_mat[:, column]
+                if dangling_weights is prepared_similarity
+                else transition_matrix.to_vector(dangling_weights)
+            )
+
+        # Only personalized queries without initial weights are approximated
+        push_queries = (
+            [
+                column
+                for column, query_to_symbol_similarity in enumerate(
+                    queries_to_symbol_similarity
+                )
+                if query_to_symbol_similarity is not None
+            ]
+            if initial_weights is None
+            else []
         )
-        dangling_weights = self._prepare_dangling_weights(
-            dangling, prepared_similarity
+        return self._rank_matrices(
+            transition_matrix,
+            similarity_mat,
+            dangling_mat,
+            initial_vec,
+            push_queries=push_queries,
         )
-        dangling_nodes = self._get_dangling_nodes(stochastic_graph)
 
-        for _ in range(self.config.max_iterations):
-            last_rank_vec = rank_vec
-            rank_vec = {k: 0.0 for k in last_rank_vec.keys()}
-            danglesum = self.config.alpha * sum(last_rank_vec[node] for node in dangling_nodes)  # type: ignore
-            for node in rank_vec:
-                for nbr in stochastic_graph[node]:
-                    rank_vec[nbr] += (
-                        self.config.alpha
-                        * last_rank_vec[node]
-                        * stochastic_graph[node][nbr][self.config.weight_key]
-                    )
-                rank_vec[node] += (
-                    danglesum * dangling_weights[node]
-                    + (1.0 - self.config.alpha) * prepared_similarity[node]
+    def get_ordered_ranks_from_vectors(
+        self, similarity_mat: np.ndarray, top_n: Optional[int] = None
+    ) -> List[List[Tuple[Symbol, float]]]:
+        """
+        Calculate the SymbolRanks for many queries given as arrays, as `get_ordered_ranks_batch`
+        does for dicts. Each column of `similarity_mat` holds the normalized similarity of one
+        query, in the order of `nodes`, and also serves as its dangling weights.
+        Only the `top_n` highest ranks of each query are returned, if given, so symbols
+        are only materialized for those.
+
+        Raises:
+            ValueError: If `similarity_mat` does not have a row for every node
+            NetworkXError: If the ranks of any query fail to converge
+        """
+        query_count = similarity_mat.shape[1]
+        self.convergence_history = [[] for _ in range(query_count)]
+        transition_matrix = self._get_transition_matrix()
+        if similarity_mat.shape[0] != len(transition_matrix):
+            raise ValueError(
+                f"similarity_mat must have {len(transition_matrix)} rows, but got {similarity_mat.shape[0]}"
+            )
+        if query_count == 0:
+            return []
+        basis = self._get_rank_basis()
+        if basis is not None:
+            basis_ids = transition_matrix.get_node_ids(basis.symbols)
+            return [
+                self._order_ranks(
+                    basis.symbols,
+                    basis.get_ranks(similarity_mat[basis_ids, column]),
+                    top_n,
                 )
+                for column in range(query_count)
+            ]
+
+        node_count = len(transition_matrix)
+        initial_vec = (
+            None
+            if self.config.warm_start
+            else np.full(node_count, 1.0 / node_count)
+        )
+        return self._rank_matrices(
+            transition_matrix,
+            similarity_mat,
+            similarity_mat,
+            initial_vec,
+            top_n,
+            push_queries=range(query_count),
+        )
+
+    def to_similarity_vectors(
+        self, symbols: Sequence[Symbol], similarity_mat: np.ndarray
+    ) -> np.ndarray:
+        """
+        Converts the similarity of `symbols` to many queries, one query per column,
+        into the input of `get_ordered_ranks_from_vectors`. Columns are normalized over
+        all of `symbols`, and rows are reordered to `nodes`, as `_prepare_query_to_symbol_similarity`
+        does for dicts, so both give the same ranks.
+
+        Raises:
+            NetworkXError: If `symbols` do not include every node
+        """
+        transition_matrix = self._get_transition_matrix()
+        node_count = len(transition_matrix)
+        node_ids = transition_matrix.get_node_ids(symbols)
+        in_graph = node_ids >= 0
+        missing = node_count - np.count_nonzero(
+            np.bincount(node_ids[in_graph], minlength=node_count)
+        )
+        if missing:
+            raise NetworkXError(
+                f"query_to_symbol_similarity dictionary must have a value for every node. Missing {missing} nodes."
+            )
+        vectors = np.zeros((node_count, similarity_mat.shape[1]))
+        vectors[node_ids[in_graph]] = similarity_mat[
+            in_graph
+        ] / similarity_mat.sum(axis=0)
+        return vectors
+
+    @property
+    def nodes(self) -> List[Hashable]:
+        """The nodes of the graph, in the order of rank vectors."""
+        return self._get_transition_matrix().nodes
+
+    def _rank_matrices(
+        self,
+        transition_matrix: TransitionMatrix,
+        similarity_mat: np.ndarray,
+        dangling_mat: np.ndarray,
+        initial_vec: Optional[np.ndarray],
+        top_n: Optional[int] = None,
+        push_queries: Sequence[int] = (),
+    ) -> List[List[Tuple[Symbol, float]]]:
+        """
+        Ranks the queries held in the columns of `similarity_mat`, iterating all of them
+        together, from `initial_vec` or else from warm starts. Returns the `top_n`
+        highest ranks of each query, or all of them if `top_n` is None.
+        With `approximate_top_k` set, the columns in `push_queries` are approximated
+        by forward push instead, which only returns their top k ranks.
 
-            err = sum(
-                abs(rank_vec[node] - last_rank_vec[node]) for node in rank_vec
+        Raises:
+            NetworkXError: If the ranks of any query fail to converge
+        """
+        node_count = len(transition_matrix)
+        query_count = similarity_mat.shape[1]
+        results: List[List[Tuple[Symbol, float]]] = [[]] * query_count
+        top_k = self.config.approximate_top_k
+        if top_k is None or top_k >= node_count:
+            push_queries = ()
+        for column in push_queries:
+            assert top_k is not None
+            results[column] = self._get_approximate_top_ranks(
+                transition_matrix,
+                similarity_mat[:, column],
+                dangling_mat[:, column],
+                top_k,
+            )[:top_n]
+        # The queries whose ranks are still iterating, by column
+        active_queries = np.setdiff1d(
+            np.arange(query_count), np.asarray(push_queries, dtype=np.int64)
+        )
+        if not len(active_queries):
+            return results
+        similarity_mat = similarity_mat[:, active_queries]
+        dangling_mat = dangling_mat[:, active_queries]
+
+        alpha = self.config.alpha
+        rank_store = self._get_rank_store(transition_matrix)
+        rank_mat = (
+            np.repeat(initial_vec[:, np.newaxis], len(active_queries), axis=1)
+            if initial_vec is not None
+            else np.column_stack(
+                [
+                    self._get_warm_start(
+                        transition_matrix,
+                        rank_store,
+                        similarity_mat[:, column],
+                    )
+                    for column in range(len(active_queries))
+                ]
+            )
+        )
+        for _ in range(self.config.max_iterations):
+            last_rank_mat = rank_mat
+            rank_mat = transition_matrix.iterate(
+                last_rank_mat, alpha, dangling_mat, similarity_mat
             )
-            if err < node_count * self.config.tolerance:
-                sorted_dict = sorted(
-                    rank_vec.items(), key=lambda x: x[1], reverse=True
+
+            err = np.abs(rank_mat - last_rank_mat).sum(axis=0)
+            for query, query_err in zip(active_queries, err.tolist()):
+                self.convergence_history[query].append(query_err)
+            converged = err < node_count * self.config.tolerance
+            for column in np.flatnonzero(converged).tolist():
+                results[active_queries[column]] = self._order_ranks(
+                    transition_matrix.nodes, rank_mat[:, column], top_n
                 )
-                return sorted_dict
+                if rank_store is not None:
+                    rank_store.add(
+                        similarity_mat[:, column], rank_mat[:, column]
+                    )
+            if converged.all():
+                logger.debug(
+                    "SymbolRank: converged in %s iterations.",
+                    [len(history) for history in self.convergence_history],
+                )
+                return results
+            if converged.any():
+                remaining = ~converged
+                rank_mat = rank_mat[:, remaining]
+                similarity_mat = similarity_mat[:, remaining]
+                dangling_mat = dangling_mat[:, remaining]
+                active_queries = active_queries[remaining]
 
         raise NetworkXError(
             "SymbolRank: power iteration failed to converge in %d iterations."
@@ -117,28 +539,242 @@ class SymbolRank:
     def get_top_symbols(self, n: int) -> List[Tuple[str, float]]:
         """Get the top N symbols according to their ranks."""
 
-        ranks = self.get_ordered_ranks()
+        global_metrics = self._get_global_metrics()
+        ranks = (
+            global_metrics.get_top_symbols(n)
+            if global_metrics is not None
+            else self.get_ordered_ranks()
+        )
         return [(symbol.dotpath, rank) for symbol, rank in ranks[:n]]
 
-    def _prepare_graph(self) -> nx.DiGraph:
+    def _get_global_metrics(self) -> Optional[SymbolGraphMetrics]:
+        """
+        Gets the precomputed metrics, if they were computed for this graph and config.
+        The fingerprint of the graph is only compared once per metrics and revision.
+        """
+        if self.metrics is None and self._get_metrics is not None:
+            self.metrics = self._get_metrics()
+            self._get_metrics = None
+        if self.metrics is None or not self.metrics.matches(
+            self.config.alpha,
+            self.config.max_iterations,
+            self.config.tolerance,
+            self.config.weight_key,
+        ):
+            return None
+        metrics_key = (id(self.metrics), self._get_graph_key())
+        if self._metrics_key != metrics_key:
+            self._metrics_key = metrics_key
+            self._metrics_match_graph = self.metrics.matches_graph(self.graph)
+            if not self._metrics_match_graph:
+                logger.warning(
+                    "SymbolRank: the metrics were computed for another graph, so they are not used."
+                )
+        return self.metrics if self._metrics_match_graph else None
+
+    def _get_rank_store(
+        self, transition_matrix: TransitionMatrix
+    ) -> Optional[RankVectorStore]:
+        """
+        Gets the store of converged ranks when warm starts are enabled, with its
+        vectors in the order of the transition matrix. A store whose nodes are not
+        those of the graph is replaced with an empty one.
+        """
+        if not self.config.warm_start:
+            return None
+        if (
+            self.rank_store is None
+            or self.rank_store.nodes is not transition_matrix.nodes
+        ):
+            self.rank_store = (
+                self.rank_store.reorder(transition_matrix.nodes)
+                if self.rank_store is not None
+                else None
+            ) or RankVectorStore(
+                transition_matrix.nodes, self.config.warm_start_capacity
+            )
+        return self.rank_store
+
+    def _get_warm_start(
+        self,
+        transition_matrix: TransitionMatrix,
+        rank_store: Optional[RankVectorStore],
+        similarity_vec: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Gets the ranks to start iterating from for a query: the stored ranks of the
+        nearest past query, else the global ranks of the metrics, else uniform ranks.
+        """
+        if rank_store is not None:
+            nearest = rank_store.get_nearest(similarity_vec)
+            if nearest is not None:
+                return nearest
+        global_metrics = self._get_global_metrics()
+        if global_metrics is not None:
+            return transition_matrix.to_vector(
+                dict(zip(global_metrics.symbols, global_metrics.ranks))
+            )
+        return np.full(len(transition_matrix), 1.0 / len(transition_matrix))
+
+    def _get_rank_basis(self) -> Optional[SymbolRankBasis]:
+        """
+        Gets the precomputed basis, if it was computed for this graph and config.
+        The fingerprint of the graph is only compared once per basis and revision.
+        """
+        if (
+            self.basis is None
+            or self.config.basis_top_k is None
+            or not self.basis.matches(
+                self.config.alpha, self.config.basis_top_k
+            )
+        ):
+            return None
+        basis_key = (id(self.basis), self._get_graph_key())
+        if self._basis_key != basis_key:
+            self._basis_key = basis_key
+            self._basis_matches_graph = self.basis.matches_graph(self.graph)
+            if not self._basis_matches_graph:
+                logger.warning(
+                    "SymbolRank: the basis was computed for another graph, so it is not used."
+                )
+        return self.basis if self._basis_matches_graph else None
+
+    def _get_basis_ranks(
+        self,
+        basis: SymbolRankBasis,
+        query_to_symbol_similarity: Optional[Dict[Symbol, float]],
+        dangling: Optional[Dict[Symbol, float]],
+    ) -> List[Tuple[Symbol, float]]:
+        """Reads the ranks of one query from the basis, as a similarity-weighted sum of its rows."""
+        prepared_similarity = self._prepare_query_to_symbol_similarity(
+            len(basis), self.graph, query_to_symbol_similarity
+        )
+        dangling_weights = self._prepare_dangling_weights(
+            dangling, prepared_similarity
+        )
+        rank_vec = basis.get_ranks(
+            basis.to_vector(prepared_similarity),
+            None
+            if dangling_weights is prepared_similarity
+            else basis.to_vector(dangling_weights),
+        )
+        return self._order_ranks(basis.symbols, rank_vec)
+
+    def _get_approximate_top_ranks(
+        self,
+        transition_matrix: TransitionMatrix,
+        similarity_vec: np.ndarray,
+        dangling_vec: np.ndarray,
+        top_k: int,
+    ) -> List[Tuple[Symbol, float]]:
         """
-        Prepare the graph for the SymbolRank algorithm. If the graph is not directed,
-        convert it to a directed graph, then create a stochastic graph from the directed graph.
+        Approximates the `top_k` highest SymbolRanks by forward push.
+        Rank starts out as residual mass on the nodes of the personalization, and each
+        round settles a (1 - alpha) share of the largest residuals on their nodes,
+        pushing the remainder along their out edges, or to the dangling weights.
+
+        The true rank of each node lies between its settled rank, and that plus its
+        own settled share of its residual and alpha times the total residual.
+        Pushing stops once these bounds separate the top k from all other nodes,
+        or once the total residual is within the tolerance of the exact iteration
+        and the top k did not change over the last round.
+
+        Raises:
+            NetworkXError: If pushing fails to stop in `max_iterations` rounds
         """
+        alpha = self.config.alpha
+        node_count = len(transition_matrix)
+        ranks = np.zeros(node_count)
+        residuals = similarity_vec.copy()
+        last_top: Optional[np.ndarray] = None
+        for _ in range(self.config.max_iterations):
+            top = np.sort(np.argpartition(-ranks, top_k)[:top_k])
+            residual_sum = residuals.sum()
+            upper_bounds = (
+                ranks + (1.0 - alpha) * residuals + alpha * residual_sum
+            )
+            upper_bounds[top] = -np.inf
+            if ranks[top].min() >= upper_bounds.max() or (
+                residual_sum < node_count * self.config.tolerance
+                and last_top is not None
+                and np.array_equal(top, last_top)
+            ):
+                # Stable, so that ties keep the order of the nodes
+                order = top[np.argsort(-ranks[top], kind="stable")]
+                return [
+                    (transition_matrix.nodes[i], rank)  # type: ignore
+                    for i, rank in zip(order.tolist(), ranks[order].tolist())
+                ]
+            last_top = top
+
+            pushed = np.flatnonzero(
+                residuals >= residuals.max() * self.config.push_threshold
+            )
+            pushed_mass = residuals[pushed]
+            residuals[pushed] = 0.0
+            ranks[pushed] += (1.0 - alpha) * pushed_mass
+            residuals += transition_matrix.forward[pushed].T @ (
+                alpha * pushed_mass
+            )
+            dangling_mass = (
+                alpha
+                * pushed_mass[transition_matrix.is_dangling[pushed]].sum()
+            )
+            if dangling_mass:
+                residuals += dangling_mass * dangling_vec
 
-        if not self.graph.is_directed():
-            directed_graph = self.graph.to_directed()
-        else:
-            directed_graph = self.graph
+        raise NetworkXError(
+            "SymbolRank: forward push failed to converge in %d rounds."
+            % self.config.max_iterations
+        )
+
+    @staticmethod
+    def _order_ranks(
+        nodes: Sequence[Hashable],
+        rank_vec: np.ndarray,
+        top_n: Optional[int] = None,
+    ) -> List[Tuple[Symbol, float]]:
+        """Pairs the nodes with their ranks, from highest to lowest, keeping the `top_n` highest if given."""
+        candidates = np.arange(len(rank_vec))
+        if top_n is not None and top_n < len(rank_vec):
+            # Every node tied with the n-th highest rank is a candidate
+            threshold = np.partition(rank_vec, len(rank_vec) - top_n)[
+                len(rank_vec) - top_n
+            ]
+            candidates = np.flatnonzero(rank_vec >= threshold)
+        # Stable, so that ties keep the order of the nodes
+        order = candidates[
+            np.argsort(-rank_vec[candidates], kind="stable")[:top_n]
+        ]
+        return [
+            (nodes[i], rank)  # type: ignore
+            for i, rank in zip(order.tolist(), rank_vec[order].tolist())
+        ]
 
-        stochastic_graph = nx.stochastic_graph(
-            directed_graph, weight=self.config.weight_key
+    def _get_graph_key(self) -> Tuple[int, int, Any]:
+        """Gets a key which changes whenever the graph is modified, as tracked by its "revision" attribute."""
+        return (
+            self.graph.number_of_nodes(),
+            self.graph.number_of_edges(),
+            self.graph.graph.get("revision"),
         )
-        return stochastic_graph
+
+    def _get_transition_matrix(self) -> TransitionMatrix:
+        """
+        Gets the transition matrix of the graph, which is built once and rebuilt
+        only if the graph was modified, as tracked by its "revision" attribute.
+        """
+        key = self._get_graph_key()
+        if self._transition_matrix is None or self._transition_key != key:
+            self._transition_matrix = TransitionMatrix(
+                self.graph, self.config.weight_key
+            )
+            self._transition_key = key
+        return self._transition_matrix
 
     def _prepare_initial_ranks(
         self,
-        stochastic_graph: nx.DiGraph,
+        graph: nx.DiGraph,
         initial_weights: Optional[Dict[Symbol, float]],
     ) -> Dict[Symbol, float]:
         """
@@ -146,16 +782,16 @@ class SymbolRank:
         If initial weights are not provided, set the initial rank value for each node to 1/n.
         """
 
-        node_count = stochastic_graph.number_of_nodes()
+        node_count = graph.number_of_nodes()
         if initial_weights is None:
-            return {k: 1.0 / node_count for k in stochastic_graph}
+            return {k: 1.0 / node_count for k in graph}
         s = sum(initial_weights.values())
         return {k: v / s for k, v in initial_weights.items()}
 
     def _prepare_query_to_symbol_similarity(
         self,
         node_count: int,
-        stochastic_graph: nx.DiGraph,
+        graph: nx.DiGraph,
         query_to_symbol_similarity: Optional[Dict[Symbol, float]],
     ) -> Dict[Symbol, float]:
         """
@@ -173,7 +809,7 @@ class SymbolRank:
         """
 
         if query_to_symbol_similarity is None:
-            return {k: 1.0 / node_count for k in stochastic_graph}
+            return {k: 1.0 / node_count for k in graph}
         if missing := set(self.graph) - set(query_to_symbol_similarity):
             raise NetworkXError(
                 f"query_to_symbol_similarity dictionary must have a value for every node. Missing {len(missing)} nodes."
@@ -196,15 +832,3 @@ class SymbolRank:
             )
         s = sum(dangling.values())
         return {k: v / s for k, v in dangling.items()}
-
-    def _get_dangling_nodes(
-        self, stochastic_graph: nx.DiGraph
-    ) -> List[Hashable]:
-        """Get the dangling nodes in the graph."""
-
-        return [
-            node
-            for node in stochastic_graph
-            if stochastic_graph.out_degree(node, weight=self.config.weight_key)
-            == 0.0
-        ]
@@ -53,42 +53,92 @@ class SymbolSearch:
     @property
     def symbol_rank(self):
         if self._symbol_rank is None:
+            config = self.symbol_rank_config
             self._symbol_rank = SymbolRank(
                 self.symbol_graph.default_rankable_subgraph,
-                config=self.symbol_rank_config,
+                config=config,
+                basis=self.symbol_graph.get_rank_basis(
+                    config.alpha,
+                    config.basis_top_k,
+                    config.tolerance,
+                    config.max_iterations,
+                )
+                if config.basis_top_k is not None
+                else None,
             )
         return self._symbol_rank
 
-    def get_symbol_rank_results(self, query: str) -> SymbolRankResult:
-        """Fetches the list of the SymbolRank similar symbols ordered by rank."""
+    def get_symbol_rank_results(
+        self, query: str, top_n: Optional[int] = None
+    ) -> SymbolRankResult:
+        """
+        Fetches the list of the SymbolRank similar symbols ordered by rank,
+        or only the `top_n` highest ranked symbols if given.
+        With `basis_top_k` set in the config, the ranks are read from the
+        precomputed `SymbolRankBasis` of the graph, without power iteration.
+        """
+        return self.get_symbol_rank_results_batch([query], top_n)[0]
 
-        ordered_embeddings = (
-            self.search_embedding_handler.get_all_ordered_embeddings()
-        )
+    def get_symbol_rank_results_batch(
+        self, queries: List[str], top_n: Optional[int] = None
+    ) -> List[SymbolRankResult]:
+        """
+        Fetches the SymbolRank results of many queries, ordered by rank.
+        The ranks of all queries are computed in a single batched iteration.
 
-        query_vec = self.embedding_similarity_calculator.calculate_query_similarity_dict(
-            ordered_embeddings, query
+        Similarities, their z-score transform and ranks are kept as arrays
+        aligned with the nodes of the graph, one column per query, and symbols
+        are only paired with the `top_n` highest ranks of each query.
+        """
+        if not queries:
+            return []
+
+        embedding_matrix = (
+            self.embedding_similarity_calculator.get_embedding_matrix(
+                self.search_embedding_handler
+            )
+        )
+        similarity_mat = np.column_stack(
+            [
+                self.embedding_similarity_calculator.calculate_query_similarity_vector(
+                    embedding_matrix, query
+                )
+                for query in queries
+            ]
         )
-        transformed_query_vec = SymbolSearch.transform_dict_values(
-            query_vec, self.shifted_z_score_powered
+        similarity_vecs = self.symbol_rank.to_similarity_vectors(
+            embedding_matrix.keys,
+            self.shifted_z_score_powered(similarity_mat),
         )
-        return self.symbol_rank.get_ordered_ranks(
-            query_to_symbol_similarity=transformed_query_vec
+        return self.symbol_rank.get_ordered_ranks_from_vectors(
+            similarity_vecs, top_n
         )
 
     def get_symbol_code_similarity_results(
-        self, query: str
+        self, query: str, top_n: Optional[int] = None
     ) -> SymbolSimilarityResult:
-        """Fetches the list of similar symbols sorted by embedding similarity."""
+        """
+        Fetches the list of similar symbols sorted by embedding similarity,
+        or only the `top_n` most similar symbols if given. Those are found
+        with the embedding index of the calculator, if it has one.
+        """
 
-        ordered_embeddings = (
-            self.search_embedding_handler.get_all_ordered_embeddings()
+        if top_n is not None:
+            return (
+                self.embedding_similarity_calculator.calculate_handler_top_k(
+                    self.search_embedding_handler, query, top_n
+                )
+            )
+        embedding_matrix = (
+            self.embedding_similarity_calculator.get_embedding_matrix(
+                self.search_embedding_handler
+            )
         )
-
-        query_vec = self.embedding_similarity_calculator.calculate_query_similarity_dict(
-            ordered_embeddings, query
+        return self.embedding_similarity_calculator.calculate_query_top_k(
+            embedding_matrix,
+            query,
+            len(embedding_matrix),
         )
-        return list(query_vec.items())
 
     def symbol_references(self, symbol_uri: str) -> SymbolReferencesResult:
         """
@@ -168,6 +218,7 @@ class SymbolSearch:
         """
         Calculates the z-score, shifts them to be positive,
         and then raises the values to the specified power.
+        A 2D array is transformed column by column.
 
         This method is used to transform similarity scores into a quantity that
         is more suitable for ranking. Empirically, we found that raising the values
@@ -175,13 +226,9 @@ class SymbolSearch:
         similarity and importance (e.g. the connectivity or references to a symbol).
         """
 
-        if not isinstance(values, np.ndarray):
-            values = np.array(values)
-
-        mean = np.mean(values)
-        std_dev = np.std(values)
-        zscores = [(value - mean) / std_dev for value in values]
-        return (zscores - np.min(zscores)) ** self.z_score_power
+        values = np.asarray(values, dtype=float)
+        zscores = (values - np.mean(values, axis=0)) / np.std(values, axis=0)
+        return (zscores - np.min(zscores, axis=0)) ** self.z_score_power
 
     @staticmethod
     def transform_dict_values(
@@ -103,7 +103,7 @@ class AgentifiedSearchToolkitBuilder(AgentToolkitBuilder):
         The matches could be in the form of fully qualified symbol names, for example
         """
         query_result = self.symbol_search.get_symbol_code_similarity_results(
-            query
+            query, top_n=self.top_n
         )
         best_match = self._agent_selected_best_match(query, query_result)
 
@@ -167,7 +167,9 @@ class AgentifiedSearchToolkitBuilder(AgentToolkitBuilder):
         """This method gets the the code of the best match to the input query."""
         if not best_matched_symbol:
             query_result = (
-                self.symbol_search.get_symbol_code_similarity_results(query)
+                self.symbol_search.get_symbol_code_similarity_results(
+                    query, top_n=self.top_n
+                )
             )
             best_matched_symbol = self._agent_selected_best_match(
                 query, query_result
@@ -186,7 +188,7 @@ class AgentifiedSearchToolkitBuilder(AgentToolkitBuilder):
         """This method gets the documentation of the best match to the input query, or the code if no documentation exists."""
 
         query_result = self.symbol_search.get_symbol_code_similarity_results(
-            query
+            query, top_n=self.top_n
         )
         best_matched_symbol = self._agent_selected_best_match(
             query, query_result
@@ -57,7 +57,7 @@ class DocumentOracleToolkitBuilder(AgentToolkitBuilder):
         """
 
         symbol_rank_search_results = (
-            self.symbol_search.get_symbol_rank_results(query)
+            self.symbol_search.get_symbol_rank_results(query, top_n=1)
         )
 
         most_similar_symbol = symbol_rank_search_results[0][0]
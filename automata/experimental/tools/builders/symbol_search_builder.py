@@ -100,14 +100,16 @@ class SymbolSearchToolkitBuilder(AgentToolkitBuilder):
     # TODO - Cleanup these processors to ensure they behave well.
     # -- Right now these are just simplest implementations I can rattle off
     def _symbol_rank_search_processor(self, query: str) -> str:
-        query_result = self.symbol_search.get_symbol_rank_results(query)
+        query_result = self.symbol_search.get_symbol_rank_results(
+            query, top_n=self.top_n
+        )
         return "\n".join(
             [symbol.dotpath for symbol, _rank in query_result][: self.top_n]
         )
 
     def _symbol_agent_search_processor(self, query: str) -> str:
         query_result = self.symbol_search.get_symbol_code_similarity_results(
-            query
+            query, top_n=self.top_n
         )
         search_results = "\n".join(
             [symbol.dotpath for symbol, _similarity in query_result][
@@ -147,7 +149,7 @@ class SymbolSearchToolkitBuilder(AgentToolkitBuilder):
 
     def _symbol_code_similarity_search_processor(self, query: str) -> str:
         query_result = self.symbol_search.get_symbol_code_similarity_results(
-            query
+            query, top_n=self.top_n
         )
         return "\n".join(
             [symbol.dotpath for symbol, _similarity in query_result][
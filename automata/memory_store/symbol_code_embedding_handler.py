@@ -1,7 +1,8 @@
 import logging
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 from automata.core.base import VectorDatabaseProvider
+from automata.embedding import EmbeddingIndex
 from automata.symbol import Symbol
 from automata.symbol_embedding import (
     SymbolCodeEmbeddingBuilder,
@@ -19,8 +20,11 @@ class SymbolCodeEmbeddingHandler(SymbolEmbeddingHandler):
         embedding_db: VectorDatabaseProvider,
         embedding_builder: "SymbolCodeEmbeddingBuilder",
         batch_size: int = 512,
+        embedding_index: Optional[EmbeddingIndex] = None,
     ) -> None:
-        super().__init__(embedding_db, embedding_builder, batch_size)
+        super().__init__(
+            embedding_db, embedding_builder, batch_size, embedding_index
+        )
         self.to_build: List[Tuple[str, Symbol]] = []
 
     def process_embedding(self, symbol: Symbol) -> None:
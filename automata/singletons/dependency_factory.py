@@ -2,8 +2,8 @@
 # TODO - Move experimental features to an experimental loader.
 import logging
 import os
-from functools import lru_cache
-from typing import Any, Dict, List, Set, Tuple
+from functools import lru_cache, partial
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import networkx as nx
 
@@ -17,7 +17,7 @@ from automata.context_providers import (
 )
 from automata.core.base import Singleton
 from automata.core.utils import get_embedding_data_fpath
-from automata.embedding import EmbeddingSimilarityCalculator
+from automata.embedding import EmbeddingIndex, EmbeddingSimilarityCalculator
 from automata.experimental.code_parsers import (
     PyContextHandler,
     PyContextHandlerConfig,
@@ -198,12 +198,36 @@ class DependencyFactory(metaclass=Singleton):
 
         Associated Keyword Args:
             symbol_rank_config (SymbolRankConfig())
+
+        Note - The global ranks of the symbol graph are precomputed and persisted
+            once they are first needed, so the top symbols are read without running
+            SymbolRank. So is the `SymbolRankBasis` of the graph, when `basis_top_k`
+            is set in the config.
         """
 
         subgraph: nx.DiGraph = self.get("subgraph")
+        symbol_graph: SymbolGraph = self.get("symbol_graph")
+        symbol_rank_config: SymbolRankConfig = self.overrides.get(
+            "symbol_rank_config", SymbolRankConfig()
+        )
         return SymbolRank(
             subgraph,
-            self.overrides.get("symbol_rank_config", SymbolRankConfig()),
+            symbol_rank_config,
+            get_metrics=partial(
+                symbol_graph.get_metrics,
+                symbol_rank_config.alpha,
+                symbol_rank_config.max_iterations,
+                symbol_rank_config.tolerance,
+                symbol_rank_config.weight_key,
+            ),
+            basis=symbol_graph.get_rank_basis(
+                symbol_rank_config.alpha,
+                symbol_rank_config.basis_top_k,
+                symbol_rank_config.tolerance,
+                symbol_rank_config.max_iterations,
+            )
+            if symbol_rank_config.basis_top_k is not None
+            else None,
         )
 
     @lru_cache()
@@ -216,6 +240,7 @@ class DependencyFactory(metaclass=Singleton):
         Associated Keyword Args:
             code_embedding_db (ChromaSymbolEmbeddingVectorDatabase): Database responsible for code embeddings.
             embedding_provider (OpenAIEmbedding())
+            embedding_index (None): Approximate index kept up to date with the code embeddings.
         """
 
         code_embedding_db = self.overrides.get(
@@ -233,7 +258,15 @@ class DependencyFactory(metaclass=Singleton):
             SymbolCodeEmbeddingBuilder(embedding_provider)
         )
 
-        return SymbolCodeEmbeddingHandler(code_embedding_db, embedding_builder)
+        embedding_index: Optional[EmbeddingIndex] = self.overrides.get(
+            "embedding_index"
+        )
+
+        return SymbolCodeEmbeddingHandler(
+            code_embedding_db,
+            embedding_builder,
+            embedding_index=embedding_index,
+        )
 
     @lru_cache()
     def create_symbol_doc_embedding_handler(self) -> SymbolDocEmbeddingHandler:
@@ -325,11 +358,17 @@ class DependencyFactory(metaclass=Singleton):
         """
         Associated Keyword Args:
             embedding_provider (OpenAIEmbedding())
+            embedding_index (None): Approximate index searched instead of every code embedding.
         """
         embedding_provider: OpenAIEmbeddingProvider = self.overrides.get(
             "embedding_provider", OpenAIEmbeddingProvider()
         )
-        return EmbeddingSimilarityCalculator(embedding_provider)
+        embedding_index: Optional[EmbeddingIndex] = self.overrides.get(
+            "embedding_index"
+        )
+        return EmbeddingSimilarityCalculator(
+            embedding_provider, embedding_index=embedding_index
+        )
 
     @lru_cache()
     def create_py_reader(self) -> PyReader:
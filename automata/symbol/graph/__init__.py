@@ -1,3 +1,4 @@
 from .symbol_graph import SymbolGraph
+from .symbol_graph_compact import CompactSymbolGraph
 
-__all__ = ["SymbolGraph"]
+__all__ = ["SymbolGraph", "CompactSymbolGraph"]
@@ -0,0 +1,151 @@
+"""
+Contains the `BoundingBoxCache` class, which persists the bounding boxes of
+symbols between runs, keyed by the content hash of the module defining them.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+from automata.core.ast_handlers import BoundingBox, LineItem
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the layout of the cache file changes
+BOUNDING_BOX_CACHE_FORMAT_VERSION = 1
+BOUNDING_BOX_CACHE_FILE_NAME = "bounding_boxes.json"
+
+# The bounding boxes of one module, keyed by symbol uri.
+# None marks a symbol whose bounding box could not be computed.
+ModuleBoundingBoxes = Dict[str, Optional[BoundingBox]]
+
+
+def hash_module_file(module_fpath: str) -> Optional[str]:
+    """Returns a hash of the contents of a module file, or None if it cannot be read."""
+    try:
+        with open(module_fpath, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError as e:
+        logger.error(f"Failed to read module '{module_fpath}' due to: {e}.")
+        return None
+
+
+def _encode_bounding_box(
+    bounding_box: Optional[BoundingBox],
+) -> Optional[List[int]]:
+    if bounding_box is None:
+        return None
+    return [
+        bounding_box.top_left.line,
+        bounding_box.top_left.column,
+        bounding_box.bottom_right.line,
+        bounding_box.bottom_right.column,
+    ]
+
+
+def _decode_bounding_box(
+    encoded: Optional[List[int]],
+) -> Optional[BoundingBox]:
+    if encoded is None:
+        return None
+    top_line, top_column, bottom_line, bottom_column = encoded
+    return BoundingBox(
+        top_left=LineItem(line=top_line, column=top_column),
+        bottom_right=LineItem(line=bottom_line, column=bottom_column),
+    )
+
+
+class BoundingBoxCache:
+    """
+    Stores the bounding boxes of symbols per module, along with the content hash
+    of the module they were computed from. Entries are only returned while the
+    hash matches, so only modules which changed on disk are recomputed.
+
+    The cache is stored as a single JSON file, which is read on construction
+    if it exists. An unreadable or outdated file is ignored and rebuilt.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self._modules: Dict[str, Tuple[str, ModuleBoundingBoxes]] = {}
+        self._modified = False
+        if path is not None and os.path.exists(path):
+            self._load(path)
+
+    def __len__(self) -> int:
+        return len(self._modules)
+
+    def get(
+        self, module_dotpath: str, content_hash: str
+    ) -> Optional[ModuleBoundingBoxes]:
+        """Gets the bounding boxes of a module, if they were computed from `content_hash`."""
+        entry = self._modules.get(module_dotpath)
+        if entry is None or entry[0] != content_hash:
+            return None
+        return entry[1]
+
+    def put(
+        self,
+        module_dotpath: str,
+        content_hash: str,
+        bounding_boxes: ModuleBoundingBoxes,
+    ) -> None:
+        """Replaces the bounding boxes of a module."""
+        self._modules[module_dotpath] = (content_hash, dict(bounding_boxes))
+        self._modified = True
+
+    def save(self) -> None:
+        """Writes the cache to its path, if it was modified since it was loaded."""
+        if self.path is None or not self._modified:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        modules = {
+            module_dotpath: {
+                "hash": content_hash,
+                "bounding_boxes": {
+                    uri: _encode_bounding_box(bounding_box)
+                    for uri, bounding_box in bounding_boxes.items()
+                },
+            }
+            for module_dotpath, (
+                content_hash,
+                bounding_boxes,
+            ) in self._modules.items()
+        }
+        # Written to a temporary file first, so an interrupted save never
+        # leaves a truncated cache behind
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(
+                {
+                    "format_version": BOUNDING_BOX_CACHE_FORMAT_VERSION,
+                    "modules": modules,
+                },
+                f,
+            )
+        os.replace(temporary_path, self.path)
+        self._modified = False
+
+    def _load(self, path: str) -> None:
+        try:
+            with open(path) as f:
+                contents = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable bounding box cache: {e}")
+            return
+        if contents.get("format_version") != BOUNDING_BOX_CACHE_FORMAT_VERSION:
+            logger.warning(
+                f"Ignoring bounding box cache at {path} with format version "
+                f"{contents.get('format_version')}"
+            )
+            return
+        for module_dotpath, entry in contents["modules"].items():
+            self._modules[module_dotpath] = (
+                entry["hash"],
+                {
+                    uri: _decode_bounding_box(encoded)
+                    for uri, encoded in entry["bounding_boxes"].items()
+                },
+            )
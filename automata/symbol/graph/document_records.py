@@ -0,0 +1,108 @@
+"""
+Contains the `DocumentRecords` class, which records the SCIP documents that a
+symbol graph was built from, so that index deltas only re-process changed
+documents, along with its on-disk format.
+"""
+
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from automata.core.saved_arrays import (
+    SavedArrayFormat,
+    StringTable,
+    load_array,
+    read_manifest,
+    save_arrays,
+)
+
+DOCUMENT_RECORDS_FORMAT = SavedArrayFormat("scip_document_records", 1)
+
+
+def hash_document(document: Any) -> str:
+    """Returns a hash of the contents of a `Document`."""
+    return hashlib.sha256(document.SerializeToString()).hexdigest()
+
+
+class DocumentRecords:
+    """
+    The hash of each SCIP `Document` which a symbol graph was built from,
+    and the URIs of the symbols it listed, keyed by relative path.
+    """
+
+    def __init__(
+        self,
+        hashes: Optional[Dict[str, str]] = None,
+        symbols: Optional[Dict[str, List[str]]] = None,
+    ) -> None:
+        self.hashes = hashes or {}
+        self.symbols = symbols or {}
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def record(
+        self,
+        relative_path: str,
+        document_hash: str,
+        symbol_uris: Iterable[str],
+    ) -> None:
+        self.hashes[relative_path] = document_hash
+        self.symbols[relative_path] = list(symbol_uris)
+
+    def record_document(self, document: Any) -> None:
+        """Records the hash of a `Document`, and the symbols it lists."""
+        self.record(
+            document.relative_path,
+            hash_document(document),
+            (
+                symbol_information.symbol
+                for symbol_information in document.symbols
+            ),
+        )
+
+    def save(self, directory: str) -> None:
+        """Saves the records as a directory of flat arrays."""
+        relative_paths = list(self.hashes)
+        arrays = StringTable.from_strings(relative_paths).to_arrays("paths.")
+        arrays |= StringTable.from_strings(
+            [self.hashes[path] for path in relative_paths]
+        ).to_arrays("hashes.")
+        arrays |= StringTable.from_strings(
+            [uri for path in relative_paths for uri in self.symbols[path]]
+        ).to_arrays("symbols.")
+        symbol_offsets = np.zeros(len(relative_paths) + 1, dtype=np.int64)
+        np.cumsum(
+            [len(self.symbols[path]) for path in relative_paths],
+            out=symbol_offsets[1:],
+        )
+        arrays["symbol_offsets"] = symbol_offsets
+        save_arrays(
+            directory,
+            DOCUMENT_RECORDS_FORMAT,
+            arrays,
+            document_count=len(relative_paths),
+        )
+
+    @classmethod
+    def load(cls, directory: str) -> "DocumentRecords":
+        """
+        Loads records saved with `save`.
+
+        Raises:
+            ValueError: If the records were saved with another format version
+        """
+        read_manifest(directory, DOCUMENT_RECORDS_FORMAT)
+        relative_paths = StringTable.from_arrays(directory, "paths.", None)
+        hashes = StringTable.from_arrays(directory, "hashes.", None)
+        symbol_uris = StringTable.from_arrays(directory, "symbols.", None)
+        symbol_offsets = load_array(directory, "symbol_offsets", None)
+        records = cls()
+        for i, relative_path in enumerate(relative_paths):
+            records.record(
+                relative_path,
+                hashes[i],
+                symbol_uris[symbol_offsets[i] : symbol_offsets[i + 1]],
+            )
+        return records
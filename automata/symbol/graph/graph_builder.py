@@ -4,22 +4,143 @@ Contains the `GraphBuilder` class, which builds a `SymbolGraph` from a correspon
 
 import logging
 import os
-import pickle
-from typing import Any, Optional
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 import networkx as nx
+from google.protobuf.json_format import MessageToDict  # type: ignore
 
 from automata.config.config_base import SerializedDataCategory
+from automata.singletons.py_module_loader import py_module_loader
+from automata.symbol.graph.document_records import (
+    DocumentRecords,
+    hash_document,
+)
 from automata.symbol.graph.symbol_caller_callees import CallerCalleeProcessor
-from automata.symbol.graph.symbol_references import ReferenceProcessor
+from automata.symbol.graph.symbol_graph_compact import (
+    CompactSymbolGraph,
+    is_saved_graph,
+)
+from automata.symbol.graph.symbol_graph_labelled import (
+    LabelledMultiDiGraph,
+    in_edges_with_label,
+    out_edges_with_label,
+)
+from automata.symbol.graph.symbol_references import (
+    DefinitionIndex,
+    FileReferenceTable,
+    ReferenceProcessor,
+    add_reference_table,
+    get_defined_uris,
+)
 from automata.symbol.graph.symbol_relationships import RelationshipProcessor
-from automata.symbol.scip_pb2 import Index  # type: ignore
+from automata.symbol.scip_index_reader import ScipIndexReader
+from automata.symbol.scip_pb2 import Document, Index  # type: ignore
+from automata.symbol.symbol_base import Symbol, SymbolReference
 from automata.symbol.symbol_parser import parse_symbol
 from automata.symbol.symbol_utils import load_data_path
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class DocumentEdges:
+    """
+    The contribution of a single SCIP `Document` to the symbol graph.
+    Symbols are held as URIs, so that shards are cheap to send between processes.
+    """
+
+    relative_path: str
+    symbols: List[str] = field(default_factory=list)
+    # (source URI, target URI, relationship labels)
+    relationships: List[Tuple[str, str, Dict[str, Any]]] = field(
+        default_factory=list
+    )
+    # (symbol URI, line number, column number, symbol role bitmask)
+    references: List[Tuple[str, int, int, int]] = field(default_factory=list)
+    # URIs of the symbols with a definition occurrence in the document
+    definitions: List[str] = field(default_factory=list)
+    # The hash of the document, see `DocumentRecords`
+    document_hash: str = ""
+
+
+def extract_document_edges(
+    build_references: bool,
+    build_relationships: bool,
+    serialized_documents: List[bytes],
+) -> List[DocumentEdges]:
+    """
+    Extracts the symbols, relationships and references of a shard of serialized
+    `Document`s. This is the worker function of a parallel graph build.
+    """
+    results = []
+    for serialized_document in serialized_documents:
+        document = Document()
+        document.ParseFromString(serialized_document)
+        document_edges = DocumentEdges(
+            document.relative_path, document_hash=hash_document(document)
+        )
+
+        for symbol_information in document.symbols:
+            try:
+                parse_symbol(symbol_information.symbol)
+            except Exception as e:
+                logger.error(
+                    f"Parsing symbol {symbol_information.symbol} failed with error {e}"
+                )
+                continue
+            document_edges.symbols.append(symbol_information.symbol)
+
+        if build_relationships:
+            for symbol_information in document.symbols:
+                for relationship in symbol_information.relationships:
+                    relationship_labels = MessageToDict(relationship)
+                    relationship_labels.pop("symbol")
+                    document_edges.relationships.append(
+                        (
+                            symbol_information.symbol,
+                            relationship.symbol,
+                            relationship_labels,
+                        )
+                    )
+
+        document_edges.definitions = get_defined_uris(document)
+
+        if build_references:
+            for occurrence in document.occurrences:
+                try:
+                    parse_symbol(occurrence.symbol)
+                except Exception as e:
+                    logger.error(
+                        f"Parsing symbol {occurrence.symbol} failed with error {e}"
+                    )
+                    continue
+                document_edges.references.append(
+                    (
+                        occurrence.symbol,
+                        occurrence.range[0],
+                        occurrence.range[1],
+                        occurrence.symbol_roles,
+                    )
+                )
+
+        results.append(document_edges)
+    return results
+
+
 class GraphBuilder:
     """Builds a `SymbolGraph` from a corresponding Index."""
 
@@ -29,16 +150,42 @@ class GraphBuilder:
         build_references: bool,
         build_relationships: bool,
         build_caller_relationships: bool,
+        num_workers: int = 1,
+        shard_size: int = 64,
+        graph: Optional[nx.MultiDiGraph] = None,
+        definition_index: Optional[DefinitionIndex] = None,
+        aggregate_references: bool = False,
     ) -> None:
         """
         Initializes a new instance of `GraphBuilder`.
+
+        `index` may be a parsed `Index` or a `ScipIndexReader`, in which case
+        documents are streamed from disk and added to the graph one at a time.
+        When `num_workers` is greater than one, documents are split into shards
+        of `shard_size` documents and processed across a pool of processes.
+        An existing `graph` may be passed in to update it document by document,
+        in which case `definition_index` should describe the documents of the index.
+        With `aggregate_references`, each symbol has one "reference" edge per file,
+        and the occurrences are held in a `FileReferenceTable` on the file node.
         """
         self.index = index
         self.build_references = build_references
         self.build_relationships = build_relationships
         self.build_caller_relationships = build_caller_relationships
-        self._graph = nx.MultiDiGraph()
+        self.num_workers = num_workers
+        self.shard_size = shard_size
+        self.aggregate_references = aggregate_references
+        self._graph = graph if graph is not None else LabelledMultiDiGraph()
+        self.definition_index = (
+            definition_index
+            if definition_index is not None
+            else DefinitionIndex()
+        )
         self.pickled_data_path = load_data_path()
+        # The documents of the index, recorded while building the graph from it
+        self.document_records: Optional[DocumentRecords] = None
+        # The documents whose caller-callee relationships could not be built
+        self.skipped_caller_documents = 0
 
     def build_graph(
         self, from_pickle: bool, save_graph_pickle: bool
@@ -48,36 +195,333 @@ class GraphBuilder:
         and add corresponding `Symbol` nodes to the graph.
         The `Document` type, along with others, is defined in the scip_pb2.py file.
         Edges are added for relationships, references, and calls between `Symbol` nodes.
+
+        When `from_pickle` is set, a previously saved graph is loaded instead,
+        and `save_graph_pickle` saves a newly built graph. Graphs are saved in
+        the memory-mapped format of `CompactSymbolGraph`, alongside the
+        `DocumentRecords` of their index.
         """
-        os.makedirs(self.pickled_data_path, exist_ok=True)
+        graph_path = self._get_saved_graph_path()
+        if from_pickle and is_saved_graph(graph_path):
+            self._graph = CompactSymbolGraph.load(graph_path).to_graph(
+                aggregate_references=self.aggregate_references
+            )
+        else:
+            self._build_graph_from_index()
+            if save_graph_pickle:
+                CompactSymbolGraph.from_graph(self._graph).save(graph_path)
+                self._save_document_records()
 
-        graph_pickle_path = os.path.join(
+        return self._graph
+
+    def build_compact_graph(
+        self, from_pickle: bool, save_graph_pickle: bool
+    ) -> CompactSymbolGraph:
+        """
+        Builds the graph as a `CompactSymbolGraph`. A previously saved graph is
+        memory-mapped directly, without building any networkx objects.
+        """
+        graph_path = self._get_saved_graph_path()
+        if from_pickle and is_saved_graph(graph_path):
+            return CompactSymbolGraph.load(graph_path)
+
+        self._build_graph_from_index()
+        compact_graph = CompactSymbolGraph.from_graph(self._graph)
+        if save_graph_pickle:
+            compact_graph.save(graph_path)
+            self._save_document_records()
+        return compact_graph
+
+    def _get_saved_graph_path(self) -> str:
+        return os.path.join(
             self.pickled_data_path,
-            SerializedDataCategory.PICKLED_SYMBOL_GRAPH.value,
+            SerializedDataCategory.COMPACT_SYMBOL_GRAPH.value,
         )
 
-        if from_pickle and os.path.exists(graph_pickle_path):
-            self._graph = pickle.load(open(graph_pickle_path, "rb"))
+    def get_saved_records_path(self) -> str:
+        """Gets the path which the `DocumentRecords` of a saved graph are saved to."""
+        return os.path.join(
+            self.pickled_data_path,
+            SerializedDataCategory.SCIP_DOCUMENT_RECORDS.value,
+        )
 
-        elif self.index is not None:
-            for document in self.index.documents:
-                self._add_symbol_vertices(document)
-                if self.build_relationships:
-                    self._process_relationships(document)
-                if self.build_references:
-                    self._process_references(document)
-                if self.build_caller_relationships:
-                    self._process_caller_callee_relationships(document)
+    def _save_document_records(self) -> None:
+        assert self.document_records is not None
+        self.document_records.save(self.get_saved_records_path())
 
-            if save_graph_pickle:
-                with open(graph_pickle_path, "wb") as f:
-                    pickle.dump(self._graph, f)
-        else:
+    def _build_graph_from_index(self) -> None:
+        if self.index is None:
             raise ValueError(
                 "Index file could not be loaded. Please check if the index file exists and is accessible."
             )
+        if self.num_workers > 1:
+            self._build_graph_in_parallel(self.index)
+        else:
+            self._build_graph_serially(self.index)
+        self.report_skipped_caller_documents()
 
-        return self._graph
+    def report_skipped_caller_documents(self) -> None:
+        """
+        Logs a single warning for the documents whose caller-callee
+        relationships were skipped since the last report, as the source of
+        their modules could not be loaded through `py_module_loader`.
+        """
+        if self.skipped_caller_documents == 0:
+            return
+        reason = (
+            "their modules could not be loaded"
+            if py_module_loader.initialized
+            else "the module loader is not initialized"
+        )
+        logger.warning(
+            f"Skipped caller-callee relationships of {self.skipped_caller_documents} documents, as {reason}."
+        )
+        self.skipped_caller_documents = 0
+
+    def add_document(self, document: Any) -> None:
+        """
+        Adds the nodes and edges of a single `Document` to the graph.
+        "contains" edges are only added for the symbols which `definition_index`
+        assigns to this document, or which it has not recorded.
+        """
+        self._add_symbol_vertices(document)
+        self._add_contains_edges(document)
+        if self.build_relationships:
+            self._process_relationships(document)
+        if self.build_references:
+            self._process_references(document)
+        if self.build_caller_relationships:
+            self._process_caller_callee_relationships(document)
+
+    def remove_document(
+        self, relative_path: str, symbol_uris: Iterable[str]
+    ) -> Set[Symbol]:
+        """
+        Removes the edges which a `Document` contributed to the graph, along with its file node.
+        `symbol_uris` are the symbols which the document listed when it was added.
+        Returns the symbols which the document contained.
+        """
+        symbols: Set[Symbol] = set()
+        for symbol_uri in symbol_uris:
+            try:
+                symbols.add(parse_symbol(symbol_uri))
+            except Exception:
+                continue
+        if relative_path in self._graph:
+            symbols |= {
+                target
+                for _, target, _ in out_edges_with_label(
+                    self._graph, relative_path, "contains"
+                )
+            }
+
+        # Relationship and caller-callee edges are attached to the document's symbols
+        for symbol in symbols:
+            if symbol not in self._graph:
+                continue
+            stale_edges = [
+                (source, target, key)
+                for source, target, key, data in self._graph.out_edges(
+                    symbol, keys=True, data=True
+                )
+                if data.get("label") in ("relationship", "caller")
+            ] + [
+                (source, target, key)
+                for source, target, key, data in self._graph.in_edges(
+                    symbol, keys=True, data=True
+                )
+                if data.get("label") == "callee"
+            ]
+            self._graph.remove_edges_from(stale_edges)
+
+        # Removing the file node drops its "contains" and "reference" edges
+        if relative_path in self._graph:
+            referenced_symbols = set(self._graph.predecessors(relative_path))
+            self._graph.remove_node(relative_path)
+            self._graph.remove_nodes_from(
+                [
+                    symbol
+                    for symbol in referenced_symbols - symbols
+                    if self._graph.degree(symbol) == 0
+                ]
+            )
+        return symbols
+
+    def set_contains_edges(self, symbols: Iterable[Symbol]) -> None:
+        """
+        Makes the document recorded in `definition_index` the only container of
+        each given symbol, if that document is in the graph. This reconciles
+        symbols whose defining document changed during an incremental update.
+        """
+        for symbol in symbols:
+            if symbol not in self._graph:
+                continue
+            defining_document = self.definition_index.get_defining_document(
+                symbol.uri
+            )
+            contains_edges = [
+                (source, key)
+                for source, _, key, data in self._graph.in_edges(
+                    symbol, keys=True, data=True
+                )
+                if data.get("label") == "contains"
+            ]
+            for source, key in contains_edges:
+                if source != defining_document:
+                    self._graph.remove_edge(source, symbol, key)
+            if defining_document in self._graph and not any(
+                source == defining_document for source, _ in contains_edges
+            ):
+                self._graph.add_edge(
+                    defining_document, symbol, label="contains"
+                )
+
+    def prune_symbols(self, symbols: Iterable[Symbol]) -> None:
+        """
+        Cleans up symbols which are no longer contained by any document.
+        Such symbols are removed, or kept as unlabelled nodes if they are still referenced.
+        """
+        for symbol in symbols:
+            if symbol not in self._graph:
+                continue
+            if any(in_edges_with_label(self._graph, symbol, "contains")):
+                continue
+            if self._graph.degree(symbol) == 0:
+                self._graph.remove_node(symbol)
+            else:
+                self._graph.nodes[symbol].pop("label", None)
+
+    def _build_graph_serially(self, index: Index) -> None:
+        """
+        Processes the documents of the index one at a time, after a first pass
+        which records the defining document of every symbol.
+        """
+        self.definition_index = DefinitionIndex.from_documents(index.documents)
+        self.document_records = DocumentRecords()
+        for document in index.documents:
+            self.add_document(document)
+            self.document_records.record_document(document)
+
+    def _build_graph_in_parallel(self, index: Index) -> None:
+        """
+        Processes the documents of the index across a pool of processes.
+        Each worker emits the edges of its documents, which are then merged
+        into the graph in document order, so that the result matches a serial build.
+        "contains" edges depend on every document, so they are added once all
+        shards are merged, followed by caller-callee relationships.
+        """
+        self.definition_index = DefinitionIndex()
+        self.document_records = DocumentRecords()
+        worker = partial(
+            extract_document_edges,
+            self.build_references,
+            self.build_relationships,
+        )
+        # Shards are submitted through a bounded window, so that a streamed
+        # index is never held in memory as a whole
+        max_pending_shards = 2 * self.num_workers
+        pending_shards: Deque[Future] = deque()
+        with ProcessPoolExecutor(max_workers=self.num_workers) as executor:
+            for shard in self._iter_serialized_shards(index):
+                pending_shards.append(executor.submit(worker, shard))
+                if len(pending_shards) >= max_pending_shards:
+                    self._merge_document_edges(
+                        pending_shards.popleft().result()
+                    )
+            while pending_shards:
+                self._merge_document_edges(pending_shards.popleft().result())
+
+        for uri, relative_path in self.definition_index.items():
+            self._add_contains_edge(relative_path, uri)
+
+        if self.build_caller_relationships:
+            for document in index.documents:
+                self._process_caller_callee_relationships(document)
+
+    def _iter_serialized_shards(self, index: Index) -> Iterator[List[bytes]]:
+        """
+        Yields shards of `shard_size` serialized documents.
+        A `ScipIndexReader` yields its documents without decoding them.
+        """
+        serialized_documents = (
+            index.iter_serialized_documents()
+            if isinstance(index, ScipIndexReader)
+            else (document.SerializeToString() for document in index.documents)
+        )
+        shard: List[bytes] = []
+        for serialized_document in serialized_documents:
+            shard.append(serialized_document)
+            if len(shard) == self.shard_size:
+                yield shard
+                shard = []
+        if shard:
+            yield shard
+
+    def _merge_document_edges(
+        self, shard_edges: Iterable[DocumentEdges]
+    ) -> None:
+        """
+        Adds the edges of processed documents to the graph, mirroring the serial
+        passes, and records their symbols in the `definition_index`.
+        """
+        assert self.document_records is not None
+        for document_edges in shard_edges:
+            relative_path = document_edges.relative_path
+            self.definition_index.record(
+                relative_path,
+                document_edges.symbols,
+                document_edges.definitions,
+            )
+            self.document_records.record(
+                relative_path,
+                document_edges.document_hash,
+                document_edges.symbols,
+            )
+            for symbol_uri in document_edges.symbols:
+                self._graph.add_node(parse_symbol(symbol_uri), label="symbol")
+
+            for source_uri, target_uri, labels in document_edges.relationships:
+                self._graph.add_edge(
+                    source_uri,
+                    parse_symbol(target_uri),
+                    label="relationship",
+                    **labels,
+                )
+
+            if self.aggregate_references:
+                add_reference_table(
+                    self._graph,
+                    relative_path,
+                    FileReferenceTable.from_occurrences(
+                        (parse_symbol(symbol_uri), line_number, column, roles)
+                        for (
+                            symbol_uri,
+                            line_number,
+                            column,
+                            roles,
+                        ) in document_edges.references
+                    ),
+                )
+                continue
+            for (
+                symbol_uri,
+                line_number,
+                column_number,
+                role_mask,
+            ) in document_edges.references:
+                symbol = parse_symbol(symbol_uri)
+                reference = SymbolReference(
+                    symbol=symbol,
+                    line_number=line_number,
+                    column_number=column_number,
+                    roles=ReferenceProcessor._process_symbol_roles(role_mask),
+                )
+                self._graph.add_edge(
+                    symbol,
+                    relative_path,
+                    symbol_reference=reference,
+                    label="reference",
+                )
 
     def _add_symbol_vertices(self, document: Any) -> None:
         """Add `Symbol` nodes to the graph."""
@@ -91,9 +535,28 @@ class GraphBuilder:
                 continue
 
             self._graph.add_node(symbol, label="symbol")
-            self._graph.add_edge(
-                document.relative_path, symbol, label="contains"
+
+    def _add_contains_edges(self, document: Any) -> None:
+        """Adds a "contains" edge to each symbol which the document defines."""
+        relative_path = document.relative_path
+        listed_uris = [
+            symbol_information.symbol
+            for symbol_information in document.symbols
+        ]
+        for uri in dict.fromkeys(listed_uris + get_defined_uris(document)):
+            defining_document = self.definition_index.get_defining_document(
+                uri
             )
+            if defining_document in (None, relative_path):
+                self._add_contains_edge(relative_path, uri)
+
+    def _add_contains_edge(self, relative_path: str, uri: str) -> None:
+        try:
+            symbol = parse_symbol(uri)
+        except Exception:
+            # Parsing failures are logged when the symbol is first processed
+            return
+        self._graph.add_edge(relative_path, symbol, label="contains")
 
     def _process_relationships(self, document: Any) -> None:
         """Add edges for relationships between `Symbol` nodes."""
@@ -105,10 +568,14 @@ class GraphBuilder:
 
     def _process_references(self, document: Any) -> None:
         """Process references between `Symbol` nodes."""
-        occurrence_manager = ReferenceProcessor(self._graph, document)
+        occurrence_manager = ReferenceProcessor(
+            self._graph, document, self.aggregate_references
+        )
         occurrence_manager.process()
 
     def _process_caller_callee_relationships(self, document: Any) -> None:
         """Process caller-callee relationships between `Symbol` nodes."""
         caller_callee_manager = CallerCalleeProcessor(self._graph, document)
         caller_callee_manager.process()
+        if caller_callee_manager.skipped:
+            self.skipped_caller_documents += 1
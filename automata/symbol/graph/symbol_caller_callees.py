@@ -1,87 +1,238 @@
+import ast
 import logging
-from typing import Any
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import networkx as nx
 
+from automata.singletons.py_module_loader import py_module_loader
 from automata.symbol.graph.symbol_graph_base import GraphProcessor
-from automata.symbol.graph.symbol_navigator import SymbolGraphNavigator
-from automata.symbol.symbol_base import SymbolDescriptor
+from automata.symbol.graph.symbol_references import ReferenceProcessor
+from automata.symbol.scip_pb2 import SymbolRole  # type: ignore
+from automata.symbol.symbol_base import Symbol, SymbolDescriptor
 from automata.symbol.symbol_parser import parse_symbol
 
 logger = logging.getLogger(__name__)
 
+# Kinds of symbols which can be called, classes being called through their constructor
+CALLABLE_KINDS = (
+    SymbolDescriptor.PyKind.Method,
+    SymbolDescriptor.PyKind.Class,
+)
+
+
+def _to_character_offset(line: str, byte_offset: int) -> int:
+    """Converts a UTF-8 byte offset from `ast` into the character offset used by SCIP."""
+    if line.isascii():
+        return byte_offset
+    return len(line.encode("utf-8")[:byte_offset].decode("utf-8", "ignore"))
+
+
+class CallVisitor(ast.NodeVisitor):
+    """
+    Walks a module once, resolving each `ast.Call` made inside a method to the
+    SCIP occurrence of the called name.
+
+    Methods are matched to their definition occurrences by line and name, and
+    calls are matched to occurrences by the position of the called name, so no
+    bounding boxes are needed. Calls inside nested functions are attributed to
+    the innermost enclosing method, while decorators and default arguments
+    belong to the scope around the function.
+    """
+
+    def __init__(
+        self,
+        source_lines: List[str],
+        method_definitions: Dict[Tuple[int, str], Symbol],
+        occurrences: Dict[Tuple[int, int], Any],
+    ) -> None:
+        self.source_lines = source_lines
+        # (0-indexed line, name) -> the method defined there
+        self.method_definitions = method_definitions
+        # (0-indexed line, character) -> the occurrence starting there
+        self.occurrences = occurrences
+        # (caller, occurrence of the callee) for each resolved call
+        self.calls: List[Tuple[Symbol, Any]] = []
+        self._callers: List[Optional[Symbol]] = []
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        self._visit_function(node)
+
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> None:
+        self._visit_function(node)
+
+    def visit_Call(self, node: ast.Call) -> None:
+        caller = self._callers[-1] if self._callers else None
+        position = self._get_callee_position(node.func)
+        if caller is not None and position is not None:
+            occurrence = self.occurrences.get(position)
+            if occurrence is not None:
+                self.calls.append((caller, occurrence))
+        self.generic_visit(node)
+
+    def _visit_function(
+        self, node: Union[ast.FunctionDef, ast.AsyncFunctionDef]
+    ) -> None:
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        self.visit(node.args)
+        if node.returns is not None:
+            self.visit(node.returns)
+
+        enclosing_caller = self._callers[-1] if self._callers else None
+        self._callers.append(
+            self.method_definitions.get((node.lineno - 1, node.name))
+            or enclosing_caller
+        )
+        for statement in node.body:
+            self.visit(statement)
+        self._callers.pop()
+
+    def _get_callee_position(
+        self, func: ast.expr
+    ) -> Optional[Tuple[int, int]]:
+        """Gets the position of the name being called, e.g. `bar` in `foo.bar()`."""
+        if isinstance(func, ast.Name):
+            line, byte_offset = func.lineno, func.col_offset
+        elif isinstance(func, ast.Attribute) and func.end_col_offset:
+            line = func.end_lineno or func.lineno
+            byte_offset = func.end_col_offset - len(func.attr.encode("utf-8"))
+        else:
+            return None
+        if line > len(self.source_lines):
+            return None
+        source_line = self.source_lines[line - 1]
+        return line - 1, _to_character_offset(source_line, byte_offset)
+
+
+def extract_calls(document: Any, source: str) -> List[Tuple[Symbol, Any]]:
+    """
+    Extracts the calls made by the methods of a `Document`, given the source
+    of its module. Returns the caller and the occurrence of the callee of each
+    call, keeping only callees which are methods or classes.
+    """
+    method_definitions: Dict[Tuple[int, str], Symbol] = {}
+    occurrences: Dict[Tuple[int, int], Any] = {}
+    for occurrence in document.occurrences:
+        line, character = occurrence.range[0], occurrence.range[1]
+        if occurrence.symbol_roles & SymbolRole.Definition:
+            try:
+                symbol = parse_symbol(occurrence.symbol)
+            except Exception:
+                # Parsing failures are logged when the symbol is first processed
+                continue
+            if symbol.py_kind == SymbolDescriptor.PyKind.Method:
+                method_definitions[
+                    (line, symbol.descriptors[-1].name)
+                ] = symbol
+        else:
+            occurrences[(line, character)] = occurrence
+
+    visitor = CallVisitor(source.splitlines(), method_definitions, occurrences)
+    visitor.visit(ast.parse(source))
+
+    calls: List[Tuple[Symbol, Any]] = []
+    for caller, occurrence in visitor.calls:
+        try:
+            callee = parse_symbol(occurrence.symbol)
+        except Exception:
+            continue
+        if callee.py_kind in CALLABLE_KINDS and callee != caller:
+            calls.append((caller, occurrence))
+    return calls
+
 
 class CallerCalleeProcessor(GraphProcessor):
     """Adds edges to the `MultiDiGraph` for caller-callee relationships between `Symbol` nodes."""
 
     def __init__(self, graph: nx.MultiDiGraph, document: Any) -> None:
         self._graph = graph
-        self.navigator = SymbolGraphNavigator(graph)
         self.document = document
+        self.skipped = False
 
     def process(self) -> None:
         """
         Adds edges in the local `MultiDiGraph` for caller-callee between `Symbol` nodes.
         One symbol is a caller of another symbol if it performs a call to that symbol.
         E.g. `foo()` is a caller of `bar()` in `foo(bar())`.
-        Note - Construction is an expensive operation and should be used sparingly.
-        TODO - Split this method into smaller methods.
+        The module of the document is parsed once and its calls are resolved with
+        `extract_calls`, so only actual calls produce edges.
+        Note - The source of the module is found through `py_module_loader`,
+        no edges are added if the loader is not initialized.
+        `skipped` is set when the source of the module could not be loaded.
         """
-        for symbol in self.document.symbols:
-            try:
-                symbol_object = parse_symbol(symbol.symbol)
-            except Exception as e:
-                logger.error(
-                    f"Parsing symbol {symbol.symbol} failed with error {e}"
-                )
-                continue
+        source = self._load_source()
+        if source is None:
+            self.skipped = True
+            return
+        try:
+            calls = extract_calls(self.document, source)
+        except SyntaxError as e:
+            logger.error(
+                f"Failed to parse {self.document.relative_path} with error {e}"
+            )
+            return
 
-            if symbol_object.py_kind != SymbolDescriptor.PyKind.Method:
-                continue
+        for caller, occurrence in calls:
+            callee = parse_symbol(occurrence.symbol)
+            line_number, column_number = (
+                occurrence.range[0],
+                occurrence.range[1],
+            )
+            roles = ReferenceProcessor._process_symbol_roles(
+                occurrence.symbol_roles
+            )
+            self._graph.add_edge(
+                caller,
+                callee,
+                line_number=line_number,
+                column_number=column_number,
+                roles=roles,
+                label="caller",
+            )
+            self._graph.add_edge(
+                callee,
+                caller,
+                line_number=line_number,
+                column_number=column_number,
+                roles=roles,
+                label="callee",
+            )
+
+    def _load_source(self) -> Optional[str]:
+        """Loads the source of the module which the document describes."""
+        if not py_module_loader.initialized:
+            logger.debug(
+                f"Skipping calls of {self.document.relative_path}, the module loader is not initialized"
+            )
+            return None
+        module_fpath = next(
+            (
+                py_module_loader.fetch_module_fpath_by_dotpath(module_dotpath)
+                for module_dotpath in self._get_module_dotpaths()
+                if module_dotpath in py_module_loader
+            ),
+            None,
+        )
+        if module_fpath is None:
+            logger.debug(f"No module found for {self.document.relative_path}")
+            return None
+        try:
+            with open(module_fpath) as f:
+                return f.read()
+        except OSError as e:
+            logger.error(
+                f"Failed to read module '{module_fpath}' due to: {e}."
+            )
+            return None
 
+    def _get_module_dotpaths(self) -> List[str]:
+        """Gets the module dotpaths of the symbols which the document defines."""
+        module_dotpaths: Dict[str, None] = {}
+        for symbol_information in self.document.symbols:
             try:
-                references_in_scope = (
-                    self.navigator._get_symbol_references_in_scope(
-                        symbol_object
-                    )
-                )
-            except Exception as e:
-                logger.error(
-                    f"Failed to get references in scope for symbol {symbol} with error {e}"
-                )
+                symbol = parse_symbol(symbol_information.symbol)
+            except Exception:
                 continue
-
-            for ref in references_in_scope:
-                try:
-                    if ref.symbol.py_kind in [
-                        SymbolDescriptor.PyKind.Method,
-                        SymbolDescriptor.PyKind.Class,
-                    ]:
-                        if ref.symbol == symbol_object:
-                            continue
-                        # TODO - This approach will include non-call statements, like return statements
-                        # unfortunately, this seems necessary to get the full set of callers
-                        # e.g. omitting classes appears to remove constructor calls for X, like X()
-                        # For, we filtering is done downstream with the ASTNavigator
-                        # with current understanding, it seems handling will require AST awareness
-                        self._graph.add_edge(
-                            symbol_object,
-                            ref.symbol,
-                            line_number=ref.line_number,
-                            column_number=ref.column_number,
-                            roles=ref.roles,
-                            label="caller",
-                        )
-                        self._graph.add_edge(
-                            ref.symbol,
-                            symbol_object,
-                            line_number=ref.line_number,
-                            column_number=ref.column_number,
-                            roles=ref.roles,
-                            label="callee",
-                        )
-                except Exception as e:
-                    logger.error(
-                        f"Failed to add caller-callee edge for {symbol} with error {e} "
-                    )
-                    continue
+            if not symbol.is_local:
+                module_dotpaths[symbol.module_path] = None
+        return list(module_dotpaths)
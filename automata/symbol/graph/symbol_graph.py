@@ -4,19 +4,53 @@ Contains the `SymbolGraph` class and all logic related to building symbol graphs
 
 
 import logging
+import multiprocessing
 import os
-import pickle
-from copy import deepcopy
-from functools import lru_cache
-from typing import Dict, List, Optional, Set
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
 
 import networkx as nx
+import numpy as np
 from tqdm import tqdm
 
 from automata.config import GRAPH_TYPE
 from automata.config.config_base import SerializedDataCategory
+from automata.core.saved_arrays import is_saved
+from automata.symbol.graph.bounding_box_cache import (
+    BOUNDING_BOX_CACHE_FILE_NAME,
+    BoundingBoxCache,
+)
+from automata.symbol.graph.document_records import (
+    DOCUMENT_RECORDS_FORMAT,
+    DocumentRecords,
+)
 from automata.symbol.graph.graph_builder import GraphBuilder
+from automata.symbol.graph.symbol_graph_compact import (
+    SYMBOL_DIGRAPH_FORMAT,
+    CompactSymbolGraph,
+    load_symbol_digraph,
+    save_symbol_digraph,
+)
+from automata.symbol.graph.symbol_graph_labelled import out_edges_with_label
+from automata.symbol.graph.symbol_graph_metrics import (
+    SYMBOL_GRAPH_METRICS_FORMAT,
+    SymbolGraphMetrics,
+)
+from automata.symbol.graph.symbol_graph_traversal import (
+    DEPENDENCY_LABELS,
+    AdjacencyIndex,
+)
+from automata.symbol.graph.symbol_graph_types import SymbolGraphEdgeLabel
 from automata.symbol.graph.symbol_navigator import SymbolGraphNavigator
+from automata.symbol.graph.symbol_rank_basis import (
+    SYMBOL_RANK_BASIS_FORMAT,
+    SymbolRankBasis,
+)
+from automata.symbol.graph.symbol_references import (
+    REFERENCE_TABLE_ATTRIBUTE,
+    DefinitionIndex,
+)
+from automata.symbol.scip_index_reader import ScipIndexReader
 from automata.symbol.scip_pb2 import Index  # type: ignore
 from automata.symbol.symbol_base import (
     ISymbolProvider,
@@ -38,11 +72,61 @@ def _load_index_protobuf(path: str) -> Index:
     return index
 
 
+# The graph and symbol ids shared with forked subgraph workers
+_SHARED_SUBGRAPH_STATE: Optional[
+    Tuple["SymbolGraph", List[Symbol], Dict[Symbol, int]]
+] = None
+
+
+def _can_fork() -> bool:
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def _compute_dependency_edges(
+    symbol_graph: "SymbolGraph",
+    source_ids: np.ndarray,
+    supported_symbols: List[Symbol],
+    symbol_ids: Dict[Symbol, int],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Computes the dependency edges of the given symbols as `(sources, targets)` id arrays."""
+    sources: List[int] = []
+    targets: List[int] = []
+    for source_id in tqdm(source_ids.tolist()):
+        symbol = supported_symbols[source_id]
+        try:
+            dependencies = symbol_graph.get_symbol_dependencies(symbol)
+        except Exception as e:
+            logger.error(f"Error processing {symbol.uri}: {e}")
+            continue
+        for dependency in dependencies:
+            target_id = symbol_ids.get(dependency)
+            if target_id is not None:
+                sources.append(source_id)
+                targets.append(target_id)
+    return np.array(sources, dtype=np.int64), np.array(targets, dtype=np.int64)
+
+
+def _compute_dependency_shard(
+    source_ids: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Computes the dependency edges of a shard, in a worker forked from the building process."""
+    assert _SHARED_SUBGRAPH_STATE is not None
+    symbol_graph, supported_symbols, symbol_ids = _SHARED_SUBGRAPH_STATE
+    return _compute_dependency_edges(
+        symbol_graph, source_ids, supported_symbols, symbol_ids
+    )
+
+
 class SymbolGraph(ISymbolProvider):
     """
     A `SymbolGraph` contains the symbols and relationships between them.e
     Currently, nodes are files and symbols, and edges consist of either
     "contains", "reference", "relationship", "caller", or "callee".
+
+    By default, the graph is held as a `CompactSymbolGraph`, an integer-id
+    representation which uses far less memory than networkx, and which a saved
+    graph is memory-mapped into. A networkx graph is only built when asked for
+    with `compact=False`, or when an index delta is applied.
     """
 
     def __init__(
@@ -50,40 +134,390 @@ class SymbolGraph(ISymbolProvider):
         index_path: str,
         build_references: bool = True,
         build_relationships: bool = True,
-        build_caller_relationships: bool = False,
+        build_caller_relationships: bool = True,
         from_pickle: bool = GRAPH_TYPE == "static",
         save_graph_pickle: bool = True,
+        compact: Optional[bool] = None,
+        num_workers: int = 1,
+        stream_index: bool = False,
+        path_prefixes: Optional[List[str]] = None,
+        aggregate_references: bool = False,
     ) -> None:
         """
         Initializes a new instance of `SymbolGraph`.
+        The graph is compact unless `compact` is False, or `path_prefixes` are given.
+        Documents are processed across `num_workers` processes when it exceeds one,
+        as are the dependencies of the symbols of rankable subgraphs.
+        With `stream_index`, documents are read from the index file one at a time,
+        rather than parsing the whole index into memory.
+
+        When `path_prefixes` are given, a partial graph is built from the documents
+        under those prefixes, plus the documents which define the symbols they reference.
+        Queries about a symbol outside of the loaded documents load its document on demand.
+        Partial graphs are streamed from the index and never saved to disk.
+
+        With `aggregate_references`, each symbol has a single "reference" edge per file,
+        and the positions of its occurrences are held in a `FileReferenceTable`.
+        `SymbolReference`s are then only created when references are queried.
+
+        Raises:
+            ValueError: If `path_prefixes` are combined with `compact`
         """
-        super().__init__()
-        index = (
-            _load_index_protobuf(index_path)
-            if index_path is not None
-            else None
-        )
+        if path_prefixes is not None and compact:
+            raise ValueError("A partial symbol graph cannot be compact.")
+        if compact is None:
+            compact = path_prefixes is None
+
+        index: Optional[Union[Index, ScipIndexReader]] = None
+        if index_path is not None:
+            index = (
+                ScipIndexReader(index_path)
+                if stream_index or path_prefixes is not None
+                else _load_index_protobuf(index_path)
+            )
         builder = GraphBuilder(
             index,
             build_references,
             build_relationships,
             build_caller_relationships,
+            num_workers=num_workers,
+            aggregate_references=aggregate_references,
         )
-        self._graph = builder.build_graph(from_pickle, save_graph_pickle)
+        graph: Union[nx.MultiDiGraph, CompactSymbolGraph]
+        index_reader: Optional[ScipIndexReader] = None
+        if path_prefixes is not None:
+            graph = builder._graph
+            assert isinstance(index, ScipIndexReader)
+            index_reader = index
+            builder.definition_index = DefinitionIndex.from_documents(
+                index.documents
+            )
+        elif compact:
+            graph = builder.build_compact_graph(from_pickle, save_graph_pickle)
+        else:
+            graph = builder.build_graph(from_pickle, save_graph_pickle)
+        # Partial graphs are never saved to disk
+        is_partial = index_reader is not None
+        self._initialize(
+            graph,
+            from_pickle=from_pickle and not is_partial,
+            save_graph_pickle=save_graph_pickle and not is_partial,
+            build_references=build_references,
+            build_relationships=build_relationships,
+            build_caller_relationships=build_caller_relationships,
+            aggregate_references=aggregate_references,
+            num_workers=num_workers,
+            document_records=builder.document_records,
+            is_modified=False,
+            partial_builder=builder if is_partial else None,
+            index_reader=index_reader,
+        )
+        if path_prefixes is not None:
+            self.expand(path_prefixes)
+
+    def _initialize(
+        self,
+        graph: Union[nx.MultiDiGraph, CompactSymbolGraph],
+        from_pickle: bool,
+        save_graph_pickle: bool,
+        build_references: bool,
+        build_relationships: bool,
+        build_caller_relationships: bool,
+        aggregate_references: bool,
+        num_workers: int,
+        document_records: Optional[DocumentRecords],
+        is_modified: bool,
+        partial_builder: Optional[GraphBuilder] = None,
+        index_reader: Optional[ScipIndexReader] = None,
+    ) -> None:
+        """
+        Sets up the state of a graph, for both `__init__` and `from_graph`.
+        A partial graph is given the builder and reader which load its documents.
+        """
+        super().__init__()
+        self._graph = graph
         self.navigator = SymbolGraphNavigator(self._graph)
+        # The paths of the loaded documents, or None if the whole index is loaded
+        self.loaded_paths: Optional[Set[str]] = (
+            set() if index_reader is not None else None
+        )
+        self._partial_builder = partial_builder
+        self._index_reader = index_reader
         self.from_pickle = from_pickle
         self.pickled_data_path = load_data_path()
-        self.subgraph_pickle_path = os.path.join(
+        self.subgraph_path = os.path.join(
             self.pickled_data_path,
-            SerializedDataCategory.PICKLED_SYMBOL_SUBGRAPH.value,
+            SerializedDataCategory.COMPACT_SYMBOL_SUBGRAPH.value,
+        )
+        self.bounding_box_cache_path = os.path.join(
+            self.pickled_data_path, BOUNDING_BOX_CACHE_FILE_NAME
+        )
+        self.metrics_path = os.path.join(
+            self.pickled_data_path,
+            SerializedDataCategory.SYMBOL_GRAPH_METRICS.value,
+        )
+        self.rank_basis_path = os.path.join(
+            self.pickled_data_path,
+            SerializedDataCategory.SYMBOL_RANK_BASIS.value,
+        )
+        self.document_records_path = os.path.join(
+            self.pickled_data_path,
+            SerializedDataCategory.SCIP_DOCUMENT_RECORDS.value,
         )
         self.save_graph_pickle = save_graph_pickle
+        self.build_references = build_references
+        self.build_relationships = build_relationships
+        self.build_caller_relationships = build_caller_relationships
+        self.aggregate_references = aggregate_references
+        self.num_workers = num_workers
+        self._rankable_subgraph: Optional[nx.DiGraph] = None
+        # Rankable subgraphs built for a `path_filter`, see `get_rankable_subgraph`
+        self._filtered_rankable_subgraphs: Dict[str, nx.DiGraph] = {}
+        self._adjacency_index: Optional[AdjacencyIndex] = None
+        self._metrics: Optional[SymbolGraphMetrics] = None
+        self._rank_basis: Optional[SymbolRankBasis] = None
+        # Saved metrics are stale once the graph is modified in-place
+        self._is_modified = is_modified
+        # Loaded from disk when first needed, see `_get_document_records`
+        self._document_records = document_records
+
+    @property
+    def is_partial(self) -> bool:
+        """Whether the graph holds only a part of the index."""
+        return self.loaded_paths is not None
+
+    def expand(self, path_prefixes: List[str]) -> Set[Symbol]:
+        """
+        Loads the documents under `path_prefixes` into a partial graph, along with
+        the documents which define the symbols they reference, one hop out.
+        Returns the symbols which were added to the graph.
+
+        Raises:
+            ValueError: If the graph is not partial
+        """
+        reader, builder = self._index_reader, self._partial_builder
+        if reader is None or builder is None:
+            raise ValueError("Only a partial symbol graph can be expanded.")
+
+        scoped_paths = {
+            relative_path
+            for relative_path in reader.offset_table
+            if any(
+                relative_path.startswith(prefix) for prefix in path_prefixes
+            )
+        }
+        referenced_uris: Set[str] = set()
+        added_symbols = self._load_documents(scoped_paths, referenced_uris)
+        neighbour_paths: Set[str] = set()
+        for uri in referenced_uris:
+            defining_document = builder.definition_index.get_defining_document(
+                uri
+            )
+            if defining_document is not None:
+                neighbour_paths.add(defining_document)
+        added_symbols |= self._load_documents(neighbour_paths, set())
+
+        if added_symbols:
+            self._filtered_rankable_subgraphs.clear()
+            self._adjacency_index = None
+            self._metrics = None
+            self._rank_basis = None
+            self._is_modified = True
+        if added_symbols and self._rankable_subgraph is not None:
+            self._update_rankable_subgraph(
+                self._rankable_subgraph, added_symbols
+            )
+        return added_symbols
+
+    def _load_documents(
+        self, relative_paths: Set[str], referenced_uris: Set[str]
+    ) -> Set[Symbol]:
+        """
+        Adds the documents with the given paths to a partial graph, in index order.
+        The URIs of the symbols they reference are added to `referenced_uris`.
+        """
+        builder, reader, loaded_paths = (
+            self._partial_builder,
+            self._index_reader,
+            self.loaded_paths,
+        )
+        assert builder and reader and loaded_paths is not None
+        added_symbols: Set[Symbol] = set()
+        for relative_path in reader.offset_table:
+            if (
+                relative_path not in relative_paths
+                or relative_path in loaded_paths
+            ):
+                continue
+            document = reader.get_document(relative_path)
+            if document is None:
+                continue
+            builder.add_document(document)
+            loaded_paths.add(relative_path)
+            self.navigator.invalidate_module_references([relative_path])
+            referenced_uris.update(
+                occurrence.symbol for occurrence in document.occurrences
+            )
+            if relative_path not in builder._graph:
+                continue
+            added_symbols |= {
+                target
+                for _, target, _ in out_edges_with_label(
+                    builder._graph, relative_path, "contains"
+                )
+            }
+        if added_symbols:
+            logger.info(
+                f"Loaded {len(added_symbols)} symbols into the partial graph"
+            )
+        return added_symbols
+
+    def _ensure_loaded(self, symbol: Symbol) -> None:
+        """Expands a partial graph to the document which defines `symbol`."""
+        if self._partial_builder is None or self.loaded_paths is None:
+            return
+        relative_path = (
+            self._partial_builder.definition_index.get_defining_document(
+                symbol.uri
+            )
+        )
+        if (
+            relative_path is not None
+            and relative_path not in self.loaded_paths
+        ):
+            logger.info(
+                f"Expanding the partial graph to {relative_path} for {symbol.uri}"
+            )
+            self.expand([relative_path])
+
+    def apply_index_delta(
+        self, new_index: Union[Index, ScipIndexReader]
+    ) -> Set[Symbol]:
+        """
+        Updates the graph in-place to match `new_index`, re-processing only the
+        documents which were added, removed or changed since the last index.
+        Cached bounding boxes and the cached rankable subgraph are updated only
+        for the symbols of those documents, which are returned.
+        `new_index` may be a `ScipIndexReader`, in which case only changed documents are held in memory.
+        A graph without document records, such as one created by `from_graph`, is rebuilt in place
+        from `new_index` by its first delta, which then returns every symbol.
+
+        Note - The caller is responsible for refreshing any changed modules in `py_module_loader`.
+
+        A graph held as a `CompactSymbolGraph` is first converted to a networkx graph.
+
+        Raises:
+            ValueError: If the graph is partial
+        """
+        if self.is_partial:
+            raise ValueError(
+                "Index deltas cannot be applied to a partial symbol graph."
+            )
+        if isinstance(self._graph, CompactSymbolGraph):
+            self._convert_to_networkx()
+        assert isinstance(self._graph, nx.MultiDiGraph)
+
+        # Only changed documents are kept, so a streamed index stays on disk
+        document_records = self._get_document_records()
+        new_records = DocumentRecords()
+        updated_documents: List[Any] = []
+        definition_index = DefinitionIndex()
+        for document in new_index.documents:
+            definition_index.record_document(document)
+            new_records.record_document(document)
+            if document_records is not None and document_records.hashes.get(
+                document.relative_path
+            ) != new_records.hashes.get(document.relative_path):
+                updated_documents.append(document)
+        self._document_records = new_records
+
+        affected_symbols: Set[Symbol] = set()
+        if document_records is None:
+            # Without records, documents cannot be compared, so every document is re-processed
+            logger.info("Rebuilding a symbol graph without document records")
+            affected_symbols = {
+                node for node in self._graph if isinstance(node, Symbol)
+            }
+            self._graph.remove_nodes_from(list(self._graph))
+            stale_paths: List[str] = []
+            documents: Iterable[Any] = new_index.documents
+        else:
+            stale_paths = [
+                relative_path
+                for relative_path, document_hash in document_records.hashes.items()
+                if new_records.hashes.get(relative_path) != document_hash
+            ]
+            if not stale_paths and not updated_documents:
+                return set()
+            logger.info(
+                f"Applying index delta with {len(stale_paths)} stale and {len(updated_documents)} updated documents"
+            )
+            documents = updated_documents
+
+        builder = GraphBuilder(
+            new_index,
+            self.build_references,
+            self.build_relationships,
+            self.build_caller_relationships,
+            graph=self._graph,
+            definition_index=definition_index,
+            aggregate_references=self.aggregate_references,
+        )
+        for relative_path in stale_paths:
+            assert document_records is not None
+            affected_symbols |= builder.remove_document(
+                relative_path, document_records.symbols[relative_path]
+            )
+        for document in documents:
+            builder.add_document(document)
+            if document.relative_path not in self._graph:
+                continue
+            affected_symbols |= {
+                target
+                for _, target, _ in out_edges_with_label(
+                    self._graph, document.relative_path, "contains"
+                )
+            }
+        builder.report_skipped_caller_documents()
+        builder.set_contains_edges(affected_symbols)
+        builder.prune_symbols(affected_symbols)
+
+        self.navigator.invalidate_module_references(
+            None
+            if document_records is None
+            else stale_paths
+            + [document.relative_path for document in updated_documents]
+        )
+        for symbol in affected_symbols:
+            self.navigator.bounding_box.pop(symbol, None)
+        self._filtered_rankable_subgraphs.clear()
+        self._adjacency_index = None
+        self._metrics = None
+        self._rank_basis = None
+        self._is_modified = True
+        if self._rankable_subgraph is not None:
+            self._update_rankable_subgraph(
+                self._rankable_subgraph, affected_symbols
+            )
+        return affected_symbols
+
+    def _convert_to_networkx(self) -> None:
+        """Replaces a `CompactSymbolGraph` with the networkx graph it holds, keeping cached bounding boxes."""
+        assert isinstance(self._graph, CompactSymbolGraph)
+        logger.info("Converting a compact symbol graph to networkx")
+        self._graph = self._graph.to_graph(
+            aggregate_references=self.aggregate_references
+        )
+        bounding_box = self.navigator.bounding_box
+        self.navigator = SymbolGraphNavigator(self._graph)
+        self.navigator.bounding_box = bounding_box
 
     def get_symbol_dependencies(self, symbol: Symbol) -> Set[Symbol]:
         """
         Returns the set of symbols that the given symbol depends on. This means any symbols that the input symbol
         directly references or uses.
         """
+        self._ensure_loaded(symbol)
         return self.navigator.get_symbol_dependencies(symbol)
 
     def get_symbol_relationships(self, symbol: Symbol) -> Set[Symbol]:
@@ -93,6 +527,7 @@ class SymbolGraph(ISymbolProvider):
 
         # TODO: Consider the implications of using a List instead of Set.
         """
+        self._ensure_loaded(symbol)
         return self.navigator.get_symbol_relationships(symbol)
 
     def get_potential_symbol_callers(
@@ -103,6 +538,7 @@ class SymbolGraph(ISymbolProvider):
         to the given symbol. Downstream filtering must be applied to remove non-call relationships.
 
         """
+        self._ensure_loaded(symbol)
         return self.navigator.get_potential_symbol_callers(symbol)
 
     def get_potential_symbol_callees(
@@ -112,6 +548,7 @@ class SymbolGraph(ISymbolProvider):
         Gets potential callees of the given symbol. This includes any symbols that the given symbol might be calling.
         Downstream filtering must be applied to remove relationships that are not 'calls'.
         """
+        self._ensure_loaded(symbol)
         return self.navigator.get_potential_symbol_callees(symbol)
 
     def get_references_to_symbol(
@@ -121,35 +558,201 @@ class SymbolGraph(ISymbolProvider):
         Gets the references to the given symbol in the graph. This includes all places in the codebase where
         the given symbol is used or called.
         """
+        self._ensure_loaded(symbol)
         return self.navigator.get_references_to_symbol(symbol)
 
+    @property
+    def adjacency_index(self) -> AdjacencyIndex:
+        """
+        Gets the array adjacency of the graph, which is built on first use
+        and rebuilt after the graph is modified.
+        """
+        if self._adjacency_index is None:
+            self._adjacency_index = (
+                AdjacencyIndex.from_compact_graph(self._graph)
+                if isinstance(self._graph, CompactSymbolGraph)
+                else AdjacencyIndex.from_graph(self._graph)
+            )
+        return self._adjacency_index
+
+    def get_neighbourhood(
+        self,
+        symbols: List[Symbol],
+        max_hops: int = 1,
+        labels: Optional[List[SymbolGraphEdgeLabel]] = None,
+        max_nodes: Optional[int] = None,
+        reverse: bool = False,
+    ) -> Dict[Union[Symbol, str], int]:
+        """
+        Gets the nodes within `max_hops` hops of any of the given symbols, mapped to
+        their distance from the nearest one, following edges with the given labels.
+        At most `max_nodes` nodes besides the given symbols are returned, nearest first.
+        With `reverse`, edges are followed backwards, e.g. from a callee to its callers.
+
+        Note - A partial graph is only traversed through its loaded documents.
+        """
+        for symbol in symbols:
+            self._ensure_loaded(symbol)
+        return self.adjacency_index.traverse(
+            symbols, max_hops, labels, max_nodes, reverse
+        )
+
+    def get_transitive_dependencies(
+        self,
+        symbols: List[Symbol],
+        labels: Optional[List[SymbolGraphEdgeLabel]] = None,
+        reverse: bool = False,
+    ) -> Dict[Symbol, Set[Symbol]]:
+        """
+        Gets all of the symbols each of the given symbols transitively depends on,
+        through its calls and relationships unless other `labels` are given.
+        With `reverse`, gets the symbols which transitively depend on each symbol instead.
+        Closures are memoized until the graph is modified.
+        """
+        for symbol in symbols:
+            self._ensure_loaded(symbol)
+        adjacency_index = self.adjacency_index
+        return {
+            symbol: {
+                node
+                for node in adjacency_index.transitive_closure(
+                    symbol, labels or DEPENDENCY_LABELS, reverse
+                )
+                if isinstance(node, Symbol)
+            }
+            for symbol in symbols
+        }
+
+    def get_metrics(
+        self,
+        alpha: float = 0.25,
+        max_iterations: int = 100,
+        tolerance: float = 1.0e-6,
+        weight_key: str = "weight",
+    ) -> SymbolGraphMetrics:
+        """
+        Gets the structural metrics of the symbols of the default rankable subgraph,
+        with their global SymbolRank computed for the given configuration.
+        Metrics are saved alongside the graph, and loaded instead of being recomputed
+        until the graph is modified. Saved metrics whose fingerprint does not match
+        the subgraph are recomputed.
+        """
+        if self._metrics is not None and self._metrics.matches(
+            alpha, max_iterations, tolerance, weight_key
+        ):
+            return self._metrics
+
+        metrics: Optional[SymbolGraphMetrics] = None
+        if (
+            not self._is_modified
+            and self.from_pickle
+            and is_saved(self.metrics_path, SYMBOL_GRAPH_METRICS_FORMAT)
+        ):
+            metrics = SymbolGraphMetrics.load(self.metrics_path)
+        if (
+            metrics is None
+            or not metrics.matches(
+                alpha, max_iterations, tolerance, weight_key
+            )
+            or not metrics.matches_graph(self.default_rankable_subgraph)
+        ):
+            metrics = SymbolGraphMetrics.compute(
+                self.default_rankable_subgraph,
+                self._graph,
+                alpha,
+                max_iterations,
+                tolerance,
+                weight_key,
+            )
+            if not self._is_modified and self.save_graph_pickle:
+                metrics.save(self.metrics_path)
+        self._metrics = metrics
+        return metrics
+
+    def get_rank_basis(
+        self,
+        alpha: float = 0.25,
+        top_k: int = 64,
+        tolerance: float = 1.0e-6,
+        max_iterations: int = 100,
+    ) -> SymbolRankBasis:
+        """
+        Gets the `SymbolRankBasis` of the default rankable subgraph, which keeps the
+        `top_k` highest ranks personalized on each symbol. The basis is computed across
+        `num_workers` processes, saved alongside the graph, and loaded instead of being
+        recomputed until the graph is modified. A saved basis whose fingerprint does
+        not match the subgraph is recomputed.
+        """
+        if self._rank_basis is not None and self._rank_basis.matches(
+            alpha, top_k
+        ):
+            return self._rank_basis
+
+        rank_basis: Optional[SymbolRankBasis] = None
+        if (
+            not self._is_modified
+            and self.from_pickle
+            and is_saved(self.rank_basis_path, SYMBOL_RANK_BASIS_FORMAT)
+        ):
+            rank_basis = SymbolRankBasis.load(self.rank_basis_path)
+        if (
+            rank_basis is None
+            or not rank_basis.matches(alpha, top_k)
+            or not rank_basis.matches_graph(self.default_rankable_subgraph)
+        ):
+            rank_basis = SymbolRankBasis.compute(
+                self.default_rankable_subgraph,
+                alpha,
+                top_k,
+                tolerance,
+                max_iterations,
+                self.num_workers,
+            )
+            if not self._is_modified and self.save_graph_pickle:
+                rank_basis.save(self.rank_basis_path)
+        self._rank_basis = rank_basis
+        return rank_basis
+
     @property
     def default_rankable_subgraph(self) -> nx.DiGraph:
         """
         Gets the default rankable subgraph. This subgraph contains only the nodes and edges of the original
         graph that can be ranked. This may be a cached version of the graph for faster loading.
         """
-        return self._build_default_rankable_subgraph()
+        if self._rankable_subgraph is None:
+            self._rankable_subgraph = self._build_default_rankable_subgraph()
+        return self._rankable_subgraph
+
+    def get_rankable_subgraph(
+        self, path_filter: Optional[str] = None
+    ) -> nx.DiGraph:
+        """
+        Gets the rankable subgraph of the symbols whose dotpath starts with `path_filter`.
+        Subgraphs are cached per filter until the graph is modified.
+        """
+        if path_filter is None:
+            return self.default_rankable_subgraph
+        if path_filter not in self._filtered_rankable_subgraphs:
+            self._filtered_rankable_subgraphs[
+                path_filter
+            ] = self._build_rankable_subgraph(path_filter)
+        return self._filtered_rankable_subgraphs[path_filter]
 
-    @lru_cache(maxsize=1)
     def _build_default_rankable_subgraph(self) -> nx.DiGraph:
         """
         Creates a subgraph of the original `SymbolGraph`
         """
-        os.makedirs(self.pickled_data_path, exist_ok=True)
-
-        if not self.from_pickle or not os.path.exists(
-            self.subgraph_pickle_path
+        if self.from_pickle and is_saved(
+            self.subgraph_path, SYMBOL_DIGRAPH_FORMAT
         ):
+            subgraph = load_symbol_digraph(self.subgraph_path)
+        else:
             subgraph = self._build_rankable_subgraph()
 
             if self.save_graph_pickle:
-                with open(self.subgraph_pickle_path, "wb") as f:
-                    pickle.dump(subgraph, f)
-
-        else:
-            subgraph = pickle.load(open(self.subgraph_pickle_path, "rb"))
+                save_symbol_digraph(subgraph, self.subgraph_path)
 
+        self._rankable_subgraph = subgraph
         return subgraph
 
     def _build_rankable_subgraph(
@@ -163,36 +766,129 @@ class SymbolGraph(ISymbolProvider):
 
         TODO - Think of how to handle relationships here.
         """
-        graph = nx.DiGraph()
+        # Collected once, as each call re-sorts the symbols of the graph
+        supported_symbols = self.get_sorted_supported_symbols()
+        symbol_ids = {symbol: i for i, symbol in enumerate(supported_symbols)}
 
-        filtered_symbols = get_rankable_symbols(
-            self.get_sorted_supported_symbols()
-        )
+        filtered_symbols = get_rankable_symbols(supported_symbols)
 
         if path_filter is not None:
             filtered_symbols = [
                 sym for sym in filtered_symbols if sym.dotpath.startswith(path_filter)  # type: ignore
             ]
 
-        self.navigator._pre_compute_rankable_bounding_boxes()
+        bounding_box_cache = BoundingBoxCache(self.bounding_box_cache_path)
+        self.navigator._pre_compute_rankable_bounding_boxes(bounding_box_cache)
+        if self.save_graph_pickle:
+            bounding_box_cache.save()
 
         logger.info("Building the rankable symbol subgraph...")
-        for symbol in tqdm(filtered_symbols):
-            try:
-                dependencies = [
-                    ele
-                    for ele in self.get_symbol_dependencies(symbol)
-                    if ele in self.get_sorted_supported_symbols()
-                ]
-                for dependency in dependencies:
-                    graph.add_edge(symbol, dependency)
-                    graph.add_edge(dependency, symbol)
-            except Exception as e:
-                logger.error(f"Error processing {symbol.uri}: {e}")
+        source_ids = np.fromiter(
+            (symbol_ids[symbol] for symbol in filtered_symbols),
+            dtype=np.int64,
+            count=len(filtered_symbols),
+        )
+        sources, targets = self._compute_rankable_edges(
+            source_ids, supported_symbols, symbol_ids
+        )
+
+        graph = nx.DiGraph()
+        for source, target in zip(sources.tolist(), targets.tolist()):
+            graph.add_edge(
+                supported_symbols[source], supported_symbols[target]
+            )
+            graph.add_edge(
+                supported_symbols[target], supported_symbols[source]
+            )
 
         logger.info("Built the rankable symbol subgraph")
         return graph
 
+    def _compute_rankable_edges(
+        self,
+        source_ids: np.ndarray,
+        supported_symbols: List[Symbol],
+        symbol_ids: Dict[Symbol, int],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Computes the `(sources, targets)` id arrays of the dependencies of the given symbols,
+        keeping only dependencies which are supported symbols.
+        With more than one worker, contiguous shards of the symbols are processed in forked
+        processes. Symbols are sorted by dotpath, so a shard covers few modules.
+        """
+        num_shards = min(self.num_workers, len(source_ids))
+        if num_shards <= 1 or not _can_fork():
+            return _compute_dependency_edges(
+                self, source_ids, supported_symbols, symbol_ids
+            )
+
+        global _SHARED_SUBGRAPH_STATE
+        _SHARED_SUBGRAPH_STATE = (self, supported_symbols, symbol_ids)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=num_shards,
+                mp_context=multiprocessing.get_context("fork"),
+            ) as executor:
+                results = list(
+                    executor.map(
+                        _compute_dependency_shard,
+                        np.array_split(source_ids, num_shards * 4),
+                    )
+                )
+        finally:
+            _SHARED_SUBGRAPH_STATE = None
+        return (
+            np.concatenate([sources for sources, _ in results]),
+            np.concatenate([targets for _, targets in results]),
+        )
+
+    def _update_rankable_subgraph(
+        self, subgraph: nx.DiGraph, affected_symbols: Set[Symbol]
+    ) -> None:
+        """
+        Updates a rankable subgraph in-place after the given symbols have changed.
+        Edges of the affected symbols are rebuilt, and edges to unaffected neighbours
+        are kept where the neighbour itself depends on the affected symbol.
+        The "revision" of the subgraph is bumped, so that rankers rebuild their matrices.
+        """
+        subgraph.graph["revision"] = subgraph.graph.get("revision", 0) + 1
+        supported_symbols = set(self.navigator.get_sorted_supported_symbols())
+        rankable_symbols = set(get_rankable_symbols(list(supported_symbols)))
+
+        neighbours: Set[Symbol] = set()
+        for symbol in affected_symbols:
+            if symbol in subgraph:
+                neighbours.update(subgraph.neighbors(symbol))
+                subgraph.remove_node(symbol)
+        neighbours -= affected_symbols
+
+        for symbol in (affected_symbols | neighbours) & rankable_symbols:
+            try:
+                dependencies = self.get_symbol_dependencies(symbol)
+            except Exception as e:
+                logger.error(f"Error processing {symbol.uri}: {e}")
+                continue
+            if symbol in neighbours:
+                dependencies &= affected_symbols
+            for dependency in dependencies & supported_symbols:
+                subgraph.add_edge(symbol, dependency)
+                subgraph.add_edge(dependency, symbol)
+
+    def _get_document_records(self) -> Optional[DocumentRecords]:
+        """
+        Gets the records of the documents which the graph was built from, if any.
+        The records of a loaded graph are read from disk the first time they are needed.
+        """
+        if (
+            self._document_records is None
+            and self.from_pickle
+            and is_saved(self.document_records_path, DOCUMENT_RECORDS_FORMAT)
+        ):
+            self._document_records = DocumentRecords.load(
+                self.document_records_path
+            )
+        return self._document_records
+
     # ISymbolProvider methods
     def _get_sorted_supported_symbols(self) -> List[Symbol]:
         return self.navigator.get_sorted_supported_symbols()
@@ -202,25 +898,51 @@ class SymbolGraph(ISymbolProvider):
         Modifies the graph in-place by removing all symbol nodes that are not present in
         the given list, 'sorted_supported_symbols'. The list should contain
         symbol instances that are a part of the graph. If the graph doesn't exist, this function does nothing.
+        Symbols are matched against a set in a single pass over the nodes, without copying them.
         """
-        if self._graph:
-            graph_nodes_and_data = deepcopy(self._graph.nodes(data=True))
-            for node, data in graph_nodes_and_data:
-                if (
-                    data.get("label") == "symbol"
-                    and node not in sorted_supported_symbols
-                ):
-                    self._graph.remove_node(node)
+        if isinstance(self._graph, CompactSymbolGraph):
+            self._graph.retain_symbols(sorted_supported_symbols)
+        elif self._graph:
+            supported_symbols = set(sorted_supported_symbols)
+            removed_symbols = [
+                node
+                for node, label in self._graph.nodes(data="label")
+                if label == "symbol" and node not in supported_symbols
+            ]
+            if not removed_symbols:
+                return
+            self._graph.remove_nodes_from(removed_symbols)
+        self.navigator.invalidate_module_references()
+        self._filtered_rankable_subgraphs.clear()
+        self._adjacency_index = None
+        self._metrics = None
+        self._rank_basis = None
+        self._is_modified = True
 
     @classmethod
-    def from_graph(cls, graph: nx.MultiDiGraph) -> "SymbolGraph":
+    def from_graph(
+        cls, graph: Union[nx.MultiDiGraph, CompactSymbolGraph]
+    ) -> "SymbolGraph":
         """
-        Creates a new `SymbolGraph` instance from an existing networkx MultiDiGraph object.
+        Creates a new `SymbolGraph` instance from an existing networkx MultiDiGraph
+        or `CompactSymbolGraph` object.
         """
         instance = cls.__new__(cls)
-
-        instance._graph = graph
-
-        instance.navigator = SymbolGraphNavigator(instance._graph)
-
+        instance._initialize(
+            graph,
+            from_pickle=False,
+            save_graph_pickle=False,
+            build_references=True,
+            build_relationships=True,
+            build_caller_relationships=True,
+            # Index deltas keep the references of the graph as they are held
+            aggregate_references=not isinstance(graph, CompactSymbolGraph)
+            and any(
+                REFERENCE_TABLE_ATTRIBUTE in data
+                for _, data in graph.nodes(data=True)
+            ),
+            num_workers=1,
+            document_records=None,
+            is_modified=True,
+        )
         return instance
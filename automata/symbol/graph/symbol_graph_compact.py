@@ -0,0 +1,606 @@
+"""
+Contains the `CompactSymbolGraph` class, an integer-id, array-backed
+representation of the symbol graph, along with its on-disk format.
+
+A saved graph is a directory of flat `.npy` arrays and a JSON manifest.
+The arrays are opened with `numpy.memmap`, so loading a graph takes
+milliseconds and its pages are only read from disk when they are queried.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import networkx as nx
+import numpy as np
+
+from automata.core.saved_arrays import (
+    MmapMode,
+    SavedArrayFormat,
+    StringTable,
+    is_saved,
+    load_array,
+    read_manifest,
+    save_arrays,
+)
+from automata.symbol.graph.symbol_graph_labelled import LabelledMultiDiGraph
+from automata.symbol.graph.symbol_graph_types import (
+    SymbolGraphEdgeLabel,
+    SymbolGraphNodeKind,
+)
+from automata.symbol.graph.symbol_references import (
+    REFERENCE_TABLE_ATTRIBUTE,
+    FileReferenceTable,
+    get_reference_table,
+)
+from automata.symbol.scip_pb2 import SymbolRole  # type: ignore
+from automata.symbol.symbol_base import Symbol, SymbolReference
+from automata.symbol.symbol_parser import parse_symbol
+
+logger = logging.getLogger(__name__)
+
+GraphNode = Union[Symbol, str]
+EdgeData = Dict[str, Any]
+
+COMPACT_GRAPH_FORMAT = SavedArrayFormat("compact_symbol_graph", 1)
+SYMBOL_DIGRAPH_FORMAT = SavedArrayFormat("symbol_digraph", 1)
+
+# The boolean fields of a SCIP `Relationship`, as named by `MessageToDict`
+RELATIONSHIP_FLAGS = (
+    "isReference",
+    "isImplementation",
+    "isTypeDefinition",
+    "isDefinition",
+)
+
+
+def encode_symbol_roles(roles: Optional[Dict[str, bool]]) -> int:
+    """Encodes a dictionary of SCIP symbol roles into a bitmask."""
+    if not roles:
+        return 0
+    return sum(
+        SymbolRole.Value(role_name)
+        for role_name, is_set in roles.items()
+        if is_set
+    )
+
+
+def decode_symbol_roles(role_mask: int) -> Dict[str, bool]:
+    """Decodes a SCIP symbol role bitmask into a dictionary of roles."""
+    return {
+        role_name: True
+        for role_name, role_value in SymbolRole.items()
+        if (role_mask & role_value) > 0
+    }
+
+
+def encode_relationship_flags(data: EdgeData) -> int:
+    """Encodes the boolean fields of a relationship edge into a bitmask."""
+    return sum(
+        1 << i for i, flag in enumerate(RELATIONSHIP_FLAGS) if data.get(flag)
+    )
+
+
+def decode_relationship_flags(flag_mask: int) -> Dict[str, bool]:
+    """Decodes a relationship bitmask into the boolean fields of the edge."""
+    return {
+        flag: True
+        for i, flag in enumerate(RELATIONSHIP_FLAGS)
+        if flag_mask & (1 << i)
+    }
+
+
+def build_indptr(sorted_node_ids: np.ndarray, node_count: int) -> np.ndarray:
+    """Builds a CSR index pointer array from a sorted array of node ids."""
+    counts = np.bincount(sorted_node_ids, minlength=node_count)
+    indptr = np.zeros(node_count + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr
+
+
+def is_saved_graph(directory: str) -> bool:
+    """Checks if `directory` holds a graph saved in the current format."""
+    return is_saved(directory, COMPACT_GRAPH_FORMAT)
+
+
+class EdgeTable:
+    """
+    Stores all edges of a single label in CSR form, ordered by source node.
+    A second index, ordered by target node, allows for fast in-edge lookups.
+    Each edge carries a line number, a column number and an integer of flags,
+    which hold the symbol roles or relationship flags of the edge, along with
+    its position in the insertion order of the original graph.
+    """
+
+    COLUMNS = (
+        "out_indptr",
+        "targets",
+        "line_numbers",
+        "column_numbers",
+        "flags",
+        "in_indptr",
+        "in_edge_ids",
+        "positions",
+    )
+
+    def __init__(
+        self,
+        out_indptr: np.ndarray,
+        targets: np.ndarray,
+        line_numbers: np.ndarray,
+        column_numbers: np.ndarray,
+        flags: np.ndarray,
+        in_indptr: np.ndarray,
+        in_edge_ids: np.ndarray,
+        positions: np.ndarray,
+    ) -> None:
+        self.out_indptr = out_indptr
+        self.targets = targets
+        self.line_numbers = line_numbers
+        self.column_numbers = column_numbers
+        self.flags = flags
+        self.in_indptr = in_indptr
+        self.in_edge_ids = in_edge_ids
+        self.positions = positions
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+    @classmethod
+    def from_edges(
+        cls,
+        node_count: int,
+        sources: Iterable[int],
+        targets: Iterable[int],
+        line_numbers: Iterable[int],
+        column_numbers: Iterable[int],
+        flags: Iterable[int],
+        positions: Iterable[int],
+    ) -> "EdgeTable":
+        """Builds an `EdgeTable` from unordered, per-edge columns."""
+        source_arr = np.fromiter(sources, dtype=np.int32)
+        order = np.argsort(source_arr, kind="stable")
+        target_arr = np.fromiter(targets, dtype=np.int32)[order]
+        in_edge_ids = np.argsort(target_arr, kind="stable").astype(np.int64)
+        return cls(
+            out_indptr=build_indptr(source_arr[order], node_count),
+            targets=target_arr,
+            line_numbers=np.fromiter(line_numbers, dtype=np.int32)[order],
+            column_numbers=np.fromiter(column_numbers, dtype=np.int32)[order],
+            flags=np.fromiter(flags, dtype=np.int32)[order],
+            in_indptr=build_indptr(target_arr[in_edge_ids], node_count),
+            in_edge_ids=in_edge_ids,
+            positions=np.fromiter(positions, dtype=np.int64)[order],
+        )
+
+    def to_arrays(self, prefix: str) -> Dict[str, np.ndarray]:
+        return {
+            f"{prefix}{column}": getattr(self, column)
+            for column in self.COLUMNS
+        }
+
+    @classmethod
+    def from_arrays(
+        cls, directory: str, prefix: str, mmap_mode: MmapMode
+    ) -> "EdgeTable":
+        return cls(
+            *(
+                load_array(directory, f"{prefix}{column}", mmap_mode)
+                for column in cls.COLUMNS
+            )
+        )
+
+    def out_edge_ids(self, node_id: int) -> np.ndarray:
+        """Returns the ids of all edges leaving the given node."""
+        return np.arange(
+            self.out_indptr[node_id],
+            self.out_indptr[node_id + 1],
+            dtype=np.int64,
+        )
+
+    def in_edge_ids_of(self, node_id: int) -> np.ndarray:
+        """Returns the ids of all edges entering the given node."""
+        return self.in_edge_ids[
+            self.in_indptr[node_id] : self.in_indptr[node_id + 1]
+        ]
+
+    def sources_of(self, edge_ids: np.ndarray) -> np.ndarray:
+        """Returns the source node ids of the given edges."""
+        return np.searchsorted(self.out_indptr, edge_ids, side="right") - 1
+
+    def successors(self, node_id: int) -> np.ndarray:
+        """Returns the target node ids of all edges leaving the given node."""
+        return self.targets[
+            self.out_indptr[node_id] : self.out_indptr[node_id + 1]
+        ]
+
+    def predecessors(self, node_id: int) -> np.ndarray:
+        """Returns the source node ids of all edges entering the given node."""
+        return self.sources_of(self.in_edge_ids_of(node_id))
+
+
+class CompactSymbolGraph:
+    """
+    An integer-id representation of the symbol graph.
+    Every node is stored once in a string table, which holds symbol URIs
+    and file paths, and edges are stored as one `EdgeTable` per label.
+    `Symbol` and `SymbolReference` objects are only materialized on query.
+    """
+
+    def __init__(
+        self,
+        node_names: StringTable,
+        node_kinds: np.ndarray,
+        edge_tables: Dict[SymbolGraphEdgeLabel, EdgeTable],
+        active_mask: Optional[np.ndarray] = None,
+    ) -> None:
+        self.node_names = node_names
+        self.node_kinds = node_kinds
+        self.edge_tables = edge_tables
+        # Nodes are filtered by masking, so the arrays are never rebuilt
+        self.active_mask = (
+            active_mask
+            if active_mask is not None
+            else np.ones(len(node_names), dtype=bool)
+        )
+
+    def __len__(self) -> int:
+        return int(self.active_mask.sum())
+
+    @classmethod
+    def from_graph(cls, graph: nx.MultiDiGraph) -> "CompactSymbolGraph":
+        """Builds a `CompactSymbolGraph` from a networkx symbol graph."""
+        node_names: List[str] = []
+        node_kinds: List[int] = []
+        for node, data in graph.nodes(data=True):
+            node_names.append(str(node))
+            if data.get("label") == "symbol":
+                node_kinds.append(SymbolGraphNodeKind.SYMBOL)
+            elif isinstance(node, Symbol):
+                node_kinds.append(SymbolGraphNodeKind.EXTERNAL_SYMBOL)
+            else:
+                node_kinds.append(SymbolGraphNodeKind.FILE)
+        node_ids = {name: i for i, name in enumerate(node_names)}
+
+        columns: Dict[SymbolGraphEdgeLabel, Tuple[List[int], ...]] = {
+            label: ([], [], [], [], [], []) for label in SymbolGraphEdgeLabel
+        }
+        for position, (source, target, data) in enumerate(
+            graph.edges(data=True)
+        ):
+            label = SymbolGraphEdgeLabel(data.get("label"))
+            for line_number, column_number, flags in cls._iter_edge_rows(
+                graph, label, source, target, data
+            ):
+                for column, value in zip(
+                    columns[label],
+                    (
+                        node_ids[str(source)],
+                        node_ids[str(target)],
+                        line_number,
+                        column_number,
+                        flags,
+                        position,
+                    ),
+                ):
+                    column.append(value)
+
+        edge_tables = {
+            label: EdgeTable.from_edges(len(node_names), *label_columns)
+            for label, label_columns in columns.items()
+        }
+        return cls(
+            StringTable.from_strings(node_names),
+            np.array(node_kinds, dtype=np.int8),
+            edge_tables,
+        )
+
+    def to_graph(self, aggregate_references: bool = False) -> nx.MultiDiGraph:
+        """
+        Converts the active part of the graph back into a networkx symbol graph.
+        Nodes and edges are inserted in their original order, so the result
+        iterates exactly like the graph this was built from.
+        With `aggregate_references`, references are gathered into one edge per
+        symbol and file, and a `FileReferenceTable` on each file node.
+        """
+        graph = LabelledMultiDiGraph()
+        active_ids = np.flatnonzero(self.active_mask)
+        nodes = {int(i): self.get_node(i) for i in active_ids}
+        for node_id, node in nodes.items():
+            if self.node_kinds[node_id] == SymbolGraphNodeKind.SYMBOL:
+                graph.add_node(node, label="symbol")
+            else:
+                graph.add_node(node)
+
+        edges: List[Tuple[int, SymbolGraphEdgeLabel, int, int]] = []
+        for label, table in self.edge_tables.items():
+            sources = table.sources_of(np.arange(len(table)))
+            is_active = (
+                self.active_mask[sources] & self.active_mask[table.targets]
+            )
+            for edge_id in np.flatnonzero(is_active):
+                edges.append(
+                    (
+                        int(table.positions[edge_id]),
+                        label,
+                        int(sources[edge_id]),
+                        int(edge_id),
+                    )
+                )
+        edges.sort(key=lambda edge: edge[0])
+        # File -> symbol -> (key of the aggregated edge, occurrences)
+        file_occurrences: Dict[
+            GraphNode, Dict[GraphNode, Tuple[Any, List[Tuple[int, int, int]]]]
+        ] = {}
+        for _, label, source_id, edge_id in edges:
+            table = self.edge_tables[label]
+            source, target = (
+                nodes[source_id],
+                nodes[int(table.targets[edge_id])],
+            )
+            if (
+                aggregate_references
+                and label == SymbolGraphEdgeLabel.REFERENCE
+            ):
+                symbol_occurrences = file_occurrences.setdefault(target, {})
+                if source not in symbol_occurrences:
+                    key = graph.add_edge(
+                        source, target, reference_count=0, label=label.value
+                    )
+                    symbol_occurrences[source] = (key, [])
+                symbol_occurrences[source][1].append(
+                    (
+                        int(table.line_numbers[edge_id]),
+                        int(table.column_numbers[edge_id]),
+                        int(table.flags[edge_id]),
+                    )
+                )
+                continue
+            _, _, data = self._materialize_edge(
+                label, table, source_id, edge_id
+            )
+            graph.add_edge(source, target, **data)
+
+        for relative_path, symbol_occurrences in file_occurrences.items():
+            reference_table = FileReferenceTable.from_occurrences(
+                (symbol, line_number, column_number, flags)  # type: ignore
+                for symbol, (_, occurrences) in symbol_occurrences.items()
+                for line_number, column_number, flags in occurrences
+            )
+            for symbol, (key, occurrences) in symbol_occurrences.items():
+                graph[symbol][relative_path][key]["reference_count"] = len(
+                    occurrences
+                )
+            graph.nodes[relative_path][
+                REFERENCE_TABLE_ATTRIBUTE
+            ] = reference_table
+        return graph
+
+    def save(self, directory: str) -> None:
+        """Saves the graph as a directory of flat arrays."""
+        arrays = self.node_names.to_arrays("node_names.")
+        arrays["node_kinds"] = self.node_kinds
+        arrays["active_mask"] = self.active_mask
+        for label, table in self.edge_tables.items():
+            arrays |= table.to_arrays(f"{label.value}.")
+        save_arrays(
+            directory,
+            COMPACT_GRAPH_FORMAT,
+            arrays,
+            node_count=len(self.node_names),
+            labels=[label.value for label in self.edge_tables],
+        )
+
+    @classmethod
+    def load(
+        cls, directory: str, mmap_mode: MmapMode = "r"
+    ) -> "CompactSymbolGraph":
+        """
+        Opens a graph saved with `save`. The arrays are memory-mapped
+        unless `mmap_mode` is None, in which case they are read into memory.
+
+        Raises:
+            ValueError: If the graph was saved with another format version
+        """
+        manifest = read_manifest(directory, COMPACT_GRAPH_FORMAT)
+        return cls(
+            StringTable.from_arrays(directory, "node_names.", mmap_mode),
+            load_array(directory, "node_kinds", mmap_mode),
+            {
+                SymbolGraphEdgeLabel(label): EdgeTable.from_arrays(
+                    directory, f"{label}.", mmap_mode
+                )
+                for label in manifest["labels"]
+            },
+            # The mask is written to when filtering, so it is copied
+            np.array(load_array(directory, "active_mask", mmap_mode)),
+        )
+
+    def get_node_id(self, node: GraphNode) -> Optional[int]:
+        """Returns the id of an active node, or None if it is absent."""
+        node_id = self.node_names.get_id(str(node))
+        if node_id is None or not self.active_mask[node_id]:
+            return None
+        return node_id
+
+    def get_node(self, node_id: int) -> GraphNode:
+        """Materializes the node with the given id."""
+        name = self.node_names[node_id]
+        if self.node_kinds[node_id] == SymbolGraphNodeKind.FILE:
+            return name
+        return parse_symbol(name)
+
+    def get_symbols(self) -> List[Symbol]:
+        """Returns all active symbols which are defined in the index."""
+        symbol_ids = np.flatnonzero(
+            (self.node_kinds == SymbolGraphNodeKind.SYMBOL) & self.active_mask
+        )
+        return [parse_symbol(self.node_names[i]) for i in symbol_ids]
+
+    def retain_symbols(self, symbols: Iterable[Symbol]) -> None:
+        """Deactivates all defined symbols which are not in `symbols`."""
+        retained = np.zeros(len(self.node_names), dtype=bool)
+        for symbol in symbols:
+            if (node_id := self.node_names.get_id(symbol.uri)) is not None:
+                retained[node_id] = True
+        self.active_mask &= (
+            self.node_kinds != SymbolGraphNodeKind.SYMBOL
+        ) | retained
+
+    def out_edges(
+        self, node: GraphNode, label: SymbolGraphEdgeLabel
+    ) -> Iterator[Tuple[GraphNode, GraphNode, EdgeData]]:
+        """Yields the `(source, target, data)` of out edges with `label`."""
+        node_id = self.get_node_id(node)
+        if node_id is None:
+            return
+        table = self.edge_tables[label]
+        edge_ids = table.out_edge_ids(node_id)
+        targets = table.targets[edge_ids]
+        for edge_id in edge_ids[self.active_mask[targets]]:
+            yield self._materialize_edge(label, table, node_id, edge_id)
+
+    def in_edges(
+        self, node: GraphNode, label: SymbolGraphEdgeLabel
+    ) -> Iterator[Tuple[GraphNode, GraphNode, EdgeData]]:
+        """Yields the `(source, target, data)` of in edges with `label`."""
+        node_id = self.get_node_id(node)
+        if node_id is None:
+            return
+        table = self.edge_tables[label]
+        edge_ids = table.in_edge_ids_of(node_id)
+        sources = table.sources_of(edge_ids)
+        is_active = self.active_mask[sources]
+        for source_id, edge_id in zip(sources[is_active], edge_ids[is_active]):
+            yield self._materialize_edge(label, table, source_id, edge_id)
+
+    def _materialize_edge(
+        self,
+        label: SymbolGraphEdgeLabel,
+        table: EdgeTable,
+        source_id: int,
+        edge_id: int,
+    ) -> Tuple[GraphNode, GraphNode, EdgeData]:
+        """Converts an edge into the form stored by the networkx graph."""
+        source = self.get_node(source_id)
+        target = self.get_node(table.targets[edge_id])
+        data: EdgeData = {"label": label.value}
+        if label == SymbolGraphEdgeLabel.REFERENCE:
+            data["symbol_reference"] = SymbolReference(
+                symbol=source,  # type: ignore
+                line_number=int(table.line_numbers[edge_id]),
+                column_number=int(table.column_numbers[edge_id]),
+                roles=decode_symbol_roles(int(table.flags[edge_id])),
+            )
+        elif label == SymbolGraphEdgeLabel.RELATIONSHIP:
+            data |= decode_relationship_flags(int(table.flags[edge_id]))
+        elif label in (
+            SymbolGraphEdgeLabel.CALLER,
+            SymbolGraphEdgeLabel.CALLEE,
+        ):
+            data["line_number"] = int(table.line_numbers[edge_id])
+            data["column_number"] = int(table.column_numbers[edge_id])
+            data["roles"] = decode_symbol_roles(int(table.flags[edge_id]))
+        return source, target, data
+
+    @classmethod
+    def _iter_edge_rows(
+        cls,
+        graph: nx.MultiDiGraph,
+        label: SymbolGraphEdgeLabel,
+        source: GraphNode,
+        target: GraphNode,
+        data: EdgeData,
+    ) -> Iterator[Tuple[int, int, int]]:
+        """
+        Yields the integer columns of a networkx edge. An aggregated reference edge
+        is expanded into one row per occurrence from the reference table of its file.
+        """
+        if (
+            label == SymbolGraphEdgeLabel.REFERENCE
+            and "symbol_reference" not in data
+        ):
+            reference_table = get_reference_table(graph, target)  # type: ignore
+            if reference_table is None:
+                return
+            rows = reference_table.get_rows(source)  # type: ignore
+            yield from zip(
+                reference_table.line_numbers[rows].tolist(),
+                reference_table.column_numbers[rows].tolist(),
+                reference_table.role_masks[rows].tolist(),
+            )
+        else:
+            yield cls._encode_edge_data(label, data)
+
+    @staticmethod
+    def _encode_edge_data(
+        label: SymbolGraphEdgeLabel, data: EdgeData
+    ) -> Tuple[int, int, int]:
+        """Encodes the data of a networkx edge into integer columns."""
+        if label == SymbolGraphEdgeLabel.REFERENCE:
+            reference: SymbolReference = data["symbol_reference"]
+            return (
+                reference.line_number,
+                reference.column_number,
+                encode_symbol_roles(reference.roles),
+            )
+        elif label == SymbolGraphEdgeLabel.RELATIONSHIP:
+            return 0, 0, encode_relationship_flags(data)
+        elif label in (
+            SymbolGraphEdgeLabel.CALLER,
+            SymbolGraphEdgeLabel.CALLEE,
+        ):
+            return (
+                data.get("line_number", 0),
+                data.get("column_number", 0),
+                encode_symbol_roles(data.get("roles")),
+            )
+        return 0, 0, 0
+
+
+def save_symbol_digraph(graph: nx.DiGraph, directory: str) -> None:
+    """
+    Saves a directed graph of symbols, such as a rankable subgraph,
+    as a string table of symbol URIs and a CSR adjacency array.
+    """
+    nodes = list(graph.nodes())
+    node_ids = {node: i for i, node in enumerate(nodes)}
+    # `edges` groups the edges by source, in node order
+    sources = np.fromiter(
+        (node_ids[source] for source, _ in graph.edges()), dtype=np.int32
+    )
+    targets = np.fromiter(
+        (node_ids[target] for _, target in graph.edges()), dtype=np.int32
+    )
+    arrays = StringTable.from_strings([node.uri for node in nodes]).to_arrays(
+        "node_names."
+    )
+    arrays["indptr"] = build_indptr(sources, len(nodes))
+    arrays["targets"] = targets
+    save_arrays(
+        directory, SYMBOL_DIGRAPH_FORMAT, arrays, node_count=len(nodes)
+    )
+
+
+def load_symbol_digraph(
+    directory: str, mmap_mode: MmapMode = "r"
+) -> nx.DiGraph:
+    """
+    Loads a graph saved with `save_symbol_digraph`.
+
+    Raises:
+        ValueError: If the graph was saved with another format version
+    """
+    read_manifest(directory, SYMBOL_DIGRAPH_FORMAT)
+    node_names = StringTable.from_arrays(directory, "node_names.", mmap_mode)
+    indptr = load_array(directory, "indptr", mmap_mode)
+    targets = load_array(directory, "targets", mmap_mode)
+
+    nodes = [parse_symbol(name) for name in node_names]
+    graph = nx.DiGraph()
+    graph.add_nodes_from(nodes)
+    sources = np.repeat(np.arange(len(nodes)), np.diff(indptr))
+    graph.add_edges_from(
+        (nodes[source], nodes[target])
+        for source, target in zip(sources.tolist(), targets.tolist())
+    )
+    return graph
@@ -0,0 +1,168 @@
+"""
+Contains the `LabelledMultiDiGraph` class, a networkx `MultiDiGraph` which
+indexes its edges by label.
+"""
+
+from typing import Any, Dict, Hashable, Iterable, Iterator, Tuple
+
+import networkx as nx
+
+EdgeKey = Tuple[Any, Any]
+# label -> node -> ordered set of (neighbour, edge key)
+LabelIndex = Dict[Any, Dict[Any, Dict[EdgeKey, None]]]
+
+
+class LabelledMultiDiGraph(nx.MultiDiGraph):
+    """
+    A `MultiDiGraph` which partitions the adjacency of every node by the
+    "label" attribute of its edges. Queries for the edges of one label only
+    touch edges of that label, instead of filtering every edge of the node.
+
+    The index is kept up to date by the mutators of the graph, so the label
+    of an edge must not be changed through its data dictionary.
+    """
+
+    def __init__(
+        self,
+        incoming_graph_data: Any = None,
+        multigraph_input: Any = None,
+        **attr: Any,
+    ) -> None:
+        # The index must exist before `incoming_graph_data` adds any edges
+        self._out_label_index: LabelIndex = {}
+        self._in_label_index: LabelIndex = {}
+        super().__init__(incoming_graph_data, multigraph_input, **attr)
+
+    def out_edges_with_label(
+        self, node: Hashable, label: Any
+    ) -> Iterator[Tuple[Any, Any, Dict[str, Any]]]:
+        """Yields the `(source, target, data)` of out edges with `label`."""
+        if node not in self._succ:
+            raise nx.NetworkXError(f"The node {node} is not in the graph.")
+        edges = self._out_label_index.get(label, {}).get(node, {})
+        for target, key in list(edges):
+            yield node, target, self._succ[node][target][key]
+
+    def in_edges_with_label(
+        self, node: Hashable, label: Any
+    ) -> Iterator[Tuple[Any, Any, Dict[str, Any]]]:
+        """Yields the `(source, target, data)` of in edges with `label`."""
+        if node not in self._pred:
+            raise nx.NetworkXError(f"The node {node} is not in the graph.")
+        edges = self._in_label_index.get(label, {}).get(node, {})
+        for source, key in list(edges):
+            yield source, node, self._succ[source][node][key]
+
+    def add_edge(
+        self, u_for_edge: Any, v_for_edge: Any, key: Any = None, **attr: Any
+    ) -> Any:
+        if key is not None and self.has_edge(u_for_edge, v_for_edge, key):
+            self._unindex_edge(u_for_edge, v_for_edge, key)
+        key = super().add_edge(u_for_edge, v_for_edge, key, **attr)
+        self._index_edge(u_for_edge, v_for_edge, key)
+        return key
+
+    def add_edges_from(self, ebunch_to_add: Iterable, **attr: Any) -> list:
+        # `MultiGraph.add_edges_from` sets edge data after `add_edge`,
+        # so edges are added with their data here to index their labels
+        keys = []
+        for edge in ebunch_to_add:
+            if len(edge) == 4:
+                u, v, key, data = edge
+            elif len(edge) == 3:
+                u, v, data = edge
+                key = None
+                if not isinstance(data, dict):
+                    key, data = data, {}
+            elif len(edge) == 2:
+                (u, v), key, data = edge, None, {}
+            else:
+                raise nx.NetworkXError(
+                    f"Edge tuple {edge} must be a 2-tuple, 3-tuple or 4-tuple."
+                )
+            keys.append(self.add_edge(u, v, key, **{**attr, **data}))
+        return keys
+
+    def remove_edge(self, u: Any, v: Any, key: Any = None) -> None:
+        if key is None and self.has_edge(u, v):
+            # networkx removes the most recently added edge
+            key = next(reversed(self._succ[u][v]))
+        if self.has_edge(u, v, key):
+            self._unindex_edge(u, v, key)
+        super().remove_edge(u, v, key)
+
+    def remove_node(self, n: Any) -> None:
+        if n in self._succ:
+            for target, keys in self._succ[n].items():
+                for key in keys:
+                    self._unindex_edge(n, target, key)
+            for source, keys in list(self._pred[n].items()):
+                if source != n:
+                    for key in keys:
+                        self._unindex_edge(source, n, key)
+        super().remove_node(n)
+
+    def remove_nodes_from(self, nodes: Iterable) -> None:
+        for node in list(nodes):
+            if node in self._succ:
+                self.remove_node(node)
+
+    def clear(self) -> None:
+        self._out_label_index.clear()
+        self._in_label_index.clear()
+        super().clear()
+
+    def clear_edges(self) -> None:
+        self._out_label_index.clear()
+        self._in_label_index.clear()
+        super().clear_edges()
+
+    def _index_edge(self, u: Any, v: Any, key: Any) -> None:
+        label = self._succ[u][v][key].get("label")
+        self._out_label_index.setdefault(label, {}).setdefault(u, {})[
+            (v, key)
+        ] = None
+        self._in_label_index.setdefault(label, {}).setdefault(v, {})[
+            (u, key)
+        ] = None
+
+    def _unindex_edge(self, u: Any, v: Any, key: Any) -> None:
+        label = self._succ[u][v][key].get("label")
+        for index, node, entry in (
+            (self._out_label_index, u, (v, key)),
+            (self._in_label_index, v, (u, key)),
+        ):
+            edges = index[label][node]
+            del edges[entry]
+            if not edges:
+                del index[label][node]
+
+
+def out_edges_with_label(
+    graph: nx.MultiDiGraph, node: Hashable, label: Any
+) -> Iterator[Tuple[Any, Any, Dict[str, Any]]]:
+    """
+    Yields the out edges of a node with the given label, using the label index
+    of a `LabelledMultiDiGraph` and filtering the edges of any other graph.
+    """
+    if isinstance(graph, LabelledMultiDiGraph):
+        yield from graph.out_edges_with_label(node, label)
+    else:
+        for source, target, data in graph.out_edges(node, data=True):
+            if data.get("label") == label:
+                yield source, target, data
+
+
+def in_edges_with_label(
+    graph: nx.MultiDiGraph, node: Hashable, label: Any
+) -> Iterator[Tuple[Any, Any, Dict[str, Any]]]:
+    """
+    Yields the in edges of a node with the given label, using the label index
+    of a `LabelledMultiDiGraph` and filtering the edges of any other graph.
+    """
+    if isinstance(graph, LabelledMultiDiGraph):
+        yield from graph.in_edges_with_label(node, label)
+    else:
+        for source, target, data in graph.in_edges(node, data=True):
+            if data.get("label") == label:
+                yield source, target, data
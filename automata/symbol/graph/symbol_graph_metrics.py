@@ -0,0 +1,266 @@
+"""
+Contains the `SymbolGraphMetrics` class, which holds precomputed structural
+metrics of the symbols of a rankable subgraph, along with its on-disk format.
+"""
+
+import logging
+from typing import Dict, List, Tuple, Union
+
+import networkx as nx
+import numpy as np
+
+from automata.core.saved_arrays import (
+    SavedArrayFormat,
+    StringTable,
+    load_array,
+    read_manifest,
+    save_arrays,
+)
+from automata.symbol.graph.symbol_graph_compact import CompactSymbolGraph
+from automata.symbol.graph.symbol_graph_labelled import out_edges_with_label
+from automata.symbol.graph.symbol_graph_types import SymbolGraphEdgeLabel
+from automata.symbol.graph.symbol_rank_transition import (
+    TransitionMatrix,
+    get_graph_fingerprint,
+)
+from automata.symbol.symbol_base import Symbol
+from automata.symbol.symbol_parser import parse_symbol
+
+logger = logging.getLogger(__name__)
+
+SYMBOL_GRAPH_METRICS_FORMAT = SavedArrayFormat("symbol_graph_metrics", 3)
+
+
+def compute_global_ranks(
+    graph: nx.DiGraph,
+    alpha: float,
+    max_iterations: int,
+    tolerance: float,
+    weight_key: str = "weight",
+) -> np.ndarray:
+    """
+    Computes the SymbolRank of every node of `graph` without personalization,
+    in node order, iterating the same `TransitionMatrix` as `SymbolRank`.
+
+    Raises:
+        NetworkXError: If the power iteration does not converge
+    """
+    node_count = graph.number_of_nodes()
+    if node_count == 0:
+        return np.zeros(0)
+    transition_matrix = TransitionMatrix(graph, weight_key)
+    # Dangling nodes spread their rank uniformly, as does teleportation
+    uniform = np.full(node_count, 1.0 / node_count)
+    ranks = uniform
+    for _ in range(max_iterations):
+        last_ranks = ranks
+        ranks = transition_matrix.iterate(last_ranks, alpha, uniform, uniform)
+        if np.abs(ranks - last_ranks).sum() < node_count * tolerance:
+            return ranks
+    raise nx.NetworkXError(
+        "SymbolRank: power iteration failed to converge in %d iterations."
+        % max_iterations
+    )
+
+
+def _count_references(
+    graph: Union[nx.MultiDiGraph, CompactSymbolGraph], symbols: List[Symbol]
+) -> np.ndarray:
+    """Counts the occurrences of each symbol which are references to it."""
+    if isinstance(graph, CompactSymbolGraph):
+        counts_by_id = np.diff(
+            graph.edge_tables[SymbolGraphEdgeLabel.REFERENCE].out_indptr
+        )
+        node_ids = [graph.get_node_id(symbol) for symbol in symbols]
+        return np.array(
+            [
+                0 if node_id is None else counts_by_id[node_id]
+                for node_id in node_ids
+            ],
+            dtype=np.int64,
+        )
+    return np.array(
+        [
+            sum(
+                data.get("reference_count", 1)
+                for _, __, data in out_edges_with_label(
+                    graph, symbol, "reference"
+                )
+            )
+            if symbol in graph
+            else 0
+            for symbol in symbols
+        ],
+        dtype=np.int64,
+    )
+
+
+class SymbolGraphMetrics:
+    """
+    Structural metrics of the symbols of a rankable subgraph, held as arrays
+    aligned with `symbols`: the global SymbolRank of each symbol, its in and
+    out degree in the subgraph, and the number of references to it in the graph.
+
+    Symbols are kept in the order of their global rank, so the top symbols
+    are read without ranking the subgraph again. The metrics keep the fingerprint
+    of the subgraph they were computed on, so that they do not describe another graph.
+    """
+
+    COLUMNS = ("ranks", "in_degrees", "out_degrees", "reference_counts")
+
+    def __init__(
+        self,
+        symbols: List[Symbol],
+        ranks: np.ndarray,
+        in_degrees: np.ndarray,
+        out_degrees: np.ndarray,
+        reference_counts: np.ndarray,
+        alpha: float,
+        max_iterations: int,
+        tolerance: float,
+        weight_key: str,
+        fingerprint: str,
+    ) -> None:
+        self.symbols = symbols
+        self.ranks = ranks
+        self.in_degrees = in_degrees
+        self.out_degrees = out_degrees
+        self.reference_counts = reference_counts
+        # The configuration which the ranks were computed with
+        self.alpha = alpha
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        self.weight_key = weight_key
+        # The digest of the subgraph, see `get_graph_fingerprint`
+        self.fingerprint = fingerprint
+        self._symbol_ids = {symbol: i for i, symbol in enumerate(symbols)}
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @classmethod
+    def compute(
+        cls,
+        rankable_subgraph: nx.DiGraph,
+        graph: Union[nx.MultiDiGraph, CompactSymbolGraph],
+        alpha: float,
+        max_iterations: int,
+        tolerance: float,
+        weight_key: str = "weight",
+    ) -> "SymbolGraphMetrics":
+        """Computes the metrics of the symbols of `rankable_subgraph`, a subgraph of `graph`."""
+        logger.info("Computing the structural metrics of the symbol graph...")
+        nodes: List[Symbol] = list(rankable_subgraph.nodes())
+        ranks = compute_global_ranks(
+            rankable_subgraph, alpha, max_iterations, tolerance, weight_key
+        )
+        # Stable, so that ties keep the order of the nodes as in `SymbolRank`
+        order = np.argsort(-ranks, kind="stable")
+        symbols = [nodes[i] for i in order.tolist()]
+        return cls(
+            symbols,
+            ranks[order],
+            np.array(
+                [rankable_subgraph.in_degree(symbol) for symbol in symbols],
+                dtype=np.int64,
+            ),
+            np.array(
+                [rankable_subgraph.out_degree(symbol) for symbol in symbols],
+                dtype=np.int64,
+            ),
+            _count_references(graph, symbols),
+            alpha,
+            max_iterations,
+            tolerance,
+            weight_key,
+            get_graph_fingerprint(rankable_subgraph),
+        )
+
+    def matches(
+        self,
+        alpha: float,
+        max_iterations: int,
+        tolerance: float,
+        weight_key: str = "weight",
+    ) -> bool:
+        """Checks if the ranks were computed with the given configuration."""
+        return (
+            self.alpha == alpha
+            and self.max_iterations == max_iterations
+            and self.tolerance == tolerance
+            and self.weight_key == weight_key
+        )
+
+    def matches_graph(self, graph: nx.DiGraph) -> bool:
+        """Checks if the metrics were computed on a graph with the nodes and edges of `graph`."""
+        return len(
+            self
+        ) == graph.number_of_nodes() and self.fingerprint == get_graph_fingerprint(
+            graph
+        )
+
+    def get_ordered_ranks(self) -> List[Tuple[Symbol, float]]:
+        """Returns every symbol with its global rank, from highest to lowest."""
+        return list(zip(self.symbols, self.ranks.tolist()))
+
+    def get_top_symbols(self, n: int) -> List[Tuple[Symbol, float]]:
+        """Returns the `n` symbols with the highest global rank."""
+        return list(zip(self.symbols[:n], self.ranks[:n].tolist()))
+
+    def get_symbol_metrics(self, symbol: Symbol) -> Dict[str, float]:
+        """
+        Returns the metrics of a symbol by name.
+
+        Raises:
+            KeyError: If the symbol is not in the rankable subgraph
+        """
+        symbol_id = self._symbol_ids[symbol]
+        return {
+            column[:-1]: getattr(self, column)[symbol_id].item()
+            for column in self.COLUMNS
+        }
+
+    def save(self, directory: str) -> None:
+        """Saves the metrics as a directory of flat arrays."""
+        arrays = StringTable.from_strings(
+            [symbol.uri for symbol in self.symbols]
+        ).to_arrays("symbols.")
+        for column in self.COLUMNS:
+            arrays[column] = getattr(self, column)
+        save_arrays(
+            directory,
+            SYMBOL_GRAPH_METRICS_FORMAT,
+            arrays,
+            symbol_count=len(self.symbols),
+            alpha=self.alpha,
+            max_iterations=self.max_iterations,
+            tolerance=self.tolerance,
+            weight_key=self.weight_key,
+            fingerprint=self.fingerprint,
+        )
+
+    @classmethod
+    def load(cls, directory: str) -> "SymbolGraphMetrics":
+        """
+        Loads metrics saved with `save`.
+
+        Raises:
+            ValueError: If the metrics were saved with another format version
+        """
+        manifest = read_manifest(directory, SYMBOL_GRAPH_METRICS_FORMAT)
+        symbol_names = StringTable.from_arrays(directory, "symbols.", None)
+        ranks, in_degrees, out_degrees, reference_counts = (
+            load_array(directory, column, None) for column in cls.COLUMNS
+        )
+        return cls(
+            [parse_symbol(name) for name in symbol_names],
+            ranks,
+            in_degrees,
+            out_degrees,
+            reference_counts,
+            manifest["alpha"],
+            manifest["max_iterations"],
+            manifest["tolerance"],
+            manifest["weight_key"],
+            manifest["fingerprint"],
+        )
@@ -0,0 +1,281 @@
+"""
+Contains the `AdjacencyIndex` class, which holds the edges of the symbol graph
+as integer arrays and runs batched breadth-first traversals over them.
+"""
+
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+
+from automata.symbol.graph.symbol_graph_compact import (
+    CompactSymbolGraph,
+    GraphNode,
+    build_indptr,
+)
+from automata.symbol.graph.symbol_graph_types import SymbolGraphEdgeLabel
+
+# The labels of edges between two symbols, followed by transitive dependency queries
+DEPENDENCY_LABELS = (
+    SymbolGraphEdgeLabel.CALLER,
+    SymbolGraphEdgeLabel.RELATIONSHIP,
+)
+
+# The out and in adjacency of one label, each as a CSR `(indptr, indices)` pair
+LabelAdjacency = Tuple[
+    Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]
+]
+ClosureKey = Tuple[FrozenSet[SymbolGraphEdgeLabel], bool]
+
+
+def _build_label_adjacency(
+    sources: np.ndarray, targets: np.ndarray, node_count: int
+) -> LabelAdjacency:
+    """Builds the out and in CSR adjacency of one label, collapsing parallel edges."""
+    pairs = np.unique(
+        sources.astype(np.int64) * node_count + targets.astype(np.int64)
+    )
+    unique_sources = pairs // node_count
+    unique_targets = pairs % node_count
+    # `np.unique` sorts the pairs by source, then target
+    out_adjacency = (
+        build_indptr(unique_sources, node_count),
+        unique_targets.astype(np.int32),
+    )
+    order = np.argsort(unique_targets, kind="stable")
+    in_adjacency = (
+        build_indptr(unique_targets[order], node_count),
+        unique_sources[order].astype(np.int32),
+    )
+    return out_adjacency, in_adjacency
+
+
+def _gather_neighbours(
+    indptr: np.ndarray, indices: np.ndarray, node_ids: np.ndarray
+) -> np.ndarray:
+    """Returns the concatenated neighbours of all of the given nodes."""
+    starts = indptr[node_ids]
+    counts = indptr[node_ids + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=indices.dtype)
+    # The position of every neighbour, as an offset from the start of its node
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return indices[np.repeat(starts, counts) + offsets]
+
+
+class AdjacencyIndex:
+    """
+    Holds the edges of each label of the symbol graph in CSR form, in both
+    directions, with parallel edges between two nodes collapsed into one.
+    Traversals only touch integer arrays, so every hop expands the whole
+    frontier at once, and only the nodes reached are mapped back to graph nodes.
+
+    The index is a snapshot of the graph, and must be rebuilt when it changes.
+    Transitive closures are memoized on the index, so they are dropped with it.
+    """
+
+    def __init__(
+        self,
+        node_count: int,
+        adjacency: Dict[SymbolGraphEdgeLabel, LabelAdjacency],
+        get_node_id: Callable[[GraphNode], Optional[int]],
+        get_node: Callable[[int], GraphNode],
+        active_mask: Optional[np.ndarray] = None,
+    ) -> None:
+        self.node_count = node_count
+        self.adjacency = adjacency
+        self.get_node_id = get_node_id
+        self.get_node = get_node
+        # Inactive nodes are never reached, see `CompactSymbolGraph.retain_symbols`
+        self.active_mask = (
+            active_mask
+            if active_mask is not None
+            else np.ones(node_count, dtype=bool)
+        )
+        self._closures: Dict[ClosureKey, Dict[int, np.ndarray]] = {}
+
+    @classmethod
+    def from_graph(cls, graph: nx.MultiDiGraph) -> "AdjacencyIndex":
+        """Builds an `AdjacencyIndex` with a single pass over the edges of a networkx graph."""
+        nodes: List[GraphNode] = list(graph.nodes)
+        node_ids = {node: node_id for node_id, node in enumerate(nodes)}
+        edges: Dict[SymbolGraphEdgeLabel, Tuple[List[int], List[int]]] = {
+            label: ([], []) for label in SymbolGraphEdgeLabel
+        }
+        for source, target, label in graph.edges(data="label"):
+            try:
+                label_sources, label_targets = edges[
+                    SymbolGraphEdgeLabel(label)
+                ]
+            except ValueError:
+                continue
+            label_sources.append(node_ids[source])
+            label_targets.append(node_ids[target])
+        adjacency = {
+            label: _build_label_adjacency(
+                np.array(label_sources, dtype=np.int64),
+                np.array(label_targets, dtype=np.int64),
+                len(nodes),
+            )
+            for label, (label_sources, label_targets) in edges.items()
+        }
+        return cls(len(nodes), adjacency, node_ids.get, nodes.__getitem__)
+
+    @classmethod
+    def from_compact_graph(cls, graph: CompactSymbolGraph) -> "AdjacencyIndex":
+        """Builds an `AdjacencyIndex` from the edge tables of a `CompactSymbolGraph`."""
+        node_count = len(graph.node_names)
+        adjacency = {
+            label: _build_label_adjacency(
+                np.repeat(
+                    np.arange(node_count, dtype=np.int64),
+                    np.diff(table.out_indptr),
+                ),
+                np.asarray(table.targets),
+                node_count,
+            )
+            for label, table in graph.edge_tables.items()
+        }
+        return cls(
+            node_count,
+            adjacency,
+            graph.get_node_id,
+            graph.get_node,
+            graph.active_mask.copy(),
+        )
+
+    def traverse(
+        self,
+        sources: Iterable[GraphNode],
+        max_hops: Optional[int] = None,
+        labels: Optional[Iterable[SymbolGraphEdgeLabel]] = None,
+        max_nodes: Optional[int] = None,
+        reverse: bool = False,
+    ) -> Dict[GraphNode, int]:
+        """
+        Runs a breadth-first search from all of `sources` at once, following
+        edges with the given labels, or all edges if `labels` is None.
+        Returns the nodes reached, mapped to their distance from the nearest
+        source, in the order they were reached. Sources not in the graph are ignored.
+
+        The search stops after `max_hops` hops, or once `max_nodes` nodes other than
+        the sources were reached, in which case the nodes with the lowest ids are kept
+        from the last hop. With `reverse`, edges are followed from target to source.
+        """
+        source_ids = self._get_node_ids(sources)
+        node_ids, hops = self._traverse_ids(
+            source_ids,
+            self._get_adjacency(labels, reverse),
+            max_hops,
+            max_nodes,
+        )
+        return {
+            self.get_node(node_id): hop
+            for node_id, hop in zip(node_ids.tolist(), hops.tolist())
+        }
+
+    def transitive_closure(
+        self,
+        node: GraphNode,
+        labels: Optional[Iterable[SymbolGraphEdgeLabel]] = None,
+        reverse: bool = False,
+    ) -> List[GraphNode]:
+        """
+        Returns all nodes reachable from `node` through edges with the given labels,
+        excluding the node itself. Closures are memoized per node, and a search which
+        reaches a node with a memoized closure reuses it rather than expanding it again.
+        """
+        node_id = self.get_node_id(node)
+        if node_id is None or not self.active_mask[node_id]:
+            return []
+        label_set = frozenset(labels or SymbolGraphEdgeLabel)
+        closures = self._closures.setdefault((label_set, reverse), {})
+        if node_id not in closures:
+            closures[node_id] = self._compute_closure(
+                node_id, self._get_adjacency(label_set, reverse), closures
+            )
+        return [self.get_node(i) for i in closures[node_id].tolist()]
+
+    def _compute_closure(
+        self,
+        node_id: int,
+        adjacency: List[Tuple[np.ndarray, np.ndarray]],
+        closures: Dict[int, np.ndarray],
+    ) -> np.ndarray:
+        has_closure = np.zeros(self.node_count, dtype=bool)
+        memoized_ids = np.fromiter(
+            closures, dtype=np.int64, count=len(closures)
+        )
+        has_closure[memoized_ids] = True
+        reached_ids, _ = self._traverse_ids(
+            np.array([node_id]), adjacency, stop_mask=has_closure
+        )
+        reached = [reached_ids[1:]] + [
+            closures[reached_id]
+            for reached_id in reached_ids[has_closure[reached_ids]].tolist()
+        ]
+        closure = np.unique(np.concatenate(reached))
+        return closure[closure != node_id]
+
+    def _traverse_ids(
+        self,
+        source_ids: np.ndarray,
+        adjacency: List[Tuple[np.ndarray, np.ndarray]],
+        max_hops: Optional[int] = None,
+        max_nodes: Optional[int] = None,
+        stop_mask: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Runs a multi-source breadth-first search over node ids.
+        Nodes in `stop_mask` are reached, but their edges are not followed.
+        Returns the ids of the reached nodes and their hop counts.
+        """
+        visited = ~self.active_mask
+        frontier = np.unique(source_ids)
+        visited[frontier] = True
+        reached, hops = [frontier], [np.zeros(len(frontier), dtype=np.int32)]
+        budget = max_nodes
+        hop = 0
+        while len(frontier) and (max_hops is None or hop < max_hops):
+            if budget is not None and budget <= 0:
+                break
+            hop += 1
+            if stop_mask is not None:
+                frontier = frontier[~stop_mask[frontier]]
+            neighbours = np.unique(
+                np.concatenate(
+                    [
+                        _gather_neighbours(indptr, indices, frontier)
+                        for indptr, indices in adjacency
+                    ]
+                    or [np.empty(0, dtype=np.int32)]
+                )
+            )
+            frontier = neighbours[~visited[neighbours]]
+            if budget is not None:
+                frontier = frontier[:budget]
+                budget -= len(frontier)
+            visited[frontier] = True
+            reached.append(frontier)
+            hops.append(np.full(len(frontier), hop, dtype=np.int32))
+        return np.concatenate(reached), np.concatenate(hops)
+
+    def _get_adjacency(
+        self,
+        labels: Optional[Iterable[SymbolGraphEdgeLabel]],
+        reverse: bool,
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        return [
+            self.adjacency[label][1 if reverse else 0]
+            for label in (labels or SymbolGraphEdgeLabel)
+            if label in self.adjacency
+        ]
+
+    def _get_node_ids(self, nodes: Iterable[GraphNode]) -> np.ndarray:
+        node_ids = []
+        for node in nodes:
+            node_id = self.get_node_id(node)
+            if node_id is not None and self.active_mask[node_id]:
+                node_ids.append(node_id)
+        return np.array(node_ids, dtype=np.int64)
@@ -1,6 +1,24 @@
-from enum import Enum
+from enum import Enum, IntEnum
 
 
 class SymbolGraphType(Enum):
     DYNAMIC = "dynamic"
     STATIC = "static"
+
+
+class SymbolGraphEdgeLabel(Enum):
+    """The labels which are attached to edges of the symbol graph."""
+
+    CONTAINS = "contains"
+    REFERENCE = "reference"
+    RELATIONSHIP = "relationship"
+    CALLER = "caller"
+    CALLEE = "callee"
+
+
+class SymbolGraphNodeKind(IntEnum):
+    """The kinds of nodes which are held in a compact symbol graph."""
+
+    FILE = 0
+    SYMBOL = 1  # A symbol which is defined in the index
+    EXTERNAL_SYMBOL = 2  # A symbol which is only referenced by the index
@@ -1,14 +1,44 @@
+import ast
 import logging
+from bisect import bisect_left
+from collections import defaultdict
 from concurrent.futures import ProcessPoolExecutor
-from functools import partial
 from time import time
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import networkx as nx
 
 from automata.config import MAX_WORKERS
 from automata.core import fetch_bounding_box
+from automata.core.ast_handlers import BoundingBox
 from automata.singletons.py_module_loader import py_module_loader
+from automata.symbol.graph.bounding_box_cache import (
+    BoundingBoxCache,
+    hash_module_file,
+)
+from automata.symbol.graph.symbol_graph_compact import (
+    CompactSymbolGraph,
+    GraphNode,
+)
+from automata.symbol.graph.symbol_graph_labelled import (
+    in_edges_with_label,
+    out_edges_with_label,
+)
+from automata.symbol.graph.symbol_graph_types import SymbolGraphEdgeLabel
+from automata.symbol.graph.symbol_references import (
+    FileReferenceTable,
+    get_reference_table,
+)
 from automata.symbol.symbol_base import Symbol, SymbolReference
 from automata.symbol.symbol_utils import (
     convert_to_ast_object,
@@ -18,36 +48,61 @@ from automata.symbol.symbol_utils import (
 logger = logging.getLogger(__name__)
 
 
-def process_symbol_bounds(
-    loader_args: Tuple[str, str], symbol: Symbol
-) -> Optional[Tuple[Symbol, Any]]:
-    """Uses AST to compute the bounding box of a `Symbol`."""
-    if not py_module_loader._dotpath_map:
-        py_module_loader.initialize(*loader_args)
+def process_module_bounds(
+    module_fpath: str, symbols: List[Symbol]
+) -> Dict[Symbol, Optional[BoundingBox]]:
+    """
+    Uses AST to compute the bounding boxes of the `Symbol`s of one module.
+    The module is parsed once, rather than once per symbol.
+    """
     try:
-        ast_object = convert_to_ast_object(symbol)
-        return symbol, fetch_bounding_box(ast_object)
+        with open(module_fpath) as f:
+            module = ast.parse(f.read())
     except Exception as e:
-        logger.error(f"Error computing bounding box for {symbol.uri}: {e}")
-        return None
+        logger.error(f"Failed to load module '{module_fpath}' due to: {e}.")
+        return {symbol: None for symbol in symbols}
+
+    bounding_boxes: Dict[Symbol, Optional[BoundingBox]] = {}
+    for symbol in symbols:
+        try:
+            ast_object = convert_to_ast_object(symbol, module)
+            bounding_boxes[symbol] = fetch_bounding_box(ast_object)
+        except Exception as e:
+            logger.error(f"Error computing bounding box for {symbol.uri}: {e}")
+            bounding_boxes[symbol] = None
+    return bounding_boxes
 
 
 class SymbolGraphNavigator:
-    """Handles navigation within a symbol graph."""
+    """
+    Handles navigation within a symbol graph.
+    The graph may either be a networkx `MultiDiGraph` or a `CompactSymbolGraph`.
+    Graphs built by `GraphBuilder` are `LabelledMultiDiGraph`s, so queries only
+    touch the edges of the label they ask for.
+    """
 
-    def __init__(self, graph: nx.MultiDiGraph) -> None:
+    def __init__(
+        self, graph: Union[nx.MultiDiGraph, CompactSymbolGraph]
+    ) -> None:
         self._graph = graph
         # TODO - Find the correct way to define a bounding box
         self.bounding_box: Dict[
             Symbol, Any
         ] = {}  # Default to empty bounding boxes
+        # The references into each module, sorted by position, with their line numbers
+        self._module_reference_index: Dict[
+            str, Tuple[List[int], List[SymbolReference]]
+        ] = {}
 
     def get_sorted_supported_symbols(self) -> List[Symbol]:
-        unsorted_symbols = [
-            node
-            for node, data in self._graph.nodes(data=True)
-            if data.get("label") == "symbol"
-        ]
+        if isinstance(self._graph, CompactSymbolGraph):
+            unsorted_symbols = self._graph.get_symbols()
+        else:
+            unsorted_symbols = [
+                node
+                for node, data in self._graph.nodes(data=True)
+                if data.get("label") == "symbol"
+            ]
         return sorted(unsorted_symbols, key=lambda x: x.dotpath)
 
     def get_symbol_dependencies(self, symbol: Symbol) -> Set[Symbol]:
@@ -57,8 +112,9 @@ class SymbolGraphNavigator:
     def get_symbol_relationships(self, symbol: Symbol) -> Set[Symbol]:
         return {
             target
-            for _, target, data in self._graph.out_edges(symbol, data=True)
-            if data.get("label") == "relationship"
+            for _, target, _ in self._out_edges(
+                symbol, SymbolGraphEdgeLabel.RELATIONSHIP
+            )
         }
 
     def get_references_to_symbol(
@@ -67,19 +123,20 @@ class SymbolGraphNavigator:
         """
         Gets all references to a `Symbol`, calculated by finding out edges
         with the label "reference" and the target node being the symbol.
+        Aggregated edges are expanded from the reference table of their file.
         """
-        search_results = [
-            (file_path, data.get("symbol_reference"))
-            for _, file_path, data in self._graph.out_edges(symbol, data=True)
-            if data.get("label") == "reference"
-        ]
         result_dict: Dict[str, List[SymbolReference]] = {}
-
-        for file_path, symbol_reference in search_results:
-            if file_path in result_dict:
-                result_dict[file_path].append(symbol_reference)
+        for _, file_path, data in self._out_edges(
+            symbol, SymbolGraphEdgeLabel.REFERENCE
+        ):
+            if "symbol_reference" in data:
+                references = [data["symbol_reference"]]
             else:
-                result_dict[file_path] = [symbol_reference]
+                reference_table = self._get_reference_table(file_path)
+                if reference_table is None:
+                    continue
+                references = reference_table.get_references(symbol)
+            result_dict.setdefault(file_path, []).extend(references)
 
         return result_dict
 
@@ -97,10 +154,9 @@ class SymbolGraphNavigator:
                 column_number=data.get("column_number"),
                 roles=data.get("roles"),
             ): callee
-            for callee, caller, data in self._graph.out_edges(
-                symbol, data=True
+            for callee, caller, data in self._out_edges(
+                symbol, SymbolGraphEdgeLabel.CALLEE
             )
-            if data.get("label") == "callee"
         }
 
     def get_potential_symbol_callees(
@@ -117,17 +173,17 @@ class SymbolGraphNavigator:
                 column_number=data.get("column_number"),
                 roles=data.get("roles"),
             )
-            for caller, callee, data in self._graph.out_edges(
-                symbol, data=True
+            for caller, callee, data in self._out_edges(
+                symbol, SymbolGraphEdgeLabel.CALLER
             )
-            if data.get("label") == "caller"
         }
 
     def _get_symbol_containing_file(self, symbol: Symbol) -> str:
         parent_file_list = [
             source
-            for source, _, data in self._graph.in_edges(symbol, data=True)
-            if data.get("label") == "contains"
+            for source, _, __ in self._in_edges(
+                symbol, SymbolGraphEdgeLabel.CONTAINS
+            )
         ]
         assert (
             len(parent_file_list) == 1
@@ -146,9 +202,10 @@ class SymbolGraphNavigator:
             `self._pre_compute_rankable_bounding_boxes()`
             This is recommended for scenarios where this function is called
             across the entire
+            References are looked up in a per-module index sorted by position.
         """
         # bounding boxes are cached
-        if len(self.bounding_box) > 0:
+        if symbol in self.bounding_box:
             bounding_box = self.bounding_box[symbol]
         else:
             ast_object = convert_to_ast_object(symbol)
@@ -165,31 +222,103 @@ class SymbolGraphNavigator:
         )
 
         file_name = self._get_symbol_containing_file(symbol)
-        references_in_parent_module = self._get_references_to_module(file_name)
+        line_numbers, references = self._get_module_reference_index(file_name)
+        start = bisect_left(line_numbers, parent_symbol_start_line)
+        end = bisect_left(line_numbers, parent_symbol_end_line, lo=start)
         return [
             ref
-            for ref in references_in_parent_module
-            if parent_symbol_start_line
-            <= ref.line_number
-            < parent_symbol_end_line
-            and ref.column_number >= parent_symbol_start_col
+            for ref in references[start:end]
+            if ref.column_number >= parent_symbol_start_col
         ]
 
+    def _get_module_reference_index(
+        self, module_path: str
+    ) -> Tuple[List[int], List[SymbolReference]]:
+        """
+        Gets the references into a module sorted by line and column, along with
+        their line numbers, so that the references in a scope can be found by
+        binary search. The index is built on first use for each module.
+        """
+        if module_path not in self._module_reference_index:
+            references = sorted(
+                self._get_references_to_module(module_path),
+                key=lambda ref: (ref.line_number, ref.column_number),
+            )
+            self._module_reference_index[module_path] = (
+                [ref.line_number for ref in references],
+                references,
+            )
+        return self._module_reference_index[module_path]
+
+    def invalidate_module_references(
+        self, module_paths: Optional[Iterable[str]] = None
+    ) -> None:
+        """
+        Drops the cached reference index of the given modules, or of every module
+        when `module_paths` is None. This must be called when references change.
+        """
+        if module_paths is None:
+            self._module_reference_index.clear()
+            return
+        for module_path in module_paths:
+            self._module_reference_index.pop(module_path, None)
+
     def _get_references_to_module(
         self, module_path: str
     ) -> List[SymbolReference]:
         """Gets all references to a module in the graph."""
-        reference_edges_in_module = self._graph.in_edges(
-            module_path, data=True
-        )
+        graph = self._graph
+        reference_table = self._get_reference_table(module_path)
+        if reference_table is not None and isinstance(graph, nx.MultiDiGraph):
+            # Symbols removed from the graph keep their rows in the table
+            return [
+                reference
+                for symbol in reference_table.symbols
+                if symbol in graph
+                for reference in reference_table.get_references(symbol)
+            ]
         return [
-            data.get("symbol_reference")
-            for _, __, data in reference_edges_in_module
-            if data["label"] == "reference"
+            data["symbol_reference"]
+            for _, __, data in self._in_edges(
+                module_path, SymbolGraphEdgeLabel.REFERENCE
+            )
         ]
 
-    def _pre_compute_rankable_bounding_boxes(self) -> None:
-        """Pre-computes and caches the bounding boxes for all symbols in the graph."""
+    def _get_reference_table(
+        self, module_path: str
+    ) -> Optional[FileReferenceTable]:
+        """Gets the reference table of a module, if the graph aggregates its references."""
+        if isinstance(self._graph, CompactSymbolGraph):
+            return None
+        return get_reference_table(self._graph, module_path)
+
+    def _out_edges(
+        self, node: GraphNode, label: SymbolGraphEdgeLabel
+    ) -> Iterator[Tuple[Any, Any, Any]]:
+        """Yields the out edges of a node which carry the given label."""
+        if isinstance(self._graph, CompactSymbolGraph):
+            yield from self._graph.out_edges(node, label)
+        else:
+            yield from out_edges_with_label(self._graph, node, label.value)
+
+    def _in_edges(
+        self, node: GraphNode, label: SymbolGraphEdgeLabel
+    ) -> Iterator[Tuple[Any, Any, Any]]:
+        """Yields the in edges of a node which carry the given label."""
+        if isinstance(self._graph, CompactSymbolGraph):
+            yield from self._graph.in_edges(node, label)
+        else:
+            yield from in_edges_with_label(self._graph, node, label.value)
+
+    def _pre_compute_rankable_bounding_boxes(
+        self, cache: Optional[BoundingBoxCache] = None
+    ) -> None:
+        """
+        Pre-computes and caches the bounding boxes for all symbols in the graph.
+        Symbols are grouped by module, and each worker parses a whole module.
+        Modules whose contents match an entry of `cache` are not recomputed,
+        and the entries of recomputed modules are written back to `cache`.
+        """
         now = time()
         # Bounding boxes are already loaded
         if len(self.bounding_box) > 0:
@@ -200,25 +329,76 @@ class SymbolGraphNavigator:
             self.get_sorted_supported_symbols()
         )
 
-        # prepare loader_args here (replace this comment with actual code)
         if not py_module_loader.initialized:
             raise ValueError(
                 "Module loader must be initialized before pre-computing bounding boxes"
             )
-        loader_args: Tuple[str, str] = (
-            py_module_loader.root_fpath or "",
-            py_module_loader.project_name or "",
+        module_symbols: Dict[str, List[Symbol]] = defaultdict(list)
+        for symbol in filtered_symbols:
+            module_symbols[symbol.module_path].append(symbol)
+
+        bounding_boxes: Dict[Symbol, Optional[BoundingBox]] = {}
+        # The (module dotpath, fpath, content hash) of modules to recompute
+        stale_modules: List[Tuple[str, str, Optional[str]]] = []
+        for module_dotpath, symbols in module_symbols.items():
+            module_fpath = py_module_loader.fetch_module_fpath_by_dotpath(
+                module_dotpath
+            )
+            if module_fpath is None:
+                logger.error(f"Module {module_dotpath} not found")
+                continue
+            content_hash = hash_module_file(module_fpath)
+            cached = (
+                cache.get(module_dotpath, content_hash)
+                if cache is not None and content_hash is not None
+                else None
+            )
+            if cached is not None and all(
+                symbol.uri in cached for symbol in symbols
+            ):
+                for symbol in symbols:
+                    bounding_boxes[symbol] = cached[symbol.uri]
+            else:
+                stale_modules.append(
+                    (module_dotpath, module_fpath, content_hash)
+                )
+
+        logger.info(
+            f"Computing bounding boxes for {len(stale_modules)} of {len(module_symbols)} modules"
         )
-        bounding_boxes = {}
-        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            func = partial(process_symbol_bounds, loader_args)
-            results = executor.map(func, filtered_symbols)
-            for result in results:
-                if result is not None:
-                    symbol, bounding_box = result
-                    bounding_boxes[symbol] = bounding_box
+        if stale_modules:
+            fpaths = [module_fpath for _, module_fpath, _ in stale_modules]
+            symbol_lists = [
+                module_symbols[module_dotpath]
+                for module_dotpath, _, _ in stale_modules
+            ]
+            if len(stale_modules) > 1 and MAX_WORKERS > 1:
+                with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                    results = list(
+                        executor.map(
+                            process_module_bounds, fpaths, symbol_lists
+                        )
+                    )
+            else:
+                results = list(
+                    map(process_module_bounds, fpaths, symbol_lists)
+                )
+            for (module_dotpath, _, content_hash), result in zip(
+                stale_modules, results
+            ):
+                bounding_boxes.update(result)
+                if cache is not None and content_hash is not None:
+                    cache.put(
+                        module_dotpath,
+                        content_hash,
+                        {symbol.uri: box for symbol, box in result.items()},
+                    )
 
         logger.info(
             f"Finished pre-computing bounding boxes for all rankable symbols in {time() - now} seconds"
         )
-        self.bounding_box = bounding_boxes
+        self.bounding_box = {
+            symbol: bounding_box
+            for symbol, bounding_box in bounding_boxes.items()
+            if bounding_box is not None
+        }
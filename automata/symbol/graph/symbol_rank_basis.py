@@ -0,0 +1,311 @@
+"""
+Contains the `SymbolRankBasis` class, which holds the precomputed personalized
+SymbolRank of every symbol of a rankable subgraph, along with its on-disk format.
+"""
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+from scipy import sparse
+
+from automata.core.saved_arrays import (
+    SavedArrayFormat,
+    StringTable,
+    load_array,
+    read_manifest,
+    save_arrays,
+)
+from automata.symbol.graph.symbol_rank_transition import (
+    get_adjacency_fingerprint,
+    get_graph_fingerprint,
+)
+from automata.symbol.symbol_base import Symbol
+from automata.symbol.symbol_parser import parse_symbol
+
+logger = logging.getLogger(__name__)
+
+SYMBOL_RANK_BASIS_FORMAT = SavedArrayFormat("symbol_rank_basis", 2)
+
+# The number of symbols whose ranks are iterated together, as one dense block
+BASIS_BLOCK_SIZE = 256
+
+# State shared with the worker processes forked by `SymbolRankBasis.compute`
+_SHARED_BASIS_STATE: Optional[
+    Tuple[sparse.csr_array, float, int, float, int]
+] = None
+
+
+def _build_rank_operator(
+    adjacency: sparse.csr_array, alpha: float
+) -> sparse.csr_array:
+    """
+    Builds alpha times the transposed transition matrix of an unweighted adjacency
+    matrix. The columns of dangling nodes are empty, so their rank leaks out of the iteration.
+    """
+    adjacency = adjacency.copy()
+    out_degrees = np.diff(adjacency.indptr)
+    adjacency.data *= alpha / np.repeat(out_degrees, out_degrees)
+    return adjacency.T.tocsr()
+
+
+def _compute_basis_block(
+    operator: sparse.csr_array,
+    column_ids: np.ndarray,
+    alpha: float,
+    top_k: int,
+    tolerance: float,
+    max_iterations: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Computes the truncated ranks personalized on each of the given symbols, as
+    `(sources, targets, values)` arrays, by summing the terms of the series
+    `(1 - alpha) * sum((alpha * P^T)^t e_u)` until they fall below the tolerance.
+
+    Raises:
+        NetworkXError: If the series does not converge
+    """
+    node_count = operator.shape[0]
+    terms = np.zeros((node_count, len(column_ids)))
+    terms[column_ids, np.arange(len(column_ids))] = 1.0 - alpha
+    ranks = terms.copy()
+    for _ in range(max_iterations):
+        terms = operator @ terms
+        ranks += terms
+        if terms.sum(axis=0).max() < tolerance:
+            break
+    else:
+        raise nx.NetworkXError(
+            "SymbolRank: basis failed to converge in %d iterations."
+            % max_iterations
+        )
+
+    if top_k < node_count:
+        targets = np.argpartition(-ranks, top_k - 1, axis=0)[:top_k]
+    else:
+        targets = np.broadcast_to(
+            np.arange(node_count)[:, np.newaxis], ranks.shape
+        )
+    values = np.take_along_axis(ranks, targets, axis=0)
+    is_kept = values > 0.0
+    sources = np.broadcast_to(column_ids, targets.shape)
+    return sources[is_kept], targets[is_kept], values[is_kept]
+
+
+def _compute_basis_shard(
+    column_ids: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Computes a block of the basis, in a worker forked from the computing process."""
+    assert _SHARED_BASIS_STATE is not None
+    operator, alpha, top_k, tolerance, max_iterations = _SHARED_BASIS_STATE
+    return _compute_basis_block(
+        operator, column_ids, alpha, top_k, tolerance, max_iterations
+    )
+
+
+class SymbolRankBasis:
+    """
+    The personalized SymbolRank of each symbol of a rankable subgraph, truncated
+    to its `top_k` highest ranks and held as the rows of a sparse matrix.
+
+    SymbolRank is linear in its personalization, so the ranks for any query are
+    the similarity-weighted sum of the rows of its symbols, rescaled to account for
+    the rank of dangling nodes. Queries are then answered with one sparse product,
+    rather than by power iteration. Ranks are exact when `top_k` covers the subgraph.
+
+    The basis keeps the fingerprint of the subgraph it was computed on, so that
+    it is not used to rank a different graph, such as one changed by a delta.
+    """
+
+    def __init__(
+        self,
+        symbols: List[Symbol],
+        matrix: sparse.csr_array,
+        alpha: float,
+        top_k: int,
+        tolerance: float,
+        fingerprint: str,
+    ) -> None:
+        self.symbols = symbols
+        # Row u holds the ranks personalized on `symbols[u]`, over all symbols
+        self.matrix = matrix
+        # The configuration which the basis was computed with
+        self.alpha = alpha
+        self.top_k = top_k
+        self.tolerance = tolerance
+        # The digest of the subgraph, see `get_graph_fingerprint`
+        self.fingerprint = fingerprint
+        self._transposed = matrix.T.tocsr()
+        self._symbol_ids = {symbol: i for i, symbol in enumerate(symbols)}
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @classmethod
+    def compute(
+        cls,
+        rankable_subgraph: nx.DiGraph,
+        alpha: float,
+        top_k: int,
+        tolerance: float = 1.0e-6,
+        max_iterations: int = 100,
+        num_workers: int = 1,
+    ) -> "SymbolRankBasis":
+        """
+        Computes the basis of `rankable_subgraph`, one block of symbols at a time.
+        With more than one worker, blocks are computed in forked processes.
+
+        Raises:
+            NetworkXError: If the ranks of any symbol fail to converge
+        """
+        logger.info("Computing the SymbolRank basis of the symbol graph...")
+        symbols: List[Symbol] = list(rankable_subgraph.nodes())
+        node_count = len(symbols)
+        adjacency = nx.to_scipy_sparse_array(
+            rankable_subgraph,
+            nodelist=symbols,
+            weight=None,
+            dtype=float,
+            format="csr",
+        )
+        operator = _build_rank_operator(adjacency, alpha)
+        blocks = np.array_split(
+            np.arange(node_count),
+            max(1, -(-node_count // BASIS_BLOCK_SIZE)),
+        )
+
+        num_shards = min(num_workers, len(blocks))
+        if (
+            num_shards <= 1
+            or "fork" not in multiprocessing.get_all_start_methods()
+        ):
+            results = [
+                _compute_basis_block(
+                    operator, block, alpha, top_k, tolerance, max_iterations
+                )
+                for block in blocks
+            ]
+        else:
+            global _SHARED_BASIS_STATE
+            _SHARED_BASIS_STATE = (
+                operator,
+                alpha,
+                top_k,
+                tolerance,
+                max_iterations,
+            )
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=num_shards,
+                    mp_context=multiprocessing.get_context("fork"),
+                ) as executor:
+                    results = list(executor.map(_compute_basis_shard, blocks))
+            finally:
+                _SHARED_BASIS_STATE = None
+
+        matrix = sparse.csr_array(
+            (
+                np.concatenate([values for _, __, values in results]),
+                (
+                    np.concatenate([sources for sources, _, __ in results]),
+                    np.concatenate([targets for _, targets, __ in results]),
+                ),
+            ),
+            shape=(node_count, node_count),
+        )
+        return cls(
+            symbols,
+            matrix,
+            alpha,
+            top_k,
+            tolerance,
+            get_adjacency_fingerprint(symbols, adjacency),
+        )
+
+    def matches(self, alpha: float, top_k: int) -> bool:
+        """Checks if the basis was computed with the given configuration."""
+        return self.alpha == alpha and self.top_k == top_k
+
+    def matches_graph(self, graph: nx.DiGraph) -> bool:
+        """Checks if the basis was computed on a graph with the nodes and edges of `graph`."""
+        return len(
+            self
+        ) == graph.number_of_nodes() and self.fingerprint == get_graph_fingerprint(
+            graph
+        )
+
+    def to_vector(self, values: Dict[Symbol, float]) -> np.ndarray:
+        """Converts values keyed by symbol to an array in basis order, missing symbols being zero."""
+        return np.fromiter(
+            (values.get(symbol, 0.0) for symbol in self.symbols),
+            dtype=float,
+            count=len(self.symbols),
+        )
+
+    def get_ranks(
+        self,
+        similarity_vec: np.ndarray,
+        dangling_vec: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Gets the ranks personalized on `similarity_vec`, in basis order.
+        The rank which dangling nodes hold is spread along `dangling_vec`,
+        or along the similarity itself if it is None.
+        """
+        ranks = self._transposed @ similarity_vec
+        if dangling_vec is None:
+            return ranks / ranks.sum()
+        dangling_ranks = self._transposed @ dangling_vec
+        return (
+            ranks + (1.0 - ranks.sum()) / dangling_ranks.sum() * dangling_ranks
+        )
+
+    def save(self, directory: str) -> None:
+        """Saves the basis as a directory of flat arrays."""
+        arrays = StringTable.from_strings(
+            [symbol.uri for symbol in self.symbols]
+        ).to_arrays("symbols.")
+        arrays["indptr"] = self.matrix.indptr
+        arrays["indices"] = self.matrix.indices
+        arrays["values"] = self.matrix.data
+        save_arrays(
+            directory,
+            SYMBOL_RANK_BASIS_FORMAT,
+            arrays,
+            symbol_count=len(self.symbols),
+            alpha=self.alpha,
+            top_k=self.top_k,
+            tolerance=self.tolerance,
+            fingerprint=self.fingerprint,
+        )
+
+    @classmethod
+    def load(cls, directory: str) -> "SymbolRankBasis":
+        """
+        Loads a basis saved with `save`.
+
+        Raises:
+            ValueError: If the basis was saved with another format version
+        """
+        manifest = read_manifest(directory, SYMBOL_RANK_BASIS_FORMAT)
+        symbol_names = StringTable.from_arrays(directory, "symbols.", None)
+        symbol_count = manifest["symbol_count"]
+        matrix = sparse.csr_array(
+            (
+                load_array(directory, "values", None),
+                load_array(directory, "indices", None),
+                load_array(directory, "indptr", None),
+            ),
+            shape=(symbol_count, symbol_count),
+        )
+        return cls(
+            [parse_symbol(name) for name in symbol_names],
+            matrix,
+            manifest["alpha"],
+            manifest["top_k"],
+            manifest["tolerance"],
+            manifest["fingerprint"],
+        )
@@ -0,0 +1,121 @@
+"""
+Contains the `TransitionMatrix` class, the sparse transition matrix which
+SymbolRank iterates over, shared by `SymbolRank` and the precomputed metrics,
+along with the fingerprints which tie precomputed ranks to their graph.
+"""
+
+import hashlib
+from typing import Dict, Hashable, List, Optional, Sequence
+
+import networkx as nx
+import numpy as np
+from scipy import sparse
+
+from automata.symbol.symbol_base import Symbol
+
+
+def get_adjacency_fingerprint(
+    nodes: Sequence[Hashable], adjacency: sparse.csr_array
+) -> str:
+    """
+    Gets a digest of the nodes and edges of a graph, given as its nodes and their
+    adjacency matrix. Nodes are named by `str`, and the digest does not depend on
+    their order, nor on edge weights.
+    """
+    names = [str(node) for node in nodes]
+    order = sorted(range(len(names)), key=names.__getitem__)
+    name_ranks = np.empty(len(names), dtype=np.int64)
+    name_ranks[order] = np.arange(len(names))
+    edges = adjacency.tocoo()
+    sources, targets = name_ranks[edges.row], name_ranks[edges.col]
+    edge_order = np.lexsort((targets, sources))
+
+    digest = hashlib.sha256()
+    digest.update("\n".join(names[i] for i in order).encode("utf-8"))
+    digest.update(sources[edge_order].tobytes())
+    digest.update(targets[edge_order].tobytes())
+    return digest.hexdigest()
+
+
+def get_graph_fingerprint(graph: nx.DiGraph) -> str:
+    """Gets the digest of the nodes and edges of `graph`, see `get_adjacency_fingerprint`."""
+    nodes = list(graph)
+    return get_adjacency_fingerprint(
+        nodes,
+        nx.to_scipy_sparse_array(
+            graph, nodelist=nodes, weight=None, dtype=float, format="csr"
+        ),
+    )
+
+
+class TransitionMatrix:
+    """
+    The transition matrix of a graph for SymbolRank, in sparse CSR form.
+    Nodes are numbered in the order of the graph, and the row-normalized
+    matrix is stored transposed, so that each iteration of SymbolRank is a
+    single sparse matrix-vector product. Dangling nodes have empty rows.
+    The untransposed matrix is kept as well, to push rank along out edges.
+    """
+
+    def __init__(self, graph: nx.DiGraph, weight_key: str) -> None:
+        self.nodes: List[Hashable] = list(graph)
+        # Undirected graphs give a symmetric matrix, as if each edge was directed both ways
+        adjacency = nx.to_scipy_sparse_array(
+            graph,
+            nodelist=self.nodes,
+            weight=weight_key,
+            dtype=float,
+            format="csr",
+        )
+        out_weights = np.asarray(adjacency.sum(axis=1)).ravel()
+        self.is_dangling = out_weights == 0.0
+        scale = np.divide(
+            1.0,
+            out_weights,
+            out=np.zeros_like(out_weights),
+            where=~self.is_dangling,
+        )
+        adjacency.data *= np.repeat(scale, np.diff(adjacency.indptr))
+        self.forward = adjacency
+        self.transposed = adjacency.T.tocsr()
+        self._node_ids: Optional[Dict[Hashable, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def to_vector(self, values: Dict[Symbol, float]) -> np.ndarray:
+        """Converts values keyed by node to an array in node order, missing nodes being zero."""
+        return np.fromiter(
+            (values.get(node, 0.0) for node in self.nodes),  # type: ignore
+            dtype=float,
+            count=len(self.nodes),
+        )
+
+    def get_node_ids(self, nodes: Sequence[Hashable]) -> np.ndarray:
+        """Gets the index of each of `nodes` in node order, or -1 for nodes not in the graph."""
+        if self._node_ids is None:
+            self._node_ids = {node: i for i, node in enumerate(self.nodes)}
+        return np.fromiter(
+            (self._node_ids.get(node, -1) for node in nodes),
+            dtype=np.int64,
+            count=len(nodes),
+        )
+
+    def iterate(
+        self,
+        rank_mat: np.ndarray,
+        alpha: float,
+        dangling_mat: np.ndarray,
+        personalization_mat: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Runs one iteration of SymbolRank on the rank vectors in the columns of
+        `rank_mat`, or on a single rank vector. The rank of dangling nodes is
+        spread by `dangling_mat`, and teleportation by `personalization_mat`.
+        """
+        danglesum = alpha * rank_mat[self.is_dangling].sum(axis=0)
+        return (
+            alpha * (self.transposed @ rank_mat)
+            + danglesum * dangling_mat
+            + (1.0 - alpha) * personalization_mat
+        )
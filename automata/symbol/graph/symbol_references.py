@@ -1,23 +1,95 @@
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import networkx as nx
+import numpy as np
 
 from automata.symbol.graph.symbol_graph_base import GraphProcessor
-from automata.symbol.symbol_base import SymbolReference
+from automata.symbol.symbol_base import Symbol, SymbolReference
 from automata.symbol.symbol_parser import parse_symbol
 
 from ..scip_pb2 import SymbolRole  # type: ignore
 
 logger = logging.getLogger(__name__)
 
+# The node attribute which holds the `FileReferenceTable` of a file
+REFERENCE_TABLE_ATTRIBUTE = "reference_table"
+# (symbol, line number, column number, symbol role bitmask)
+Occurrence = Tuple[Symbol, int, int, int]
+
+
+class DefinitionIndex:
+    """
+    Records the document which defines each symbol, so that the graph holds
+    exactly one "contains" edge per symbol. The defining document is the last
+    document with a definition occurrence of the symbol, or otherwise the first
+    document which lists the symbol. Symbols are keyed by URI.
+    """
+
+    def __init__(self) -> None:
+        self._listing_documents: Dict[str, str] = {}
+        self._defining_documents: Dict[str, str] = {}
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Any]) -> "DefinitionIndex":
+        """Builds a `DefinitionIndex` in a single pass over the documents of an index."""
+        definition_index = cls()
+        for document in documents:
+            definition_index.record_document(document)
+        return definition_index
+
+    def record(
+        self,
+        relative_path: str,
+        listed_uris: Iterable[str],
+        defined_uris: Iterable[str],
+    ) -> None:
+        """Records the symbols which a document lists and defines."""
+        for uri in listed_uris:
+            self._listing_documents.setdefault(uri, relative_path)
+        for uri in defined_uris:
+            self._defining_documents[uri] = relative_path
+
+    def record_document(self, document: Any) -> None:
+        """Records the symbols which a SCIP `Document` lists and defines."""
+        self.record(
+            document.relative_path,
+            (
+                symbol_information.symbol
+                for symbol_information in document.symbols
+            ),
+            get_defined_uris(document),
+        )
+
+    def get_defining_document(self, uri: str) -> Optional[str]:
+        """Returns the relative path of the document which defines a symbol."""
+        return self._defining_documents.get(
+            uri, self._listing_documents.get(uri)
+        )
+
+    def items(self) -> Iterable[Tuple[str, str]]:
+        """Yields each recorded symbol URI with the path of its defining document."""
+        return {**self._listing_documents, **self._defining_documents}.items()
+
+
+def get_defined_uris(document: Any) -> List[str]:
+    """Returns the URIs of the symbols with a definition occurrence in a `Document`."""
+    return [
+        occurrence.symbol
+        for occurrence in document.occurrences
+        if occurrence.symbol_roles & SymbolRole.Definition
+    ]
+
 
 class ReferenceProcessor(GraphProcessor):
     """Adds edges to the `MultiDiGraph` for references between `Symbol` nodes."""
 
-    def __init__(self, graph: nx.MultiDiGraph, document: Any) -> None:
+    def __init__(
+        self, graph: nx.MultiDiGraph, document: Any, aggregate: bool = False
+    ) -> None:
         self._graph = graph
         self.document = document
+        self.aggregate = aggregate
 
     def process(self) -> None:
         """
@@ -25,7 +97,11 @@ class ReferenceProcessor(GraphProcessor):
         A reference is the usage of a symbol in a particular context.
         For example, a reference can be a function call, a variable usage,
         or a class instantiation.
+        Definitions are resolved ahead of time by a `DefinitionIndex`.
+        When `aggregate` is set, each symbol gets a single edge to the file,
+        and the occurrences are stored in a `FileReferenceTable`.
         """
+        occurrences: List[Occurrence] = []
         for occurrence in self.document.occurrences:
             try:
                 occurrence_symbol = parse_symbol(occurrence.symbol)
@@ -35,6 +111,17 @@ class ReferenceProcessor(GraphProcessor):
                 )
                 continue
 
+            if self.aggregate:
+                occurrences.append(
+                    (
+                        occurrence_symbol,
+                        occurrence.range[0],
+                        occurrence.range[1],
+                        occurrence.symbol_roles,
+                    )
+                )
+                continue
+
             occurrence_range = tuple(occurrence.range)
             occurrence_roles = ReferenceProcessor._process_symbol_roles(
                 occurrence.symbol_roles
@@ -51,23 +138,13 @@ class ReferenceProcessor(GraphProcessor):
                 symbol_reference=occurrence_reference,
                 label="reference",
             )
-            if occurrence_roles.get(SymbolRole.Name(SymbolRole.Definition)):
-                # TODO this is gross
-                incorrect_contains_edges = [
-                    (source, target)
-                    for source, target, data in self._graph.in_edges(
-                        occurrence_symbol, data=True
-                    )
-                    if data.get("label") == "contains"
-                ]
-                for source, target in incorrect_contains_edges:
-                    self._graph.remove_edge(source, target)
-
-                self._graph.add_edge(
-                    self.document.relative_path,
-                    occurrence_symbol,
-                    label="contains",
-                )
+
+        if self.aggregate:
+            add_reference_table(
+                self._graph,
+                self.document.relative_path,
+                FileReferenceTable.from_occurrences(occurrences),
+            )
 
     @staticmethod
     def _process_symbol_roles(role: int) -> Dict[str, bool]:
@@ -76,3 +153,133 @@ class ReferenceProcessor(GraphProcessor):
             for role_name, role_value in SymbolRole.items()
             if (role & role_value) > 0
         }
+
+
+class FileReferenceTable:
+    """
+    The occurrences of symbols in one file, held as numpy columns instead of
+    one `SymbolReference` per graph edge.
+
+    Rows are grouped by symbol, in the order in which symbols first occur,
+    and keep their order in the file within each symbol. The references to a
+    symbol are thus a contiguous slice, which is only materialized into
+    `SymbolReference`s when it is requested.
+    """
+
+    def __init__(
+        self,
+        symbols: List[Symbol],
+        offsets: np.ndarray,
+        line_numbers: np.ndarray,
+        column_numbers: np.ndarray,
+        role_masks: np.ndarray,
+    ) -> None:
+        self.symbols = symbols
+        # The rows of `symbols[i]` are `offsets[i]:offsets[i + 1]`
+        self.offsets = offsets
+        self.line_numbers = line_numbers
+        self.column_numbers = column_numbers
+        self.role_masks = role_masks
+        self._symbol_ids = {symbol: i for i, symbol in enumerate(symbols)}
+
+    @classmethod
+    def from_occurrences(
+        cls, occurrences: Iterable[Occurrence]
+    ) -> "FileReferenceTable":
+        """Builds a table from `(symbol, line, column, roles)` occurrences in file order."""
+        grouped: Dict[Symbol, List[Tuple[int, int, int]]] = {}
+        for symbol, line_number, column_number, role_mask in occurrences:
+            grouped.setdefault(symbol, []).append(
+                (line_number, column_number, role_mask)
+            )
+        rows = np.array(
+            [row for symbol_rows in grouped.values() for row in symbol_rows],
+            dtype=np.int32,
+        ).reshape(-1, 3)
+        offsets = np.zeros(len(grouped) + 1, dtype=np.int64)
+        np.cumsum([len(rows) for rows in grouped.values()], out=offsets[1:])
+        return cls(
+            list(grouped),
+            offsets,
+            np.ascontiguousarray(rows[:, 0]),
+            np.ascontiguousarray(rows[:, 1]),
+            np.ascontiguousarray(rows[:, 2]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.line_numbers)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FileReferenceTable):
+            return False
+        return (
+            self.symbols == other.symbols
+            and np.array_equal(self.offsets, other.offsets)
+            and np.array_equal(self.line_numbers, other.line_numbers)
+            and np.array_equal(self.column_numbers, other.column_numbers)
+            and np.array_equal(self.role_masks, other.role_masks)
+        )
+
+    def count(self, symbol: Symbol) -> int:
+        """Gets the number of occurrences of a symbol in the file."""
+        rows = self.get_rows(symbol)
+        return rows.stop - rows.start
+
+    def get_rows(self, symbol: Symbol) -> slice:
+        """Gets the rows which hold the occurrences of a symbol."""
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            return slice(0, 0)
+        return slice(
+            int(self.offsets[symbol_id]), int(self.offsets[symbol_id + 1])
+        )
+
+    def get_references(self, symbol: Symbol) -> List[SymbolReference]:
+        """Materializes the references to a symbol, in the order they occur in the file."""
+        rows = self.get_rows(symbol)
+        return self._materialize(symbol, rows.start, rows.stop)
+
+    def _materialize(
+        self, symbol: Symbol, start: int, end: int
+    ) -> List[SymbolReference]:
+        return [
+            SymbolReference(
+                symbol=symbol,
+                line_number=line_number,
+                column_number=column_number,
+                roles=ReferenceProcessor._process_symbol_roles(role_mask),
+            )
+            for line_number, column_number, role_mask in zip(
+                self.line_numbers[start:end].tolist(),
+                self.column_numbers[start:end].tolist(),
+                self.role_masks[start:end].tolist(),
+            )
+        ]
+
+
+def add_reference_table(
+    graph: nx.MultiDiGraph, relative_path: str, table: FileReferenceTable
+) -> None:
+    """
+    Adds one aggregated "reference" edge from each symbol of the table to the file,
+    carrying its number of occurrences, and attaches the table to the file node.
+    """
+    if len(table) == 0:
+        return
+    for symbol in table.symbols:
+        graph.add_edge(
+            symbol,
+            relative_path,
+            reference_count=table.count(symbol),
+            label="reference",
+        )
+    graph.nodes[relative_path][REFERENCE_TABLE_ATTRIBUTE] = table
+
+
+def get_reference_table(
+    graph: nx.MultiDiGraph, relative_path: str
+) -> Optional[FileReferenceTable]:
+    """Gets the reference table of a file, if its references are aggregated."""
+    if relative_path not in graph:
+        return None
+    return graph.nodes[relative_path].get(REFERENCE_TABLE_ATTRIBUTE)
@@ -0,0 +1,153 @@
+"""
+Contains the `ScipIndexReader` class, which streams the documents of a SCIP
+index from disk instead of parsing the whole `Index` message at once.
+"""
+
+import logging
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+from automata.symbol.scip_pb2 import Document  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Field numbers of the `Index` and `Document` messages, see scip.proto
+INDEX_DOCUMENTS_FIELD = 2
+DOCUMENT_RELATIVE_PATH_FIELD = 1
+
+# Protobuf wire types
+WIRE_TYPE_VARINT = 0
+WIRE_TYPE_FIXED64 = 1
+WIRE_TYPE_LENGTH_DELIMITED = 2
+WIRE_TYPE_FIXED32 = 5
+
+
+def _read_varint(stream: BinaryIO) -> Optional[int]:
+    """Reads a varint from the stream, or returns None at the end of the stream."""
+    result, shift = 0, 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            if shift == 0:
+                return None
+            raise ValueError("Truncated varint in SCIP index.")
+        result |= (byte[0] & 0x7F) << shift
+        if byte[0] < 0x80:
+            return result
+        shift += 7
+
+
+def _skip_field(stream: BinaryIO, wire_type: int) -> None:
+    """Skips over the value of a field with the given wire type."""
+    if wire_type == WIRE_TYPE_VARINT:
+        _read_varint(stream)
+    elif wire_type == WIRE_TYPE_FIXED64:
+        stream.seek(8, 1)
+    elif wire_type == WIRE_TYPE_LENGTH_DELIMITED:
+        stream.seek(_read_varint(stream) or 0, 1)
+    elif wire_type == WIRE_TYPE_FIXED32:
+        stream.seek(4, 1)
+    else:
+        raise ValueError(f"Unsupported wire type {wire_type} in SCIP index.")
+
+
+class ScipIndexReader:
+    """
+    Reads a SCIP index one `Document` at a time.
+
+    The `documents` field of an `Index` is a sequence of length-delimited
+    messages, so each document can be decoded on its own while the rest of
+    the file stays on disk. Peak memory is bounded by the largest document.
+    An offset table maps each relative path to the position of its document,
+    so that a single document can be re-read without scanning the index.
+
+    The reader exposes `documents` like an `Index`, so it can be passed to
+    `GraphBuilder` in place of a fully parsed index.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._offset_table: Optional[Dict[str, Tuple[int, int]]] = None
+
+    @property
+    def documents(self) -> Iterator[Document]:
+        """Yields the documents of the index in order."""
+        for serialized_document in self.iter_serialized_documents():
+            document = Document()
+            document.ParseFromString(serialized_document)
+            yield document
+
+    def iter_serialized_documents(self) -> Iterator[bytes]:
+        """Yields the serialized documents of the index in order."""
+        with open(self.path, "rb") as f:
+            for offset, length in self._iter_document_spans(f):
+                f.seek(offset)
+                yield f.read(length)
+
+    @property
+    def offset_table(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Maps the relative path of each document to its `(offset, length)` in the file.
+        The table is built on first use, reading only the path of each document.
+        """
+        if self._offset_table is None:
+            self._offset_table = self._build_offset_table()
+        return self._offset_table
+
+    def get_document(self, relative_path: str) -> Optional[Document]:
+        """Re-reads the document with the given relative path, if it exists."""
+        span = self.offset_table.get(relative_path)
+        if span is None:
+            return None
+        offset, length = span
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            document = Document()
+            document.ParseFromString(f.read(length))
+        return document
+
+    def _build_offset_table(self) -> Dict[str, Tuple[int, int]]:
+        offset_table: Dict[str, Tuple[int, int]] = {}
+        with open(self.path, "rb") as f:
+            for offset, length in self._iter_document_spans(f):
+                f.seek(offset)
+                relative_path = self._read_relative_path(f, offset + length)
+                offset_table[relative_path] = (offset, length)
+        return offset_table
+
+    @staticmethod
+    def _iter_document_spans(f: BinaryIO) -> Iterator[Tuple[int, int]]:
+        """
+        Yields the `(offset, length)` of each document in the index.
+        Other fields of the index are skipped. The stream position is
+        restored after each span is yielded, so callers may read from it.
+        """
+        while (tag := _read_varint(f)) is not None:
+            field_number, wire_type = tag >> 3, tag & 0x7
+            if (
+                field_number == INDEX_DOCUMENTS_FIELD
+                and wire_type == WIRE_TYPE_LENGTH_DELIMITED
+            ):
+                length = _read_varint(f) or 0
+                offset = f.tell()
+                yield offset, length
+                f.seek(offset + length)
+            else:
+                _skip_field(f, wire_type)
+
+    @staticmethod
+    def _read_relative_path(f: BinaryIO, end: int) -> str:
+        """Reads the relative path of the document which ends at `end`."""
+        while f.tell() < end:
+            tag = _read_varint(f)
+            if tag is None:
+                break
+            field_number, wire_type = tag >> 3, tag & 0x7
+            if (
+                field_number == DOCUMENT_RELATIVE_PATH_FIELD
+                and wire_type == WIRE_TYPE_LENGTH_DELIMITED
+            ):
+                length = _read_varint(f) or 0
+                return f.read(length).decode("utf-8")
+            _skip_field(f, wire_type)
+        logger.warning(f"Document without a relative path in {f.name}")
+        return ""
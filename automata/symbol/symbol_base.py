@@ -2,6 +2,7 @@ import abc
 import re
 from dataclasses import dataclass
 from enum import Enum
+from functools import cached_property
 from typing import Any, Dict, List, Optional, Tuple
 
 from automata.symbol.scip_pb2 import Descriptor as DescriptorProto  # type: ignore # isort:skip
@@ -10,6 +11,8 @@ from automata.symbol.scip_pb2 import Descriptor as DescriptorProto  # type: igno
 class SymbolDescriptor:
     """A class to represent the description component of a Symbol URI."""
 
+    __slots__ = ("name", "suffix", "disambiguator")
+
     ScipSuffix = DescriptorProto
 
     class PyKind(Enum):
@@ -182,6 +185,8 @@ class Symbol:
         return hash(self.uri)
 
     def __eq__(self, other) -> bool:
+        if self is other:
+            return True
         if isinstance(other, Symbol):
             return self.uri == other.uri
         elif isinstance(other, str):
@@ -195,17 +200,19 @@ class Symbol:
             self.uri, self.scheme, self.package, tuple(parent_descriptors)
         )
 
-    @property
+    # The properties below are cached, as symbols are interned by `parse_symbol`
+    # and their descriptors are never modified after construction.
+    @cached_property
     def py_kind(self) -> SymbolDescriptor.PyKind:
         return SymbolDescriptor.convert_scip_to_python_kind(
             self.descriptors[-1].suffix
         )
 
-    @property
+    @cached_property
     def dotpath(self) -> str:
         return ".".join([ele.name for ele in self.descriptors])
 
-    @property
+    @cached_property
     def module_path(self) -> str:
         return self.descriptors[0].name
 
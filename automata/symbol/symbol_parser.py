@@ -1,5 +1,5 @@
 import re
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from automata.symbol.symbol_base import Symbol, SymbolDescriptor, SymbolPackage
 
@@ -166,11 +166,30 @@ class _SymbolParser:
         return c.isalpha() or c.isdigit() or c in {"-", "+", "$", "_"}
 
 
+# Process-wide intern table, mapping a `Symbol` URI to its parsed `Symbol`
+_symbol_table: Dict[str, Symbol] = {}
+
+
 def parse_symbol(symbol_uri: str) -> Symbol:
     """
     Parses a `Symbol` given a `Symbol` URI.
     Visit `Symbol` for more information on URI specification.
+
+    Parsed symbols are interned, so repeated calls with the same URI
+    return the same `Symbol` instance.
     """
+    if symbol := _symbol_table.get(symbol_uri):
+        return symbol
+    return _symbol_table.setdefault(symbol_uri, _parse_symbol(symbol_uri))
+
+
+def clear_symbol_table() -> None:
+    """Clears the process-wide table of interned `Symbol` instances."""
+    _symbol_table.clear()
+
+
+def _parse_symbol(symbol_uri: str) -> Symbol:
+    """Parses a `Symbol` URI without consulting the intern table."""
     s = _SymbolParser(symbol_uri)
     scheme = s.accept_space_escaped_identifier("scheme")
 
@@ -13,9 +13,12 @@ from automata.singletons.py_module_loader import py_module_loader
 from automata.symbol.symbol_base import Symbol, SymbolDescriptor
 
 
-def convert_to_ast_object(symbol: Symbol) -> ast.AST:
+def convert_to_ast_object(
+    symbol: Symbol, module: Optional[ast.Module] = None
+) -> ast.AST:
     """
     Converts a specified symbol into it's corresponding ast.AST object
+    If `module` is given, it is searched instead of loading the symbol's module.
 
     Raises:
         ValueError: If the symbol is not found
@@ -36,7 +39,7 @@ def convert_to_ast_object(symbol: Symbol) -> ast.AST:
                 module_dotpath = module_dotpath[
                     len("") :
                 ]  # indexer omits this
-            obj = py_module_loader.fetch_ast_module(module_dotpath)
+            obj = module or py_module_loader.fetch_ast_module(module_dotpath)
             if not obj:
                 raise ValueError(f"Module {module_dotpath} not found")
         elif (
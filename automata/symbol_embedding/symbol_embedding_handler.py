@@ -1,8 +1,13 @@
 import abc
-from typing import List
+from typing import List, Optional
 
 from automata.core.base import VectorDatabaseProvider
-from automata.embedding import EmbeddingBuilder, EmbeddingHandler
+from automata.embedding import (
+    EmbeddingBuilder,
+    EmbeddingHandler,
+    EmbeddingIndex,
+    EmbeddingMatrix,
+)
 from automata.symbol import ISymbolProvider, Symbol
 from automata.symbol_embedding import SymbolEmbedding
 
@@ -15,14 +20,19 @@ class SymbolEmbeddingHandler(EmbeddingHandler, ISymbolProvider):
         embedding_db: VectorDatabaseProvider,
         embedding_builder: EmbeddingBuilder,
         batch_size: int,
+        embedding_index: Optional[EmbeddingIndex] = None,
     ) -> None:
-        """An abstract constructor for SymbolEmbeddingHandler"""
+        """
+        An abstract constructor for SymbolEmbeddingHandler.
+        Flushes are applied incrementally to `embedding_index`, if given.
+        """
 
         if batch_size > 2048:
             raise ValueError("Batch size must be less than 2048")
         self.embedding_db = embedding_db
         self.embedding_builder = embedding_builder
         self.batch_size = batch_size
+        self.embedding_index = embedding_index
 
         self.sorted_supported_symbols = [
             ele.symbol
@@ -49,15 +59,59 @@ class SymbolEmbeddingHandler(EmbeddingHandler, ISymbolProvider):
         )
 
     def flush(self):
-        """Perform any remaining updates that do not form a complete batch."""
+        """
+        Perform any remaining updates that do not form a complete batch.
+        The revision is bumped before the embedding index is marked as holding
+        the new embeddings, so that the index derives its key from them.
+        """
+        if not (self.to_discard or self.to_add):
+            return
+        updated_index = self._update_embedding_index()
         if self.to_discard:
             self.embedding_db.batch_discard(self.to_discard)
         if self.to_add:
             self.embedding_db.batch_add(self.to_add)
+        self.revision += 1
+        if updated_index:
+            assert self.embedding_index is not None
+            self.embedding_index.mark_holds_embeddings_of(self)
         # Reset the lists for next operations
         self.to_discard = []
         self.to_add = []
 
+    def get_entry_count(self) -> int:
+        """Gets the number of embeddings in the database."""
+        return len(self.embedding_db)
+
+    def _update_embedding_index(self) -> bool:
+        """
+        Applies the pending changes to the embedding index, if it holds the
+        current embeddings. Otherwise it is left to be rebuilt when next searched.
+        Returns True if the index was updated.
+        """
+        index = self.embedding_index
+        if index is None:
+            return False
+        norm_type = index.norm_type
+        if not index.holds_embeddings_of(
+            self,
+            lambda: EmbeddingMatrix.from_embeddings(
+                self.get_all_ordered_embeddings(), norm_type
+            ),
+        ):
+            return False
+        if self.to_discard:
+            index.discard(
+                [
+                    embedding.key
+                    for embedding in self.embedding_db.batch_get(
+                        self.to_discard
+                    )
+                ]
+            )
+        index.add(self.to_add)
+        return True
+
     # ISymbolProvider methods
 
     def _get_sorted_supported_symbols(self) -> List[Symbol]:
@@ -69,3 +123,4 @@ class SymbolEmbeddingHandler(EmbeddingHandler, ISymbolProvider):
     ) -> None:
         """Filter the symbols to only those in the new sorted_supported_symbols set"""
         self.sorted_supported_symbols = new_sorted_supported_symbols
+        self.revision += 1
@@ -2,6 +2,7 @@ import os
 import random
 import shutil
 import uuid
+from collections import Counter
 from typing import Any, Dict, Generator, List, Set
 from unittest.mock import MagicMock
 
@@ -30,6 +31,7 @@ from automata.memory_store import (
 from automata.singletons.dependency_factory import dependency_factory
 from automata.singletons.github_client import GitHubClient
 from automata.symbol import Symbol, SymbolGraph, parse_symbol
+from automata.symbol.graph.symbol_navigator import SymbolGraphNavigator
 from automata.symbol_embedding import (
     ChromaSymbolEmbeddingVectorDatabase,
     JSONSymbolEmbeddingVectorDatabase,
@@ -192,6 +194,114 @@ def symbol_graph_mock(mocker):
     return mocker.MagicMock(spec=SymbolGraph)
 
 
+@pytest.fixture
+def tmp_data_path(tmp_path, mocker) -> str:
+    """Points the artifacts which symbol graphs save and load at a temporary directory"""
+    data_path = str(tmp_path / "data")
+    for module in ("graph_builder", "symbol_graph"):
+        mocker.patch(
+            f"automata.symbol.graph.{module}.load_data_path",
+            return_value=data_path,
+        )
+    return data_path
+
+
+@pytest.fixture
+def graph_edge_counts():
+    """Counts the edges of a networkx symbol graph by endpoints and plain data"""
+
+    def edge_counts(graph):
+        counts: Counter = Counter()
+        for source, target, data in graph.edges(data=True):
+            data = dict(data)
+            if reference := data.pop("symbol_reference", None):
+                data["reference"] = (
+                    reference.line_number,
+                    reference.column_number,
+                    tuple(sorted(reference.roles)),
+                )
+            counts[
+                (str(source), str(target), tuple(sorted(data.items())))
+            ] += 1
+        return counts
+
+    return edge_counts
+
+
+@pytest.fixture
+def graph_references():
+    """Gets the references to each symbol and into each file of a symbol graph, as plain tuples"""
+
+    def references(graph):
+        def as_tuples(references):
+            return [
+                (
+                    reference.symbol.uri,
+                    reference.line_number,
+                    reference.column_number,
+                    tuple(sorted(reference.roles)),
+                )
+                for reference in references
+            ]
+
+        navigator = SymbolGraphNavigator(graph)
+        symbol_references = {
+            str(node): {
+                file_path: as_tuples(references)
+                for file_path, references in navigator.get_references_to_symbol(
+                    node
+                ).items()
+            }
+            for node in graph
+            if isinstance(node, Symbol)
+        }
+        file_references = {
+            node: sorted(as_tuples(navigator._get_references_to_module(node)))
+            for node in graph
+            if isinstance(node, str)
+        }
+        return symbol_references, file_references
+
+    return references
+
+
+@pytest.fixture
+def fake_symbol_dependencies(mocker):
+    """
+    Patches a SymbolGraph to treat the 15 lines after a symbol's definition as its scope,
+    so that its rankable subgraphs are built without loading any source code
+    """
+
+    def get_symbol_dependencies(graph: SymbolGraph, symbol: Symbol):
+        file_path = graph.navigator._get_symbol_containing_file(symbol)
+        references = graph.navigator._get_references_to_module(file_path)
+        start_lines = [
+            ref.line_number
+            for ref in references
+            if ref.symbol == symbol and "Definition" in ref.roles
+        ]
+        if not start_lines:
+            return set()
+        return {
+            ref.symbol
+            for ref in references
+            if start_lines[0] < ref.line_number < start_lines[0] + 15
+        }
+
+    def patch_symbol_graph(graph: SymbolGraph) -> None:
+        graph.is_synchronized = True
+        mocker.patch.object(
+            graph.navigator, "_pre_compute_rankable_bounding_boxes"
+        )
+        mocker.patch.object(
+            graph,
+            "get_symbol_dependencies",
+            side_effect=lambda symbol: get_symbol_dependencies(graph, symbol),
+        )
+
+    return patch_symbol_graph
+
+
 @pytest.fixture
 def symbol_search(mocker, symbol_graph_mock):
     """Creates a SymbolSearch object with Mock dependencies for testing"""
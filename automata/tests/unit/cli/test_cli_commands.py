@@ -127,6 +127,27 @@ def test_cli_run_doc_post_process():
         mock_main.assert_called_once()
 
 
+def test_cli_run_symbol_rank_basis():
+    with patch(
+        "automata.cli.scripts.run_symbol_rank_basis.main"
+    ) as mock_main, patch(
+        "automata.cli.commands.configure_logging"
+    ) as mock_configure_logging, patch(
+        "logging.getLogger"
+    ) as mock_getLogger:
+        mock_getLogger.return_value = MagicMock(spec=logging.Logger)
+
+        runner = click.testing.CliRunner()
+        result = runner.invoke(
+            automata.cli.commands.cli,
+            ["run-symbol-rank-basis", "--top-k", "32"],
+        )
+
+        assert result.exit_code == 0
+        mock_configure_logging.assert_called_once_with(log_level_str="INFO")
+        assert mock_main.call_args.kwargs["top_k"] == 32
+
+
 def test_cli_run_agent():
     with patch("automata.cli.scripts.run_agent.main") as mock_main, patch(
         "automata.cli.commands.configure_logging"
@@ -0,0 +1,100 @@
+import os
+import shutil
+from unittest.mock import patch
+
+import pytest
+
+from automata.core.utils import get_root_py_fpath
+from automata.singletons.py_module_loader import py_module_loader
+from automata.symbol import parse_symbol
+from automata.symbol.graph.bounding_box_cache import BoundingBoxCache
+from automata.symbol.graph.symbol_graph_labelled import LabelledMultiDiGraph
+from automata.symbol.graph.symbol_navigator import (
+    SymbolGraphNavigator,
+    process_module_bounds,
+)
+
+SYMBOL_PREFIX = "scip-python python automata v0.0.0 "
+
+
+@pytest.fixture
+def project_dir(tmp_path):
+    shutil.copytree(
+        os.path.join(get_root_py_fpath(), "tests", "unit", "sample_modules"),
+        tmp_path / "sample_modules",
+    )
+    py_module_loader.reset()
+    py_module_loader.initialize(str(tmp_path / "sample_modules"), "my_project")
+    yield tmp_path / "sample_modules" / "my_project"
+    py_module_loader.reset()
+
+
+def _navigator():
+    graph = LabelledMultiDiGraph()
+    for uri in (
+        "`my_project.core.calculator`/Calculator#",
+        "`my_project.core.calculator`/Calculator#add().",
+        "`my_project.core.calculator2`/Calculator2#add2().",
+    ):
+        graph.add_node(parse_symbol(SYMBOL_PREFIX + uri), label="symbol")
+    return SymbolGraphNavigator(graph)
+
+
+def _boxes(navigator):
+    return {
+        symbol.uri: (box.top_left.line, box.bottom_right.line)
+        for symbol, box in navigator.bounding_box.items()
+    }
+
+
+def test_bounding_boxes_persist_and_recompute_changed_modules(
+    project_dir, tmp_path
+):
+    cache_path = str(tmp_path / "bounding_boxes.json")
+    navigator = _navigator()
+    cache = BoundingBoxCache(cache_path)
+    navigator._pre_compute_rankable_bounding_boxes(cache)
+    cache.save()
+    expected = _boxes(navigator)
+    assert len(expected) == 3
+    assert expected[
+        SYMBOL_PREFIX + "`my_project.core.calculator`/Calculator#add()."
+    ] == (9, 11)
+
+    # A fresh process reads every bounding box from the cache
+    with patch(
+        "automata.symbol.graph.symbol_navigator.process_module_bounds"
+    ) as mock_process:
+        navigator = _navigator()
+        navigator._pre_compute_rankable_bounding_boxes(
+            BoundingBoxCache(cache_path)
+        )
+    mock_process.assert_not_called()
+    assert _boxes(navigator) == expected
+
+    # Only the edited module is recomputed
+    calculator2 = project_dir / "core" / "calculator2.py"
+    calculator2.write_text("\n\n" + calculator2.read_text())
+    with patch(
+        "automata.symbol.graph.symbol_navigator.process_module_bounds",
+        side_effect=process_module_bounds,
+    ) as mock_process:
+        navigator = _navigator()
+        navigator._pre_compute_rankable_bounding_boxes(
+            BoundingBoxCache(cache_path)
+        )
+    assert mock_process.call_count == 1
+    assert mock_process.call_args.args[0].endswith("calculator2.py")
+    add2 = SYMBOL_PREFIX + "`my_project.core.calculator2`/Calculator2#add2()."
+    assert _boxes(navigator)[add2] == (
+        expected[add2][0] + 2,
+        expected[add2][1] + 2,
+    )
+
+
+def test_bounding_box_cache_ignores_other_format_versions(tmp_path):
+    cache_path = tmp_path / "bounding_boxes.json"
+    cache_path.write_text('{"format_version": -1, "modules": {}}')
+    cache = BoundingBoxCache(str(cache_path))
+    assert len(cache) == 0
+    assert cache.get("my_project.core.calculator", "hash") is None
@@ -0,0 +1,105 @@
+import os
+from collections import Counter
+
+import pytest
+
+from automata.symbol.graph.graph_builder import GraphBuilder
+from automata.symbol.graph.symbol_graph import _load_index_protobuf
+from automata.symbol.graph.symbol_graph_compact import CompactSymbolGraph
+from automata.symbol.graph.symbol_graph_types import SymbolGraphEdgeLabel
+from automata.symbol.graph.symbol_references import DefinitionIndex
+
+
+@pytest.fixture(scope="module")
+def index():
+    file_dir = os.path.dirname(os.path.abspath(__file__))
+    return _load_index_protobuf(
+        os.path.join(file_dir, "..", "..", "test.scip")
+    )
+
+
+def _build(index, num_workers, shard_size=64, aggregate_references=False):
+    builder = GraphBuilder(
+        index,
+        build_references=True,
+        build_relationships=True,
+        build_caller_relationships=False,
+        num_workers=num_workers,
+        shard_size=shard_size,
+        aggregate_references=aggregate_references,
+    )
+    return builder.build_graph(from_pickle=False, save_graph_pickle=False)
+
+
+def test_parallel_build_matches_serial_build(index, graph_edge_counts):
+    serial_graph = _build(index, num_workers=1)
+    parallel_graph = _build(index, num_workers=2, shard_size=7)
+
+    assert dict(serial_graph.nodes(data=True)) == dict(
+        parallel_graph.nodes(data=True)
+    )
+    assert graph_edge_counts(serial_graph) == graph_edge_counts(parallel_graph)
+
+
+def test_each_symbol_has_one_contains_edge(index):
+    graph = _build(index, num_workers=1)
+    contains_counts = Counter(
+        target
+        for _, target, data in graph.edges(data=True)
+        if data.get("label") == "contains"
+    )
+    assert contains_counts
+    assert set(contains_counts.values()) == {1}
+
+
+def test_definition_index_prefers_last_definition():
+    definition_index = DefinitionIndex()
+    definition_index.record("a.py", ["x", "y"], [])
+    definition_index.record("b.py", ["x"], ["y"])
+    definition_index.record("c.py", [], ["y"])
+
+    assert definition_index.get_defining_document("x") == "a.py"
+    assert definition_index.get_defining_document("y") == "c.py"
+    assert definition_index.get_defining_document("z") is None
+    assert dict(definition_index.items()) == {"x": "a.py", "y": "c.py"}
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_aggregated_references_match_occurrence_edges(
+    index, num_workers, graph_edge_counts, graph_references
+):
+    graph = _build(index, num_workers=1)
+    aggregated_graph = _build(
+        index, num_workers=num_workers, shard_size=7, aggregate_references=True
+    )
+
+    assert graph_references(aggregated_graph) == graph_references(graph)
+    reference_counts = [
+        data["reference_count"]
+        for _, __, data in aggregated_graph.edges(data=True)
+        if data.get("label") == "reference"
+    ]
+    assert sum(reference_counts) == graph_edge_counts(graph).total() - sum(
+        1
+        for _, __, data in aggregated_graph.edges(data=True)
+        if data.get("label") != "reference"
+    )
+    assert len(reference_counts) < sum(reference_counts)
+
+
+def test_aggregated_references_survive_compact_round_trip(
+    index, graph_references
+):
+    aggregated_graph = _build(index, num_workers=1, aggregate_references=True)
+    compact_graph = CompactSymbolGraph.from_graph(aggregated_graph)
+
+    assert len(
+        compact_graph.edge_tables[SymbolGraphEdgeLabel.REFERENCE]
+    ) == len(
+        CompactSymbolGraph.from_graph(
+            _build(index, num_workers=1)
+        ).edge_tables[SymbolGraphEdgeLabel.REFERENCE]
+    )
+    assert graph_references(
+        compact_graph.to_graph(aggregate_references=True)
+    ) == graph_references(aggregated_graph)
@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from automata.symbol.graph.graph_builder import GraphBuilder
+from automata.symbol.graph.symbol_graph import _load_index_protobuf
+from automata.symbol.scip_index_reader import ScipIndexReader
+
+
+@pytest.fixture(scope="module")
+def index_path() -> str:
+    file_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(file_dir, "..", "..", "test.scip")
+
+
+@pytest.fixture(scope="module")
+def index(index_path):
+    return _load_index_protobuf(index_path)
+
+
+def test_reader_streams_all_documents(index_path, index):
+    reader = ScipIndexReader(index_path)
+    assert list(reader.documents) == list(index.documents)
+    assert list(reader.iter_serialized_documents()) == [
+        document.SerializeToString() for document in index.documents
+    ]
+
+
+def test_reader_get_document_by_path(index_path, index):
+    reader = ScipIndexReader(index_path)
+    assert list(reader.offset_table) == [
+        document.relative_path for document in index.documents
+    ]
+    document = index.documents[len(index.documents) // 2]
+    assert reader.get_document(document.relative_path) == document
+    assert reader.get_document("missing.py") is None
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_streamed_build_matches_parsed_build(
+    index_path, index, num_workers, graph_edge_counts
+):
+    streamed_graph = GraphBuilder(
+        ScipIndexReader(index_path),
+        True,
+        True,
+        False,
+        num_workers=num_workers,
+        shard_size=7,
+    ).build_graph(from_pickle=False, save_graph_pickle=False)
+    parsed_graph = GraphBuilder(index, True, True, False).build_graph(
+        from_pickle=False, save_graph_pickle=False
+    )
+    assert dict(streamed_graph.nodes(data=True)) == dict(
+        parsed_graph.nodes(data=True)
+    )
+    assert graph_edge_counts(streamed_graph) == graph_edge_counts(parsed_graph)
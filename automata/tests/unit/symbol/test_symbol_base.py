@@ -91,3 +91,20 @@ def test_symbol_hash(parsed_symbol):
         "scip-python python automata v0.0.0 `config.automata_agent_config`/AutomataAgentConfig#description."
     )
     assert hash(parsed_symbol) == hash(symbol)
+
+
+def test_parse_symbol_is_interned(parsed_symbol):
+    symbol = parse_symbol(
+        "scip-python python automata v0.0.0 `config.automata_agent_config`/AutomataAgentConfig#description."
+    )
+    assert symbol is parsed_symbol
+
+
+def test_clear_symbol_table(parsed_symbol):
+    from automata.symbol.symbol_parser import clear_symbol_table
+
+    clear_symbol_table()
+    symbol = parse_symbol(parsed_symbol.uri)
+    assert symbol is not parsed_symbol
+    assert symbol == parsed_symbol
+    assert symbol.dotpath == parsed_symbol.dotpath
@@ -0,0 +1,186 @@
+import logging
+import os
+import shutil
+import textwrap
+
+import pytest
+
+from automata.core.utils import get_root_py_fpath
+from automata.singletons.py_module_loader import py_module_loader
+from automata.symbol import parse_symbol
+from automata.symbol.graph.graph_builder import GraphBuilder
+from automata.symbol.graph.symbol_caller_callees import CallerCalleeProcessor
+from automata.symbol.graph.symbol_graph_labelled import LabelledMultiDiGraph
+from automata.symbol.scip_pb2 import (  # type: ignore
+    Document,
+    Index,
+    Occurrence,
+    SymbolInformation,
+    SymbolRole,
+)
+
+MODULE_SOURCE = textwrap.dedent(
+    """\
+    import functools
+
+
+    class Greeter:
+        def greet(self, name):
+            return self.format_name(name)
+
+        def format_name(self, name):
+            helper = Helper()
+            return helper.shout(name).strip()
+
+        @functools.lru_cache()
+        def cached(self):
+            def inner():
+                return self.greet("x")
+
+            return inner
+
+
+    class Helper:
+        def shout(self, text: str) -> str:
+            return text.upper()
+    """
+)
+
+PREFIX = "scip-python python automata v0.0.0 `my_project.core.calls`/"
+STR = "scip-python python python-stdlib 3.11 builtins/str#"
+DEFINITIONS = [
+    (3, "Greeter", PREFIX + "Greeter#"),
+    (4, "greet", PREFIX + "Greeter#greet()."),
+    (7, "format_name", PREFIX + "Greeter#format_name()."),
+    (12, "cached", PREFIX + "Greeter#cached()."),
+    (13, "inner", "local 0"),
+    (19, "Helper", PREFIX + "Helper#"),
+    (20, "shout", PREFIX + "Helper#shout()."),
+]
+REFERENCES = [
+    (5, "format_name", PREFIX + "Greeter#format_name()."),
+    (8, "Helper", PREFIX + "Helper#"),
+    (9, "shout", PREFIX + "Helper#shout()."),
+    (9, "strip", STR + "strip()."),
+    (
+        11,
+        "lru_cache",
+        "scip-python python python-stdlib 3.11 functools/lru_cache().",
+    ),
+    (14, "greet", PREFIX + "Greeter#greet()."),
+    (20, "str", STR),
+]
+
+
+def _occurrence(line, token, uri, roles):
+    column = MODULE_SOURCE.splitlines()[line].index(token)
+    return Occurrence(
+        range=[line, column, column + len(token)],
+        symbol=uri,
+        symbol_roles=roles,
+    )
+
+
+@pytest.fixture
+def calls_document(tmp_path):
+    shutil.copytree(
+        os.path.join(get_root_py_fpath(), "tests", "unit", "sample_modules"),
+        tmp_path / "sample_modules",
+    )
+    (
+        tmp_path / "sample_modules" / "my_project" / "core" / "calls.py"
+    ).write_text(MODULE_SOURCE)
+    py_module_loader.reset()
+    py_module_loader.initialize(str(tmp_path / "sample_modules"), "my_project")
+    yield Document(
+        relative_path="my_project/core/calls.py",
+        occurrences=[
+            _occurrence(line, token, uri, SymbolRole.Definition)
+            for line, token, uri in DEFINITIONS
+        ]
+        + [
+            _occurrence(line, token, uri, SymbolRole.ReadAccess)
+            for line, token, uri in REFERENCES
+        ],
+        symbols=[
+            SymbolInformation(symbol=uri)
+            for _, __, uri in DEFINITIONS
+            if uri.startswith(PREFIX)
+        ],
+    )
+    py_module_loader.reset()
+
+
+def _edges(graph, label):
+    return {
+        (source.dotpath, target.dotpath)
+        for source, target, data in graph.edges(data=True)
+        if data.get("label") == label
+    }
+
+
+def test_caller_callee_edges_follow_calls(calls_document):
+    graph = LabelledMultiDiGraph()
+    CallerCalleeProcessor(graph, calls_document).process()
+
+    def dotpath(uri):
+        return parse_symbol(uri).dotpath
+
+    expected = {
+        (
+            dotpath(PREFIX + "Greeter#greet()."),
+            dotpath(PREFIX + "Greeter#format_name()."),
+        ),
+        (
+            dotpath(PREFIX + "Greeter#format_name()."),
+            dotpath(PREFIX + "Helper#"),
+        ),
+        (
+            dotpath(PREFIX + "Greeter#format_name()."),
+            dotpath(PREFIX + "Helper#shout()."),
+        ),
+        (
+            dotpath(PREFIX + "Greeter#format_name()."),
+            dotpath(STR + "strip()."),
+        ),
+        # Calls in nested functions belong to the enclosing method
+        (
+            dotpath(PREFIX + "Greeter#cached()."),
+            dotpath(PREFIX + "Greeter#greet()."),
+        ),
+    }
+    # Decorators and annotations are not calls of the method
+    assert _edges(graph, "caller") == expected
+    assert _edges(graph, "callee") == {
+        (callee, caller) for caller, callee in expected
+    }
+
+
+def test_caller_callee_edges_skipped_without_module_loader(calls_document):
+    py_module_loader.reset()
+    graph = LabelledMultiDiGraph()
+    processor = CallerCalleeProcessor(graph, calls_document)
+    processor.process()
+    assert processor.skipped
+    assert graph.number_of_edges() == 0
+
+
+def test_skipped_caller_documents_are_reported_once(calls_document, caplog):
+    py_module_loader.reset()
+    builder = GraphBuilder(
+        Index(documents=[calls_document, calls_document]),
+        build_references=False,
+        build_relationships=False,
+        build_caller_relationships=True,
+    )
+    with caplog.at_level(logging.WARNING):
+        builder._build_graph_from_index()
+    warnings = [
+        record.message
+        for record in caplog.records
+        if record.levelno == logging.WARNING
+    ]
+    assert warnings == [
+        "Skipped caller-callee relationships of 2 documents, as the module loader is not initialized."
+    ]
+    assert builder.skipped_caller_documents == 0
@@ -0,0 +1,166 @@
+import json
+import os
+from unittest import mock
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from automata.core.saved_arrays import MANIFEST_FILE_NAME, StringTable
+from automata.symbol import SymbolGraph, get_rankable_symbols
+from automata.symbol.graph import CompactSymbolGraph
+from automata.symbol.graph.symbol_graph_compact import (
+    COMPACT_GRAPH_FORMAT,
+    decode_relationship_flags,
+    decode_symbol_roles,
+    encode_relationship_flags,
+    encode_symbol_roles,
+    is_saved_graph,
+    save_symbol_digraph,
+)
+
+
+@pytest.fixture(scope="module")
+def index_path() -> str:
+    file_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(file_dir, "..", "..", "test.scip")
+
+
+@pytest.fixture(scope="module")
+def networkx_graph(index_path) -> SymbolGraph:
+    return SymbolGraph(index_path, save_graph_pickle=False, compact=False)
+
+
+@pytest.fixture(scope="module")
+def compact_graph(index_path) -> SymbolGraph:
+    return SymbolGraph(index_path, save_graph_pickle=False, compact=True)
+
+
+def test_roles_round_trip():
+    roles = {"Definition": True, "ReadAccess": True}
+    assert decode_symbol_roles(encode_symbol_roles(roles)) == roles
+    flags = {"isImplementation": True, "isReference": True}
+    assert decode_relationship_flags(encode_relationship_flags(flags)) == flags
+
+
+def test_compact_graph_symbols(networkx_graph, compact_graph):
+    assert isinstance(compact_graph._graph, CompactSymbolGraph)
+    assert (
+        compact_graph.navigator.get_sorted_supported_symbols()
+        == networkx_graph.navigator.get_sorted_supported_symbols()
+    )
+
+
+def test_compact_graph_navigation(networkx_graph, compact_graph):
+    symbols = get_rankable_symbols(
+        networkx_graph.navigator.get_sorted_supported_symbols()
+    )
+    for symbol in symbols[::10]:
+        assert compact_graph.get_references_to_symbol(
+            symbol
+        ) == networkx_graph.get_references_to_symbol(symbol)
+        assert compact_graph.get_symbol_relationships(
+            symbol
+        ) == networkx_graph.get_symbol_relationships(symbol)
+        file_path = networkx_graph.navigator._get_symbol_containing_file(
+            symbol
+        )
+        assert (
+            compact_graph.navigator._get_symbol_containing_file(symbol)
+            == file_path
+        )
+        # In-edges are ordered by source node id, rather than by insertion
+        assert set(
+            compact_graph.navigator._get_references_to_module(file_path)
+        ) == set(networkx_graph.navigator._get_references_to_module(file_path))
+
+
+def test_compact_graph_retain_symbols(index_path):
+    graph = SymbolGraph(index_path, save_graph_pickle=False, compact=True)
+    symbols = graph.navigator.get_sorted_supported_symbols()
+    retained = symbols[: len(symbols) // 2]
+    graph.filter_symbols(retained)
+
+    assert graph.navigator.get_sorted_supported_symbols() == retained
+    removed = set(symbols) - set(retained)
+    file_path = graph.navigator._get_symbol_containing_file(
+        get_rankable_symbols(retained)[0]
+    )
+    assert all(
+        ref.symbol not in removed
+        for ref in graph.navigator._get_references_to_module(file_path)
+    )
+
+
+def test_compact_graph_save_and_load(networkx_graph, tmp_path):
+    compact_graph = CompactSymbolGraph.from_graph(networkx_graph._graph)
+    compact_graph.save(str(tmp_path))
+    assert is_saved_graph(str(tmp_path))
+
+    loaded_graph = CompactSymbolGraph.load(str(tmp_path))
+    assert isinstance(loaded_graph.node_kinds, np.memmap)
+    assert list(loaded_graph.node_names) == list(compact_graph.node_names)
+
+    restored_graph = loaded_graph.to_graph()
+    assert list(restored_graph.nodes(data=True)) == list(
+        networkx_graph._graph.nodes(data=True)
+    )
+    assert [
+        (str(source), str(target), data.get("label"))
+        for source, target, data in restored_graph.edges(data=True)
+    ] == [
+        (str(source), str(target), data.get("label"))
+        for source, target, data in networkx_graph._graph.edges(data=True)
+    ]
+
+
+def test_compact_graph_format_version(networkx_graph, tmp_path):
+    CompactSymbolGraph.from_graph(networkx_graph._graph).save(str(tmp_path))
+    manifest_path = tmp_path / MANIFEST_FILE_NAME
+    manifest = json.loads(manifest_path.read_text())
+    manifest["format_version"] = COMPACT_GRAPH_FORMAT.version + 1
+    manifest_path.write_text(json.dumps(manifest))
+
+    assert not is_saved_graph(str(tmp_path))
+    with pytest.raises(ValueError):
+        CompactSymbolGraph.load(str(tmp_path))
+
+
+def test_compact_graph_rejects_other_artifacts(tmp_path):
+    save_symbol_digraph(nx.DiGraph(), str(tmp_path))
+
+    assert not is_saved_graph(str(tmp_path))
+    with pytest.raises(ValueError):
+        CompactSymbolGraph.load(str(tmp_path))
+
+
+def test_saving_over_a_loaded_graph(networkx_graph, tmp_path):
+    compact_graph = CompactSymbolGraph.from_graph(networkx_graph._graph)
+    compact_graph.save(str(tmp_path))
+    loaded_graph = CompactSymbolGraph.load(str(tmp_path))
+    node_names = list(loaded_graph.node_names)
+
+    # Arrays memory-mapped from the earlier save are left intact
+    CompactSymbolGraph.from_graph(
+        networkx_graph._graph.subgraph(list(networkx_graph._graph)[:10])
+    ).save(str(tmp_path))
+    assert len(CompactSymbolGraph.load(str(tmp_path)).node_names) == 10
+    assert list(loaded_graph.node_names) == node_names
+
+    # A failed save leaves no manifest over its partly written arrays
+    with mock.patch("numpy.save", side_effect=OSError):
+        with pytest.raises(OSError):
+            compact_graph.save(str(tmp_path))
+    assert not os.path.exists(tmp_path / MANIFEST_FILE_NAME)
+    assert not is_saved_graph(str(tmp_path))
+    assert not [
+        name for name in os.listdir(tmp_path) if name.startswith(".saving-")
+    ]
+
+
+def test_string_table_lookup():
+    strings = ["b", "a", "c d", "é"]
+    table = StringTable.from_strings(strings)
+    assert list(table) == strings
+    assert [table.get_id(string) for string in strings] == [0, 1, 2, 3]
+    assert table.get_id("missing") is None
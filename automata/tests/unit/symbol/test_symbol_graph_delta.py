@@ -0,0 +1,139 @@
+import copy
+import os
+from unittest import mock
+
+import networkx as nx
+import pytest
+
+from automata.symbol import SymbolGraph
+from automata.symbol.graph.graph_builder import GraphBuilder
+from automata.symbol.graph.symbol_graph import _load_index_protobuf
+from automata.symbol.graph.symbol_graph_compact import CompactSymbolGraph
+
+
+@pytest.fixture
+def index_path() -> str:
+    file_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(file_dir, "..", "..", "test.scip")
+
+
+@pytest.fixture
+def new_index(index_path):
+    index = copy.deepcopy(_load_index_protobuf(index_path))
+    # Modify one document, delete another and rename a third
+    document = index.documents[3]
+    del document.occurrences[len(document.occurrences) // 2 :]
+    del document.symbols[-1]
+    del index.documents[5]
+    index.documents[7].relative_path += "_renamed.py"
+    return index
+
+
+def test_apply_index_delta_matches_rebuild(
+    index_path, new_index, graph_edge_counts
+):
+    graph = SymbolGraph(index_path, save_graph_pickle=False)
+    affected_symbols = graph.apply_index_delta(new_index)
+    assert affected_symbols
+
+    rebuilt_graph = GraphBuilder(new_index, True, True, True).build_graph(
+        from_pickle=False, save_graph_pickle=False
+    )
+    assert dict(graph._graph.nodes(data=True)) == dict(
+        rebuilt_graph.nodes(data=True)
+    )
+    assert graph_edge_counts(graph._graph) == graph_edge_counts(rebuilt_graph)
+
+
+def test_apply_index_delta_converts_compact_graph(index_path, new_index):
+    graph = SymbolGraph(index_path, save_graph_pickle=False)
+    assert isinstance(graph._graph, CompactSymbolGraph)
+    symbol = graph._get_sorted_supported_symbols()[0]
+    graph.navigator.bounding_box[symbol] = None
+
+    affected_symbols = graph.apply_index_delta(new_index)
+    assert isinstance(graph._graph, nx.MultiDiGraph)
+    assert graph.navigator._graph is graph._graph
+    assert (symbol in graph.navigator.bounding_box) == (
+        symbol not in affected_symbols
+    )
+
+
+def test_apply_index_delta_with_aggregated_references(
+    index_path, new_index, graph_references
+):
+    graph = SymbolGraph(
+        index_path, save_graph_pickle=False, aggregate_references=True
+    )
+    graph.apply_index_delta(new_index)
+
+    rebuilt_graph = GraphBuilder(
+        new_index, True, True, True, aggregate_references=True
+    ).build_graph(from_pickle=False, save_graph_pickle=False)
+    assert graph_references(graph._graph) == graph_references(rebuilt_graph)
+
+
+def test_apply_index_delta_without_changes(index_path):
+    graph = SymbolGraph(index_path, save_graph_pickle=False)
+    assert graph.apply_index_delta(_load_index_protobuf(index_path)) == set()
+
+
+def test_apply_index_delta_updates_rankable_subgraph(
+    index_path, new_index, fake_symbol_dependencies
+):
+    graph = SymbolGraph(index_path, save_graph_pickle=False)
+    fake_symbol_dependencies(graph)
+    subgraph = graph.default_rankable_subgraph
+    graph.apply_index_delta(new_index)
+    assert graph.default_rankable_subgraph is subgraph
+
+    with mock.patch(
+        "automata.symbol.graph.symbol_graph._load_index_protobuf",
+        return_value=new_index,
+    ):
+        rebuilt_graph = SymbolGraph(index_path, save_graph_pickle=False)
+    fake_symbol_dependencies(rebuilt_graph)
+    rebuilt_subgraph = rebuilt_graph.default_rankable_subgraph
+
+    assert set(subgraph.edges()) == set(rebuilt_subgraph.edges())
+
+
+def test_apply_index_delta_to_loaded_graph(
+    index_path, new_index, tmp_data_path, graph_edge_counts
+):
+    built_graph = SymbolGraph(
+        index_path, from_pickle=True, save_graph_pickle=True
+    )
+    loaded_graph = SymbolGraph(
+        index_path, from_pickle=True, save_graph_pickle=False
+    )
+    # Documents are only read back from disk once a delta needs them
+    assert loaded_graph._document_records is None
+
+    affected_symbols = loaded_graph.apply_index_delta(new_index)
+    assert affected_symbols == built_graph.apply_index_delta(new_index)
+    assert dict(loaded_graph._graph.nodes(data=True)) == dict(
+        built_graph._graph.nodes(data=True)
+    )
+    assert graph_edge_counts(loaded_graph._graph) == graph_edge_counts(
+        built_graph._graph
+    )
+
+
+def test_apply_index_delta_to_graph_without_records(
+    index_path, new_index, graph_edge_counts
+):
+    graph = SymbolGraph.from_graph(
+        SymbolGraph(index_path, save_graph_pickle=False)._graph
+    )
+    # The first delta rebuilds the graph, which has no document records
+    assert graph.apply_index_delta(new_index)
+    assert graph.apply_index_delta(new_index) == set()
+
+    rebuilt_graph = GraphBuilder(new_index, True, True, True).build_graph(
+        from_pickle=False, save_graph_pickle=False
+    )
+    assert dict(graph._graph.nodes(data=True)) == dict(
+        rebuilt_graph.nodes(data=True)
+    )
+    assert graph_edge_counts(graph._graph) == graph_edge_counts(rebuilt_graph)
@@ -0,0 +1,94 @@
+import os
+
+import networkx as nx
+import pytest
+
+from automata.symbol.graph.graph_builder import GraphBuilder
+from automata.symbol.graph.symbol_graph import (
+    SymbolGraph,
+    _load_index_protobuf,
+)
+from automata.symbol.graph.symbol_graph_labelled import LabelledMultiDiGraph
+
+
+def _assert_index_matches_edges(graph: LabelledMultiDiGraph) -> None:
+    labels = {data.get("label") for _, __, data in graph.edges(data=True)}
+    for node in graph.nodes():
+        for label in labels:
+            assert list(graph.out_edges_with_label(node, label)) == [
+                (source, target, data)
+                for source, target, data in graph.out_edges(node, data=True)
+                if data.get("label") == label
+            ]
+            assert sorted(
+                map(repr, graph.in_edges_with_label(node, label))
+            ) == sorted(
+                repr((source, target, data))
+                for source, target, data in graph.in_edges(node, data=True)
+                if data.get("label") == label
+            )
+
+
+@pytest.fixture(scope="module")
+def built_graph() -> LabelledMultiDiGraph:
+    file_dir = os.path.dirname(os.path.abspath(__file__))
+    index = _load_index_protobuf(
+        os.path.join(file_dir, "..", "..", "test.scip")
+    )
+    return GraphBuilder(index, True, True, False).build_graph(
+        from_pickle=False, save_graph_pickle=False
+    )
+
+
+def test_graph_builder_maintains_label_index(built_graph):
+    assert isinstance(built_graph, LabelledMultiDiGraph)
+    _assert_index_matches_edges(built_graph)
+
+
+def test_label_index_follows_mutations():
+    graph = LabelledMultiDiGraph()
+    graph.add_edge("a", "b", label="reference")
+    graph.add_edge("a", "b", label="contains")
+    graph.add_edges_from(
+        [("b", "c", {"label": "reference"}), ("c", "a", 0, {"label": "x"})]
+    )
+    graph.add_edge("a", "a", label="reference")
+    _assert_index_matches_edges(graph)
+
+    graph.remove_edge("a", "b")
+    _assert_index_matches_edges(graph)
+    assert list(graph.out_edges_with_label("a", "contains")) == []
+
+    graph.remove_node("a")
+    _assert_index_matches_edges(graph)
+    assert list(graph.in_edges_with_label("c", "reference")) == [
+        ("b", "c", {"label": "reference"})
+    ]
+
+    copied_graph = graph.copy()
+    assert isinstance(copied_graph, LabelledMultiDiGraph)
+    _assert_index_matches_edges(copied_graph)
+
+    with pytest.raises(nx.NetworkXError):
+        list(graph.out_edges_with_label("missing", "reference"))
+
+
+def test_filter_symbols_keeps_label_index(built_graph):
+    symbol_graph = SymbolGraph.from_graph(built_graph.copy())
+    symbol_graph.is_synchronized = True
+    symbols = symbol_graph.get_sorted_supported_symbols()
+    retained = symbols[::2]
+    non_symbol_nodes = {
+        node
+        for node, label in built_graph.nodes(data="label")
+        if label != "symbol"
+    }
+
+    symbol_graph.filter_symbols(retained)
+
+    assert symbol_graph.get_sorted_supported_symbols() == retained
+    assert non_symbol_nodes <= set(symbol_graph._graph.nodes())
+    _assert_index_matches_edges(symbol_graph._graph)
+    assert (
+        built_graph.number_of_nodes() > symbol_graph._graph.number_of_nodes()
+    )
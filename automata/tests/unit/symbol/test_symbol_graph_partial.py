@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from automata.symbol import SymbolGraph, get_rankable_symbols
+
+
+@pytest.fixture(scope="module")
+def index_path() -> str:
+    file_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(file_dir, "..", "..", "test.scip")
+
+
+@pytest.fixture(scope="module")
+def full_graph(index_path) -> SymbolGraph:
+    return SymbolGraph(index_path, save_graph_pickle=False)
+
+
+@pytest.fixture
+def partial_graph(index_path) -> SymbolGraph:
+    return SymbolGraph(
+        index_path,
+        save_graph_pickle=False,
+        path_prefixes=["automata/cli/"],
+    )
+
+
+def _defining_paths(graph: SymbolGraph):
+    return {
+        symbol: graph.navigator._get_symbol_containing_file(symbol)
+        for symbol in get_rankable_symbols(
+            graph.navigator.get_sorted_supported_symbols()
+        )
+    }
+
+
+def test_partial_graph_loads_scope_and_one_hop(partial_graph, full_graph):
+    loaded_paths = partial_graph.loaded_paths
+    all_paths = set(partial_graph._index_reader.offset_table)
+    assert partial_graph.is_partial
+    assert any(path.startswith("automata/cli/") for path in loaded_paths)
+    assert any(not path.startswith("automata/cli/") for path in loaded_paths)
+    assert loaded_paths < all_paths
+
+    for symbol, file_path in _defining_paths(partial_graph).items():
+        if file_path.startswith("automata/cli/"):
+            assert set(
+                partial_graph.navigator._get_references_to_module(file_path)
+            ) == set(full_graph.navigator._get_references_to_module(file_path))
+            assert partial_graph.get_symbol_relationships(
+                symbol
+            ) == full_graph.get_symbol_relationships(symbol)
+
+
+def test_partial_graph_expands_on_demand(partial_graph, full_graph):
+    symbol, file_path = next(
+        (symbol, file_path)
+        for symbol, file_path in _defining_paths(full_graph).items()
+        if file_path not in partial_graph.loaded_paths
+    )
+    assert symbol not in partial_graph._graph
+
+    assert partial_graph.get_symbol_relationships(
+        symbol
+    ) == full_graph.get_symbol_relationships(symbol)
+    assert file_path in partial_graph.loaded_paths
+    assert (
+        partial_graph.navigator._get_symbol_containing_file(symbol)
+        == file_path
+    )
+
+
+def test_partial_graph_rejects_compact(index_path):
+    with pytest.raises(ValueError):
+        SymbolGraph(
+            index_path,
+            save_graph_pickle=False,
+            compact=True,
+            path_prefixes=["automata/cli/"],
+        )
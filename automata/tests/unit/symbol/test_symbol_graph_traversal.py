@@ -0,0 +1,137 @@
+import os
+
+import networkx as nx
+import pytest
+
+from automata.symbol import Symbol, SymbolGraph
+from automata.symbol.graph.symbol_graph_labelled import LabelledMultiDiGraph
+from automata.symbol.graph.symbol_graph_traversal import AdjacencyIndex
+from automata.symbol.graph.symbol_graph_types import SymbolGraphEdgeLabel
+
+CALLER = SymbolGraphEdgeLabel.CALLER
+RELATIONSHIP = SymbolGraphEdgeLabel.RELATIONSHIP
+
+
+@pytest.fixture
+def adjacency_index():
+    graph = LabelledMultiDiGraph()
+    graph.add_edges_from(
+        [
+            ("a", "b", {"label": "caller"}),
+            ("a", "b", {"label": "caller"}),
+            ("b", "c", {"label": "caller"}),
+            ("c", "a", {"label": "caller"}),
+            ("c", "d", {"label": "caller"}),
+            ("d", "e", {"label": "relationship"}),
+            ("x", "y", {"label": "caller"}),
+        ]
+    )
+    return AdjacencyIndex.from_graph(graph)
+
+
+def test_traverse_from_many_sources(adjacency_index):
+    assert adjacency_index.traverse(["a", "x"], max_hops=2) == {
+        "a": 0,
+        "x": 0,
+        "b": 1,
+        "y": 1,
+        "c": 2,
+    }
+    assert adjacency_index.traverse(["a"]) == {
+        "a": 0,
+        "b": 1,
+        "c": 2,
+        "d": 3,
+        "e": 4,
+    }
+    assert adjacency_index.traverse(["a", "missing"], labels=[CALLER]) == {
+        "a": 0,
+        "b": 1,
+        "c": 2,
+        "d": 3,
+    }
+    assert adjacency_index.traverse(["d"], reverse=True) == {
+        "d": 0,
+        "c": 1,
+        "b": 2,
+        "a": 3,
+    }
+
+
+def test_traverse_stops_at_node_budget(adjacency_index):
+    assert adjacency_index.traverse(["a", "x"], max_nodes=3) == {
+        "a": 0,
+        "x": 0,
+        "b": 1,
+        "y": 1,
+        "c": 2,
+    }
+    assert adjacency_index.traverse(["a", "x"], max_nodes=1) == {
+        "a": 0,
+        "x": 0,
+        "b": 1,
+    }
+
+
+def test_transitive_closures_are_memoized(adjacency_index):
+    assert sorted(adjacency_index.transitive_closure("d")) == ["e"]
+    # The closure of "a" reuses that of "d", and excludes "a" despite the cycle
+    assert sorted(adjacency_index.transitive_closure("a")) == [
+        "b",
+        "c",
+        "d",
+        "e",
+    ]
+    assert sorted(adjacency_index.transitive_closure("b", [CALLER])) == [
+        "a",
+        "c",
+        "d",
+    ]
+    assert sorted(
+        adjacency_index.transitive_closure("e", [RELATIONSHIP], True)
+    ) == ["d"]
+    assert adjacency_index.transitive_closure("missing") == []
+
+
+@pytest.fixture(scope="module")
+def index_path() -> str:
+    file_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(file_dir, "..", "..", "test.scip")
+
+
+@pytest.fixture(scope="module")
+def networkx_graph(index_path) -> nx.MultiDiGraph:
+    return SymbolGraph(
+        index_path, save_graph_pickle=False, compact=False
+    )._graph
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_traversals_match_networkx(index_path, networkx_graph, compact):
+    symbol_graph = SymbolGraph(
+        index_path, save_graph_pickle=False, compact=compact
+    )
+    symbols = symbol_graph._get_sorted_supported_symbols()[:3]
+
+    assert symbol_graph.get_neighbourhood(
+        symbols, max_hops=3
+    ) == nx.multi_source_dijkstra_path_length(
+        networkx_graph, set(symbols), cutoff=3
+    )
+
+    labels = [SymbolGraphEdgeLabel.REFERENCE, SymbolGraphEdgeLabel.CONTAINS]
+    label_values = {label.value for label in labels}
+    labelled_graph = nx.subgraph_view(
+        networkx_graph,
+        filter_edge=lambda source, target, key: networkx_graph.edges[
+            source, target, key
+        ]["label"]
+        in label_values,
+    )
+    closures = symbol_graph.get_transitive_dependencies(symbols, labels)
+    for symbol in symbols:
+        assert closures[symbol] == {
+            node
+            for node in nx.descendants(labelled_graph, symbol)
+            if isinstance(node, Symbol)
+        }
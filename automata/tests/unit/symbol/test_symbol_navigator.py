@@ -0,0 +1,55 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from automata.symbol import SymbolGraph, get_rankable_symbols
+
+
+@pytest.fixture(scope="module")
+def symbol_graph() -> SymbolGraph:
+    file_dir = os.path.dirname(os.path.abspath(__file__))
+    index_path = os.path.join(file_dir, "..", "..", "test.scip")
+    return SymbolGraph(index_path, save_graph_pickle=False)
+
+
+def _bounding_box(start_line: int, start_column: int, end_line: int):
+    return SimpleNamespace(
+        top_left=SimpleNamespace(line=start_line, column=start_column),
+        bottom_right=SimpleNamespace(line=end_line, column=0),
+    )
+
+
+def test_references_in_scope_match_linear_scan(symbol_graph):
+    navigator = symbol_graph.navigator
+    symbols = get_rankable_symbols(navigator.get_sorted_supported_symbols())
+    for i, symbol in enumerate(symbols[::5]):
+        bounding_box = _bounding_box(i % 40, i % 7, i % 40 + 25)
+        navigator.bounding_box[symbol] = bounding_box
+        file_path = navigator._get_symbol_containing_file(symbol)
+        expected = [
+            ref
+            for ref in navigator._get_references_to_module(file_path)
+            if bounding_box.top_left.line
+            <= ref.line_number
+            < bounding_box.bottom_right.line
+            and ref.column_number >= bounding_box.top_left.column
+        ]
+        references_in_scope = navigator._get_symbol_references_in_scope(symbol)
+        assert sorted(references_in_scope, key=repr) == sorted(
+            expected, key=repr
+        )
+        assert [ref.line_number for ref in references_in_scope] == sorted(
+            ref.line_number for ref in references_in_scope
+        )
+
+
+def test_invalidate_module_references(symbol_graph):
+    navigator = symbol_graph.navigator
+    symbol = get_rankable_symbols(navigator.get_sorted_supported_symbols())[0]
+    file_path = navigator._get_symbol_containing_file(symbol)
+    line_numbers, _ = navigator._get_module_reference_index(file_path)
+
+    navigator.invalidate_module_references([file_path])
+    assert file_path not in navigator._module_reference_index
+    assert navigator._get_module_reference_index(file_path)[0] == line_numbers
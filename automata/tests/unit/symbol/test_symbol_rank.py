@@ -1,10 +1,16 @@
 import random
+from unittest.mock import MagicMock, patch
 
 import networkx as nx
+import numpy as np
 import pytest
 from networkx import DiGraph
 
 from automata.experimental.search import SymbolRank, SymbolRankConfig
+from automata.experimental.search.symbol_rank import RankVectorStore
+from automata.symbol import parse_symbol
+from automata.symbol.graph.symbol_graph_metrics import SymbolGraphMetrics
+from automata.symbol.graph.symbol_rank_basis import SymbolRankBasis
 
 
 def generate_random_graph(nodes, edges):
@@ -78,3 +84,324 @@ def test_get_ranks_small_graph():
     ranks = pagerank.get_ordered_ranks()
     assert len(ranks) == 3
     assert sum(ele[1] for ele in ranks) == pytest.approx(1.0)
+
+
+def test_global_metrics_match_ranks():
+    G = generate_random_graph(50, 150)
+    config = SymbolRankConfig()
+    expected = SymbolRank(G, config).get_ordered_ranks()
+
+    metrics = SymbolGraphMetrics.compute(
+        G,
+        nx.MultiDiGraph(),
+        config.alpha,
+        config.max_iterations,
+        config.tolerance,
+    )
+    assert [node for node, _ in metrics.get_ordered_ranks()] == [
+        node for node, _ in expected
+    ]
+    assert dict(metrics.get_ordered_ranks()) == pytest.approx(dict(expected))
+    assert metrics.get_symbol_metrics(expected[0][0]) == {
+        "rank": pytest.approx(expected[0][1]),
+        "in_degree": G.in_degree(expected[0][0]),
+        "out_degree": G.out_degree(expected[0][0]),
+        "reference_count": 0,
+    }
+
+
+def test_global_metrics_use_edge_weights():
+    G = generate_random_graph(30, 90)
+    for source, target in G.edges():
+        G[source][target]["weight"] = random.uniform(0.1, 10.0)
+    config = SymbolRankConfig()
+    expected = SymbolRank(G, config).get_ordered_ranks()
+
+    metrics = SymbolGraphMetrics.compute(
+        G,
+        nx.MultiDiGraph(),
+        config.alpha,
+        config.max_iterations,
+        config.tolerance,
+        config.weight_key,
+    )
+    assert dict(metrics.get_ordered_ranks()) == pytest.approx(dict(expected))
+    assert not metrics.matches(
+        config.alpha, config.max_iterations, config.tolerance, "other"
+    )
+
+
+def test_get_top_symbols_reads_global_metrics():
+    G = generate_random_graph(10, 20)
+    config = SymbolRankConfig()
+    metrics = SymbolGraphMetrics.compute(
+        G,
+        nx.MultiDiGraph(),
+        config.alpha,
+        config.max_iterations,
+        config.tolerance,
+    )
+    rank = SymbolRank(G, config, metrics=metrics)
+    with patch.object(rank, "_get_transition_matrix") as mock_transition:
+        assert rank.get_ordered_ranks() == metrics.get_ordered_ranks()
+    mock_transition.assert_not_called()
+
+    # Metrics computed with another config are ignored
+    other_config = SymbolRankConfig(alpha=0.5)
+    other_rank = SymbolRank(G, other_config, metrics=metrics)
+    with patch.object(
+        other_rank,
+        "_get_transition_matrix",
+        wraps=other_rank._get_transition_matrix,
+    ) as mock_transition:
+        other_rank.get_ordered_ranks()
+    mock_transition.assert_called_once()
+
+    # Metrics computed for another graph of the same size are ignored
+    other_graph = G.copy()
+    other_graph.remove_edge(*next(iter(G.edges())))
+    other_rank = SymbolRank(other_graph, config, metrics=metrics)
+    assert other_rank._get_global_metrics() is None
+
+
+def test_global_metrics_are_loaded_lazily():
+    G = generate_random_graph(10, 20)
+    config = SymbolRankConfig()
+    metrics = SymbolGraphMetrics.compute(
+        G,
+        nx.MultiDiGraph(),
+        config.alpha,
+        config.max_iterations,
+        config.tolerance,
+    )
+    get_metrics = MagicMock(return_value=metrics)
+    rank = SymbolRank(G, config, get_metrics=get_metrics)
+
+    rank.get_ordered_ranks(
+        query_to_symbol_similarity={node: 1.0 for node in G}
+    )
+    get_metrics.assert_not_called()
+    assert rank.get_ordered_ranks() == metrics.get_ordered_ranks()
+    get_metrics.assert_called_once()
+
+
+@pytest.mark.parametrize("directed", [True, False])
+def test_ranks_match_pagerank(directed):
+    G = generate_random_graph(50, 150)
+    if not directed:
+        G = G.to_undirected()
+    config = SymbolRankConfig()
+    similarity = {node: random.random() for node in G}
+    dangling = {node: random.random() for node in G}
+
+    ranks = SymbolRank(G, config).get_ordered_ranks(
+        query_to_symbol_similarity=similarity, dangling=dangling
+    )
+    expected = nx.pagerank(
+        G,
+        alpha=config.alpha,
+        personalization=similarity,
+        dangling=dangling,
+        max_iter=config.max_iterations,
+        tol=config.tolerance,
+    )
+    assert dict(ranks) == pytest.approx(expected, rel=1e-9)
+    assert [rank for _, rank in ranks] == sorted(
+        (rank for _, rank in ranks), reverse=True
+    )
+
+
+def test_transition_matrix_follows_graph_revisions():
+    G = generate_random_graph(10, 20)
+    rank = SymbolRank(G, SymbolRankConfig())
+    transition_matrix = rank._get_transition_matrix()
+    assert rank._get_transition_matrix() is transition_matrix
+
+    G.graph["revision"] = 1
+    assert rank._get_transition_matrix() is not transition_matrix
+
+
+def test_batched_ranks_match_single_queries():
+    G = generate_random_graph(50, 150)
+    rank = SymbolRank(G, SymbolRankConfig())
+    # Skewed queries converge after more iterations than uniform ones
+    queries = [None] + [
+        {node: random.random() ** power for node in G} for power in (1, 8)
+    ]
+    dangling = {node: random.random() for node in G}
+
+    assert rank.get_ordered_ranks_batch(queries) == [
+        rank.get_ordered_ranks(query_to_symbol_similarity=query)
+        for query in queries
+    ]
+    assert rank.get_ordered_ranks_batch(queries, dangling=dangling) == [
+        rank.get_ordered_ranks(
+            query_to_symbol_similarity=query, dangling=dangling
+        )
+        for query in queries
+    ]
+    assert rank.get_ordered_ranks_batch([]) == []
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_approximate_top_ranks_match_exact_ranks(seed):
+    random.seed(seed)
+    # Sparse enough to leave dangling nodes
+    G = generate_random_graph(200, 300)
+    similarity = {node: random.random() ** 4 for node in G}
+    exact = SymbolRank(G, SymbolRankConfig()).get_ordered_ranks(
+        query_to_symbol_similarity=similarity
+    )
+
+    rank = SymbolRank(G, SymbolRankConfig(approximate_top_k=10))
+    approximate = rank.get_ordered_ranks(query_to_symbol_similarity=similarity)
+    assert [node for node, _ in approximate] == [
+        node for node, _ in exact[:10]
+    ]
+    assert dict(approximate) == pytest.approx(dict(exact[:10]), rel=1e-3)
+    assert rank.get_ordered_ranks_batch([similarity, None, similarity]) == [
+        approximate,
+        SymbolRank(G, SymbolRankConfig()).get_ordered_ranks(),
+        approximate,
+    ]
+
+    # Queries without personalization, or with initial weights, are ranked exactly
+    assert (
+        rank.get_ordered_ranks()
+        == SymbolRank(G, SymbolRankConfig()).get_ordered_ranks()
+    )
+    initial_weights = {node: 1.0 for node in G}
+    assert rank.get_ordered_ranks(
+        query_to_symbol_similarity=similarity, initial_weights=initial_weights
+    ) == SymbolRank(G, SymbolRankConfig()).get_ordered_ranks(
+        query_to_symbol_similarity=similarity, initial_weights=initial_weights
+    )
+
+
+def test_approximate_top_ranks_config():
+    with pytest.raises(ValueError):
+        SymbolRankConfig.validate_config(SymbolRankConfig(approximate_top_k=0))
+    with pytest.raises(ValueError):
+        SymbolRankConfig.validate_config(SymbolRankConfig(push_threshold=1.0))
+
+    # Graphs with at most k nodes are ranked exactly
+    G = generate_random_graph(5, 10)
+    assert len(
+        SymbolRank(
+            G, SymbolRankConfig(approximate_top_k=10)
+        ).get_ordered_ranks()
+    ) == len(G)
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_basis_ranks_match_exact_ranks(num_workers):
+    random.seed(0)
+    G = generate_random_graph(300, 450)
+    similarity = {node: random.random() ** 4 for node in G}
+    dangling = {node: random.random() for node in G}
+    config = SymbolRankConfig()
+    exact = SymbolRank(G, config)
+
+    full_basis = SymbolRankBasis.compute(
+        G, config.alpha, len(G), num_workers=num_workers
+    )
+    rank = SymbolRank(
+        G, SymbolRankConfig(basis_top_k=len(G)), basis=full_basis
+    )
+    # Compared to tightly converged ranks, as SymbolRank stops at N * tolerance
+    for weights in (None, dangling):
+        assert dict(
+            rank.get_ordered_ranks(
+                query_to_symbol_similarity=similarity, dangling=weights
+            )
+        ) == pytest.approx(
+            nx.pagerank(
+                G,
+                alpha=config.alpha,
+                personalization=similarity,
+                dangling=weights,
+                tol=1e-14,
+                max_iter=1000,
+            ),
+            abs=1e-8,
+        )
+
+    # Truncated bases keep the order of the top ranks
+    basis = SymbolRankBasis.compute(G, config.alpha, 30)
+    assert np.diff(basis.matrix.indptr).max() <= 30
+    rank = SymbolRank(G, SymbolRankConfig(basis_top_k=30), basis=basis)
+    assert [
+        node
+        for node, _ in rank.get_ordered_ranks(
+            query_to_symbol_similarity=similarity
+        )[:10]
+    ] == [
+        node
+        for node, _ in exact.get_ordered_ranks(
+            query_to_symbol_similarity=similarity
+        )[:10]
+    ]
+
+    # A basis computed for another config is ignored
+    assert SymbolRank(G, config, basis=basis)._get_rank_basis() is None
+
+    # As is a basis computed for a graph with other edges, but as many nodes
+    other_graph = G.copy()
+    other_graph.remove_edge(*next(iter(G.edges())))
+    other_rank = SymbolRank(
+        other_graph, SymbolRankConfig(basis_top_k=30), basis=basis
+    )
+    assert other_rank._get_rank_basis() is None
+    # The fingerprint is checked again once the graph is modified
+    other_graph.add_edge(*next(iter(G.edges())))
+    other_graph.graph["revision"] = 1
+    assert other_rank._get_rank_basis() is basis
+    with pytest.raises(ValueError):
+        SymbolRankConfig.validate_config(SymbolRankConfig(basis_top_k=0))
+
+
+def test_warm_start_from_similar_queries(tmp_path):
+    random.seed(0)
+    G = nx.relabel_nodes(
+        generate_random_graph(200, 600),
+        {
+            i: parse_symbol(
+                f"scip-python python automata v0.0.0 `my_project.core`/f{i}()."
+            )
+            for i in range(200)
+        },
+    )
+    similarity = {node: random.random() ** 4 for node in G}
+    # A query which differs slightly from the first
+    similar = {
+        node: value * random.uniform(0.9, 1.1)
+        for node, value in similarity.items()
+    }
+
+    cold = SymbolRank(G, SymbolRankConfig())
+    cold.get_ordered_ranks_batch([similarity, similar])
+    cold_iterations = [len(history) for history in cold.convergence_history]
+
+    rank = SymbolRank(G, SymbolRankConfig(warm_start=True))
+    expected = rank.get_ordered_ranks(query_to_symbol_similarity=similarity)
+    assert len(rank.convergence_history[0]) == cold_iterations[0]
+    ranks = rank.get_ordered_ranks(query_to_symbol_similarity=similar)
+    assert len(rank.convergence_history[0]) < cold_iterations[1]
+    assert dict(ranks) == pytest.approx(
+        dict(cold.get_ordered_ranks(query_to_symbol_similarity=similar)),
+        abs=1e-5,
+    )
+
+    # Stored ranks are saved, and reordered to the nodes of the graph on load
+    rank.rank_store.save(str(tmp_path / "ranks"))
+    loaded = RankVectorStore.load(str(tmp_path / "ranks"))
+    assert len(loaded) == 2
+    warm = SymbolRank(G, SymbolRankConfig(warm_start=True), rank_store=loaded)
+    assert dict(
+        warm.get_ordered_ranks(query_to_symbol_similarity=similarity)
+    ) == pytest.approx(dict(expected), abs=1e-5)
+    assert len(warm.convergence_history[0]) <= 2
+    with pytest.raises(ValueError):
+        SymbolRankConfig.validate_config(
+            SymbolRankConfig(warm_start_capacity=0)
+        )
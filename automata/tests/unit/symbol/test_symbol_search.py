@@ -1,10 +1,20 @@
 import ast
+import random
 from unittest.mock import MagicMock
 
+import networkx as nx
+import numpy as np
 import pytest
 from astunparse import unparse as py_ast_unparse
 
+from automata.embedding import (
+    EmbeddingSimilarityCalculator,
+    EmbeddingVectorProvider,
+)
+from automata.experimental.search import SymbolRankConfig, SymbolSearch
 from automata.experimental.tools import SymbolSearchToolkitBuilder
+from automata.symbol import parse_symbol
+from automata.symbol_embedding import SymbolCodeEmbedding
 from automata.tools.tool_base import Tool
 
 
@@ -82,3 +92,69 @@ def test_process_query(symbol_search_tool_builder):
     for tool in tools:
         if tool.name == "process-query":
             assert tool.function("query") == "Processed query"
+
+
+def test_symbol_rank_results_match_dict_pipeline():
+    random.seed(0)
+    symbols = [
+        parse_symbol(
+            f"scip-python python automata v0.0.0 `my_project.core`/f{i}()."
+        )
+        for i in range(60)
+    ]
+    graph = nx.DiGraph()
+    graph.add_nodes_from(symbols[:50])
+    for _ in range(120):
+        graph.add_edge(
+            random.choice(symbols[:50]), random.choice(symbols[:50])
+        )
+    # Symbols outside of the graph are embedded as well
+    embeddings = [
+        SymbolCodeEmbedding(
+            key=symbol, vector=np.random.rand(8), document=symbol.uri
+        )
+        for symbol in symbols
+    ]
+    handler = MagicMock()
+    handler.get_all_ordered_embeddings.return_value = embeddings
+    provider = MagicMock(EmbeddingVectorProvider)
+    provider.build_embedding_vector.return_value = np.random.rand(8)
+    calculator = EmbeddingSimilarityCalculator(provider)
+    symbol_graph = MagicMock()
+    symbol_graph.default_rankable_subgraph = graph
+    symbol_search = SymbolSearch(
+        symbol_graph, SymbolRankConfig(), handler, calculator
+    )
+
+    query_to_symbol_similarity = SymbolSearch.transform_dict_values(
+        calculator.calculate_query_similarity_dict(embeddings, "query"),
+        symbol_search.shifted_z_score_powered,
+    )
+    expected = symbol_search.symbol_rank.get_ordered_ranks(
+        query_to_symbol_similarity=query_to_symbol_similarity
+    )
+    results = symbol_search.get_symbol_rank_results("query")
+    assert [symbol for symbol, _ in results] == [
+        symbol for symbol, _ in expected
+    ]
+    assert [rank for _, rank in results] == pytest.approx(
+        [rank for _, rank in expected]
+    )
+    assert symbol_search.get_symbol_rank_results("query", top_n=5) == (
+        results[:5]
+    )
+    for batch_results in symbol_search.get_symbol_rank_results_batch(
+        ["query", "query"], top_n=5
+    ):
+        assert [symbol for symbol, _ in batch_results] == [
+            symbol for symbol, _ in results[:5]
+        ]
+        assert [rank for _, rank in batch_results] == pytest.approx(
+            [rank for _, rank in results[:5]]
+        )
+    assert [
+        symbol
+        for symbol, _ in symbol_search.get_symbol_code_similarity_results(
+            "query"
+        )
+    ] == list(calculator.calculate_query_similarity_dict(embeddings, "query"))
@@ -1,12 +1,16 @@
-from unittest.mock import MagicMock
+import gc
+from unittest.mock import MagicMock, patch
 
 import numpy as np
+import pytest
 
 from automata.embedding import (
     EmbeddingBuilder,
     EmbeddingSimilarityCalculator,
     EmbeddingVectorProvider,
+    IVFEmbeddingIndex,
 )
+from automata.embedding.embedding_base import get_handler_key
 from automata.memory_store import SymbolCodeEmbeddingHandler
 from automata.symbol_embedding import (
     JSONSymbolEmbeddingVectorDatabase,
@@ -82,3 +86,204 @@ def test_get_nearest_symbols_for_query(
         ordered_embeddings, "symbol3"
     )
     assert list(result.keys())[np.argmax(list(result.values()))] == symbol3
+
+
+def test_embedding_matrix_is_cached_until_the_handler_changes(
+    mock_simple_method_symbols,
+):
+    embeddings = [
+        SymbolCodeEmbedding(
+            key=symbol, vector=np.random.rand(4), document=symbol.uri
+        )
+        for symbol in mock_simple_method_symbols[:3]
+    ]
+    handler = MagicMock(spec=SymbolCodeEmbeddingHandler)
+    handler.revision = 0
+    handler.get_all_ordered_embeddings.return_value = embeddings
+    mock_provider = MagicMock(EmbeddingVectorProvider)
+    mock_provider.build_embedding_vector.return_value = embeddings[1].vector
+    symbol_similarity = EmbeddingSimilarityCalculator(mock_provider)
+
+    embedding_matrix = symbol_similarity.get_embedding_matrix(handler)
+    assert embedding_matrix.vectors.dtype == np.float32
+    assert embedding_matrix.vectors.flags["C_CONTIGUOUS"]
+    assert symbol_similarity.get_embedding_matrix(handler) is embedding_matrix
+    handler.get_all_ordered_embeddings.assert_called_once()
+
+    # The top k agree with the full ordering of the similarities
+    similarities = symbol_similarity.calculate_query_similarity_dict(
+        embedding_matrix, "query"
+    )
+    top_k = symbol_similarity.calculate_query_top_k(
+        embedding_matrix, "query", 2
+    )
+    assert top_k == list(similarities.items())[:2]
+    assert top_k[0][0] == embeddings[1].key
+
+    handler.revision += 1
+    assert (
+        symbol_similarity.get_embedding_matrix(handler) is not embedding_matrix
+    )
+
+
+def test_ivf_index_tracks_the_embedding_handler(
+    mock_simple_method_symbols, temp_output_filename, temp_output_dir
+):
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(8, 16))
+    embeddings = [
+        SymbolCodeEmbedding(
+            key=symbol,
+            vector=centers[i % 8] + 0.1 * rng.normal(size=16),
+            document=symbol.uri,
+        )
+        for i, symbol in enumerate(mock_simple_method_symbols)
+    ]
+    embedding_db = JSONSymbolEmbeddingVectorDatabase(temp_output_filename)
+    embedding_db.batch_add(embeddings[:80])
+    index = IVFEmbeddingIndex(num_lists=8, num_probes=2)
+    handler = SymbolCodeEmbeddingHandler(
+        embedding_db, MagicMock(EmbeddingBuilder), embedding_index=index
+    )
+    mock_provider = MagicMock(EmbeddingVectorProvider)
+    symbol_similarity = EmbeddingSimilarityCalculator(
+        mock_provider, embedding_index=index
+    )
+    exact_similarity = EmbeddingSimilarityCalculator(mock_provider)
+
+    # The approximate top k recall the exact top k on clustered embeddings
+    for embedding in embeddings[:80:7]:
+        mock_provider.build_embedding_vector.return_value = embedding.vector
+        approximate = symbol_similarity.calculate_handler_top_k(
+            handler, "query", 5
+        )
+        exact = exact_similarity.calculate_handler_top_k(handler, "query", 5)
+        assert approximate[0][0] == embedding.key
+        assert {key for key, _ in approximate} == {key for key, _ in exact}
+    assert len(index) == 80 and index.holds_embeddings_of(handler, None)
+
+    # Flushed embeddings are inserted, replacing those they update
+    updated = SymbolCodeEmbedding(
+        key=embeddings[0].key, vector=centers[3], document="updated"
+    )
+    handler.to_discard.append(embeddings[0].key.dotpath)
+    handler.to_add.extend([updated, *embeddings[80:]])
+    handler.flush()
+    assert len(index) == 100 and index.holds_embeddings_of(handler, None)
+    mock_provider.build_embedding_vector.return_value = embeddings[90].vector
+    assert (
+        symbol_similarity.calculate_handler_top_k(handler, "query", 1)[0][0]
+        == embeddings[90].key
+    )
+    mock_provider.build_embedding_vector.return_value = centers[3]
+    top_match, top_similarity = symbol_similarity.calculate_handler_top_k(
+        handler, "query", 1
+    )[0]
+    assert top_match == embeddings[0].key
+    assert top_similarity == pytest.approx(1.0)
+
+    # A saved index searches the same as the original
+    index.save(temp_output_dir)
+    loaded_index = IVFEmbeddingIndex.load(temp_output_dir)
+    query_vector = symbol_similarity._build_query_vector("query")
+    assert loaded_index.search(query_vector, 10) == index.search(
+        query_vector, 10
+    )
+
+
+def test_ivf_index_is_keyed_on_the_embedding_handler(
+    mock_simple_method_symbols, temp_output_filename, temp_output_dir
+):
+    rng = np.random.default_rng(0)
+    embeddings = [
+        SymbolCodeEmbedding(
+            key=symbol, vector=rng.normal(size=16), document=symbol.uri
+        )
+        for symbol in mock_simple_method_symbols[:40]
+    ]
+    embedding_db = JSONSymbolEmbeddingVectorDatabase(temp_output_filename)
+    embedding_db.batch_add(embeddings)
+    handler = SymbolCodeEmbeddingHandler(
+        embedding_db, MagicMock(EmbeddingBuilder)
+    )
+    index = IVFEmbeddingIndex(num_lists=4)
+    symbol_similarity = EmbeddingSimilarityCalculator(
+        MagicMock(EmbeddingVectorProvider), embedding_index=index
+    )
+    symbol_similarity.get_embedding_index(handler)
+    index.save(temp_output_dir)
+
+    # Another handler at the same revision does not share the index
+    other_handler = SymbolCodeEmbeddingHandler(
+        embedding_db, MagicMock(EmbeddingBuilder)
+    )
+    other_handler.filter_symbols(other_handler.sorted_supported_symbols[:20])
+    other_handler.revision = handler.revision
+    assert index.holds_embeddings_of(handler, None)
+    assert not index.holds_embeddings_of(
+        other_handler,
+        lambda: symbol_similarity.get_embedding_matrix(other_handler),
+    )
+    assert len(symbol_similarity.get_embedding_index(other_handler)) == 20
+
+    # A loaded index is adopted only if its checksum matches the embeddings
+    loaded_index = IVFEmbeddingIndex.load(temp_output_dir)
+    loaded_similarity = EmbeddingSimilarityCalculator(
+        MagicMock(EmbeddingVectorProvider), embedding_index=loaded_index
+    )
+    with patch.object(loaded_index, "build") as build:
+        assert loaded_similarity.get_embedding_index(handler) is loaded_index
+    build.assert_not_called()
+
+    stale_index = IVFEmbeddingIndex.load(temp_output_dir)
+    handler.filter_symbols(handler.sorted_supported_symbols[:30])
+    assert not stale_index.holds_embeddings_of(
+        handler, lambda: symbol_similarity.get_embedding_matrix(handler)
+    )
+
+
+def test_embedding_cache_follows_changes_outside_the_handler(
+    mock_simple_method_symbols, temp_output_filename
+):
+    rng = np.random.default_rng(0)
+    embeddings = [
+        SymbolCodeEmbedding(
+            key=symbol, vector=rng.normal(size=16), document=symbol.uri
+        )
+        for symbol in mock_simple_method_symbols[:40]
+    ]
+    embedding_db = JSONSymbolEmbeddingVectorDatabase(temp_output_filename)
+    embedding_db.batch_add(embeddings[:30])
+    handler = SymbolCodeEmbeddingHandler(
+        embedding_db, MagicMock(EmbeddingBuilder)
+    )
+    index = IVFEmbeddingIndex(num_lists=4)
+    symbol_similarity = EmbeddingSimilarityCalculator(
+        MagicMock(EmbeddingVectorProvider), embedding_index=index
+    )
+    embedding_matrix = symbol_similarity.get_embedding_matrix(handler)
+    symbol_similarity.get_embedding_index(handler)
+
+    # Entries added to the database directly invalidate the cached data
+    embedding_db.batch_add(embeddings[30:])
+    handler.sorted_supported_symbols = mock_simple_method_symbols[:40]
+    assert not index.holds_embeddings_of(handler, None)
+    assert len(symbol_similarity.get_embedding_matrix(handler)) == 40
+    assert len(symbol_similarity.get_embedding_index(handler)) == 40
+    assert len(embedding_matrix) == 30
+
+    # The key of a collected handler matches no other handler
+    handler_key = get_handler_key(handler)
+    del handler
+    gc.collect()
+    other_handler = SymbolCodeEmbeddingHandler(
+        embedding_db, MagicMock(EmbeddingBuilder)
+    )
+    other_handler.sorted_supported_symbols = mock_simple_method_symbols[:40]
+    assert handler_key != get_handler_key(other_handler)
+    assert not index.holds_embeddings_of(other_handler, None)
+
+
+def test_ivf_index_requires_a_probe():
+    with pytest.raises(ValueError):
+        IVFEmbeddingIndex(num_probes=0)
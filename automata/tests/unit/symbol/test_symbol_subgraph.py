@@ -1,5 +1,4 @@
 import os
-import pickle
 from unittest import mock
 
 import networkx as nx
@@ -7,8 +6,16 @@ import pytest
 from google.protobuf.message import Message
 
 from automata.cli.cli_utils import initialize_py_module_loader
+from automata.core.saved_arrays import is_saved
+from automata.experimental.search import SymbolRank, SymbolRankConfig
 from automata.singletons.dependency_factory import DependencyFactory
 from automata.symbol import SymbolGraph
+from automata.symbol.graph.symbol_graph_compact import (
+    SYMBOL_DIGRAPH_FORMAT,
+    load_symbol_digraph,
+)
+from automata.symbol.graph.symbol_graph_metrics import SymbolGraphMetrics
+from automata.symbol.graph.symbol_rank_basis import SymbolRankBasis
 
 
 class MockProtoBuf(Message):
@@ -18,12 +25,16 @@ class MockProtoBuf(Message):
 
 class MockDocument:
     def __init__(self, *args, **kwargs):
+        self.relative_path = ""
         self.symbols = []
         self.occurrences = []
 
+    def SerializeToString(self):
+        return b""
+
 
 @pytest.fixture
-def symbol_graph_mocked_index():
+def symbol_graph_mocked_index(tmp_data_path):
     initialize_py_module_loader()
     with mock.patch(
         "automata.symbol.graph.symbol_graph._load_index_protobuf",
@@ -40,23 +51,124 @@ def symbol_graph_mocked_index():
     return graph
 
 
-def test_subgraph_pickle_creation(symbol_graph_mocked_index):
-    symbol_graph_mocked_index.default_rankable_subgraph
+def test_subgraph_serialization(symbol_graph_mocked_index):
+    subgraph = symbol_graph_mocked_index.default_rankable_subgraph
+
+    assert is_saved(
+        symbol_graph_mocked_index.subgraph_path, SYMBOL_DIGRAPH_FORMAT
+    ), f"No saved subgraph found at {symbol_graph_mocked_index.subgraph_path}"
+
+    loaded_subgraph = load_symbol_digraph(
+        symbol_graph_mocked_index.subgraph_path
+    )
+    assert isinstance(loaded_subgraph, nx.DiGraph)
+    assert list(loaded_subgraph.edges()) == list(subgraph.edges())
+
+
+@pytest.fixture
+def test_index_path() -> str:
+    file_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(file_dir, "..", "..", "test.scip")
+
+
+@pytest.fixture
+def rankable_subgraph(fake_symbol_dependencies):
+    def get_rankable_subgraph(graph, path_filter=None):
+        fake_symbol_dependencies(graph)
+        return graph.get_rankable_subgraph(path_filter)
+
+    return get_rankable_subgraph
+
+
+def test_rankable_subgraph_matches_across_workers(
+    test_index_path, rankable_subgraph
+):
+    serial_graph = SymbolGraph(test_index_path, save_graph_pickle=False)
+    parallel_graph = SymbolGraph(
+        test_index_path, save_graph_pickle=False, num_workers=2
+    )
+    serial_subgraph = rankable_subgraph(serial_graph, "automata")
+    parallel_subgraph = rankable_subgraph(parallel_graph, "automata")
+
+    assert serial_subgraph.number_of_edges() > 0
+    assert set(serial_subgraph.edges()) == set(parallel_subgraph.edges())
+    # Dependencies outside of the filter are kept as neighbours
+    assert all(
+        source.dotpath.startswith("automata")
+        or target.dotpath.startswith("automata")
+        for source, target in serial_subgraph.edges()
+    )
+
+
+def test_rankable_subgraph_cached_per_path_filter(
+    test_index_path, rankable_subgraph
+):
+    graph = SymbolGraph(test_index_path, save_graph_pickle=False)
+    subgraph = rankable_subgraph(graph, "automata")
+    assert rankable_subgraph(graph, "automata") is subgraph
+    assert rankable_subgraph(graph, "automata.core") is not subgraph
+
+    graph.filter_symbols(graph.get_sorted_supported_symbols()[1:])
+    assert rankable_subgraph(graph, "automata") is not subgraph
+
+
+def test_metrics_saved_with_graph(
+    test_index_path, tmp_data_path, rankable_subgraph
+):
+    graph = SymbolGraph(test_index_path, save_graph_pickle=False)
+    subgraph = rankable_subgraph(graph)
+    graph.from_pickle = graph.save_graph_pickle = True
+    metrics = graph.get_metrics()
+
+    expected = SymbolRank(subgraph, SymbolRankConfig()).get_ordered_ranks()
+    assert dict(metrics.get_ordered_ranks()) == pytest.approx(dict(expected))
+    symbol = metrics.symbols[0]
+    assert metrics.get_symbol_metrics(symbol)["reference_count"] == sum(
+        len(references)
+        for references in graph.get_references_to_symbol(symbol).values()
+    )
+
+    # Saved metrics are loaded instead of being recomputed
+    graph._metrics = None
+    with mock.patch.object(SymbolGraphMetrics, "compute") as mock_compute:
+        loaded = graph.get_metrics()
+    mock_compute.assert_not_called()
+    assert loaded.symbols == metrics.symbols
+    assert loaded.get_ordered_ranks() == metrics.get_ordered_ranks()
+    assert graph.get_metrics(alpha=0.5).alpha == 0.5
+
+
+def test_rank_basis_saved_with_graph(
+    test_index_path, tmp_data_path, rankable_subgraph
+):
+    graph = SymbolGraph(test_index_path, save_graph_pickle=False)
+    subgraph = rankable_subgraph(graph)
+    graph.from_pickle = graph.save_graph_pickle = True
+    basis = graph.get_rank_basis(top_k=len(subgraph))
 
-    with mock.patch("os.path.exists") as mock_exists:
-        mock_exists.return_value = True
-        assert os.path.exists(
-            symbol_graph_mocked_index.subgraph_pickle_path
-        ), f"No pickle file found at {symbol_graph_mocked_index.subgraph_pickle_path}"
+    ranks = SymbolRank(
+        subgraph, SymbolRankConfig(basis_top_k=len(subgraph)), basis=basis
+    ).get_ordered_ranks()
+    assert dict(ranks) == pytest.approx(
+        nx.pagerank(subgraph, alpha=0.25, tol=1e-14, max_iter=1000),
+        abs=1e-8,
+    )
 
-        with mock.patch(
-            "builtins.open",
-            new_callable=mock.mock_open,
-            read_data=pickle.dumps(nx.DiGraph()),
-        ) as _:
-            with open(
-                symbol_graph_mocked_index.subgraph_pickle_path, "rb"
-            ) as f:
-                pickled_subgraph = pickle.load(f)
+    # Saved bases are loaded instead of being recomputed
+    graph._rank_basis = None
+    with mock.patch.object(SymbolRankBasis, "compute") as mock_compute:
+        loaded = graph.get_rank_basis(top_k=len(subgraph))
+    mock_compute.assert_not_called()
+    assert loaded.symbols == basis.symbols
+    assert (loaded.matrix != basis.matrix).nnz == 0
+    assert loaded.fingerprint == basis.fingerprint
 
-    assert isinstance(pickled_subgraph, nx.DiGraph)
+    # Saved bases of another subgraph are recomputed
+    graph._rank_basis = None
+    subgraph.remove_edge(*next(iter(subgraph.edges())))
+    with mock.patch.object(
+        SymbolRankBasis, "compute", wraps=SymbolRankBasis.compute
+    ) as mock_compute:
+        recomputed = graph.get_rank_basis(top_k=len(subgraph))
+    mock_compute.assert_called_once()
+    assert recomputed.matches_graph(subgraph)
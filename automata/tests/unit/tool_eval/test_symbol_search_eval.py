@@ -87,6 +87,17 @@ def test_symbol_search_eval_result_not_match(expected_action):
     assert not symbol_search_eval_result.is_partial_match
 
 
+def test_symbol_search_eval_result_recall_at_k(expected_action):
+    observed_action = SymbolSearchAction.from_payload(
+        {"query": "test_query", "search_results": "result3,result4,result1"}
+    )
+    symbol_search_eval_result = SymbolSearchEvalResult(
+        expected_action, observed_action
+    )
+    assert symbol_search_eval_result.recall_at_k == pytest.approx(2 / 3)
+    assert SymbolSearchEvalResult(expected_action, None).recall_at_k == 0.0
+
+
 def test_symbol_search_eval_result_from_payload(expected_action):
     observed_action = SymbolSearchAction.from_payload(
         {"query": "test_query", "search_results": "result1,result2"}
@@ -28,3 +28,4 @@ def test_tool_evaluation_harness_and_metrics(tool_eval_harness, setup_tool):
     assert metrics.total_partial_matches == 5
     assert metrics.full_match_rate == 0.4
     assert metrics.partial_match_rate == 1.0
+    assert metrics.average_recall_at_k == 0.8